@@ -7,9 +7,10 @@ import sys
 import asyncio
 from pathlib import Path
 from PyQt6.QtWidgets import QApplication
-from PyQt6.QtCore import QSettings, QTimer
+from PyQt6.QtCore import QSettings
 from PyQt6.QtGui import QIcon
 from loguru import logger
+from qasync import QEventLoop
 
 from src.ui.main_window import MainWindow
 from src.core.config import Config
@@ -23,6 +24,7 @@ class PatentFlowApp:
         self.app = None
         self.main_window = None
         self.config = Config()
+        self.unhandled_errors = 0
         
     def setup_application(self):
         """Initialize the PyQt6 application"""
@@ -87,25 +89,47 @@ class PatentFlowApp:
         
         logger.info("Main window created and shown")
         
+    async def run_async(self):
+        """Show the main window and wait until the application quits"""
+        # Keep the loop alive after the last window closes so shutdown can finish
+        quit_event = asyncio.Event()
+        self.app.setQuitOnLastWindowClosed(False)
+        self.app.lastWindowClosed.connect(quit_event.set)
+
+        self.create_main_window()
+        await quit_event.wait()
+
+        # Window is gone; finish background work before the loop closes
+        await self.main_window.shutdown()
+
+    def handle_loop_exception(self, loop, context):
+        """Log an error no task awaited and remember it for the exit code"""
+        self.unhandled_errors += 1
+        error = context.get("exception") or context.get("message")
+        logger.error(f"Unhandled error in event loop: {error!r}")
+
     def run(self):
-        """Run the application event loop"""
+        """Run Qt and asyncio on one integrated event loop"""
         try:
             self.setup_application()
-            self.create_main_window()
-            
-            # Start async event loop
-            timer = QTimer()
-            timer.timeout.connect(lambda: None)
-            timer.start(100)
-            
-            # Run the application
-            exit_code = self.app.exec()
-            logger.info(f"Application exited with code: {exit_code}")
-            return exit_code
-            
+
+            # Qt drives the asyncio loop, so coroutines run on the GUI thread
+            loop = QEventLoop(self.app)
+            asyncio.set_event_loop(loop)
+            loop.set_exception_handler(self.handle_loop_exception)
+            with loop:
+                loop.run_until_complete(self.run_async())
+
         except Exception as e:
-            logger.error(f"Application error: {e}")
+            logger.exception(f"Application error: {e}")
+            return 1
+
+        # Background failures don't stop the loop, but the exit code must still report them
+        if self.unhandled_errors:
+            logger.error(f"Application exited after {self.unhandled_errors} unhandled errors")
             return 1
+        logger.info("Application exited")
+        return 0
 
 
 def main():
@@ -0,0 +1,148 @@
+"""Persistent cache of analysis results.
+
+Results are keyed by the SHA-256 of the analyzed text together with the
+rule configuration and the engine version, so an unchanged document with
+unchanged settings is answered from disk, including after a restart, while
+any change to the text, the selected rules or the rules themselves misses.
+Entries are stored as compact JSON in an :class:`OfflineDraftCache`, which
+provides compressed storage and lets the :class:`~.cache_manager.CacheManager`
+evict them under the shared byte budget.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import asdict
+from datetime import datetime
+from enum import Enum
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+from src.models.document import (
+    AnalysisResult,
+    AnalysisType,
+    ClaimEdge,
+    ClaimGraph,
+    ClaimNode,
+    Finding,
+    FindingType,
+    Severity,
+    TextAnchor,
+)
+
+from .offline_cache import OfflineDraftCache
+
+
+def cache_key(content_digest: str, fingerprint: Dict[str, Any]) -> str:
+    """Key for a result of analyzing content ``content_digest`` under ``fingerprint``."""
+
+    payload = json.dumps({"content": content_digest, **fingerprint}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def encode_result(result: AnalysisResult) -> str:
+    return json.dumps(asdict(result), default=_json_default, separators=(",", ":"))
+
+
+def _datetime(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def _finding(data: Dict[str, Any]) -> Finding:
+    anchor = data.get("anchor")
+    return Finding(
+        id=data["id"],
+        type=FindingType(data["type"]),
+        severity=Severity(data["severity"]),
+        title=data["title"],
+        description=data["description"],
+        suggestion=data.get("suggestion"),
+        context=data.get("context", ""),
+        anchor=TextAnchor(**anchor) if anchor else None,
+        metadata=data.get("metadata", {}),
+        confidence=data.get("confidence"),
+        created_at=_datetime(data.get("created_at")) or datetime.now(),
+    )
+
+
+def decode_result(text: str) -> AnalysisResult:
+    """Inverse of :func:`encode_result`; raises ``ValueError`` on malformed input."""
+
+    try:
+        data = json.loads(text)
+        graph = data.get("claim_graph")
+        claim_graph = None
+        if graph is not None:
+            nodes = []
+            for node in graph["nodes"]:
+                severity = node.get("severity")
+                nodes.append(ClaimNode(**{**node, "severity": Severity(severity) if severity else None}))
+            claim_graph = ClaimGraph(
+                nodes=nodes,
+                edges=[ClaimEdge(**edge) for edge in graph["edges"]],
+                metadata=graph.get("metadata", {}),
+            )
+        return AnalysisResult(
+            analysis_id=data["analysis_id"],
+            document_id=data["document_id"],
+            analysis_type=AnalysisType(data["analysis_type"]),
+            findings=[_finding(finding) for finding in data["findings"]],
+            claim_graph=claim_graph,
+            terminology_analysis=data.get("terminology_analysis"),
+            numeral_analysis=data.get("numeral_analysis"),
+            summary=data.get("summary"),
+            metrics=data.get("metrics"),
+            started_at=_datetime(data.get("started_at")) or datetime.now(),
+            completed_at=_datetime(data.get("completed_at")),
+        )
+    except (KeyError, TypeError, json.JSONDecodeError) as exc:
+        raise ValueError(f"malformed analysis result: {exc}") from exc
+
+
+class AnalysisResultCache(OfflineDraftCache):
+    """Analysis results on disk, looked up by :func:`cache_key`.
+
+    Registered with a cache manager as an optional cache, it stores and
+    serves nothing while caching is disabled. Puts rewrite the index at most
+    every ``index_write_interval`` seconds; call :meth:`flush` on shutdown.
+    """
+
+    def __init__(self, data_dir: Path, dirname: str = "analysis", index_write_interval: float = 5.0):
+        # Every key names one immutable result, so there is nothing to delta against. Results
+        # can be recomputed, so a crash may lose the last few puts rather than every put
+        # rewriting the whole index.
+        super().__init__(
+            data_dir, filename=None, dirname=dirname, max_deltas=0, index_write_interval=index_write_interval
+        )
+
+    def get(self, key: str) -> Optional[AnalysisResult]:
+        manager = self.cache_manager
+        if manager is not None and not manager.admits(self.cache_name):
+            return None
+        entry = self.load_draft(key)
+        if entry is None:
+            return None
+        try:
+            return decode_result(entry.content)
+        except ValueError as exc:
+            logger.warning(f"Discarding unreadable cached analysis {key[:12]}: {exc}")
+            self.remove_draft(key)
+            return None
+
+    def put(self, key: str, result: AnalysisResult) -> None:
+        self.save_draft(
+            key,
+            encode_result(result),
+            {"document_id": result.document_id, "analysis_type": result.analysis_type.value},
+        )
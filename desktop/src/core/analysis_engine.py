@@ -0,0 +1,400 @@
+"""Rule-based patent analysis.
+
+The engine parses a :class:`DocumentSnapshot` once into an immutable
+:class:`ParsedDocument` and runs the enabled rules concurrently against it.
+Rules run on a thread pool rather than in worker processes: the parsed
+document is shared without being pickled per rule, which for a long
+application costs more than the rules themselves. Findings are filtered by
+severity and assembled into an :class:`AnalysisResult` with a claim graph,
+a summary and per-rule timings. With an :class:`AnalysisResultCache`,
+results for text and settings analyzed before are returned without running
+any rule.
+
+Passing the previous result of the same document makes a run incremental:
+the engine keeps each recent run's per-unit rule results (see
+:mod:`.analysis_rules`), so only paragraphs and claims whose content
+changed, and document-scoped rules, are recomputed.
+
+Every run carries a :class:`CancellationToken` that rules check between
+units. A run stops with :class:`AnalysisCancelled` when its token is
+cancelled, when it exceeds the engine's time limit, or when a newer run for
+the same ``document_key`` starts.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from dataclasses import dataclass, replace
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from src.models.document import (
+    AnalysisConfig,
+    AnalysisResult,
+    AnalysisType,
+    ClaimEdge,
+    ClaimGraph,
+    ClaimNode,
+    DocumentSnapshot,
+    Finding,
+    Severity,
+)
+from src.utils.exceptions import AnalysisCancelled
+
+from .analysis_cache import AnalysisResultCache, cache_key
+from .analysis_rules import DEFAULT_REGISTRY, AnalysisRule, RuleContext, RuleRegistry, ScopeMemo
+from .cancellation import DEADLINE_EXCEEDED, SUPERSEDED, CancellationToken
+from .content_store import content_digest
+from .document_parser import ParsedDocument, parse_snapshot
+
+# Bumped whenever rule behaviour changes in a way that alters results.
+ENGINE_VERSION = "1"
+
+ANALYSIS_TYPES: Dict[str, AnalysisType] = {
+    "claims": AnalysisType.CLAIMS_ANALYSIS,
+    "terminology": AnalysisType.TERMINOLOGY_ANALYSIS,
+    "full": AnalysisType.FULL_ANALYSIS,
+}
+
+SEVERITY_ORDER = [Severity.CRITICAL, Severity.HIGH, Severity.MEDIUM, Severity.LOW, Severity.INFO]
+# Penalty points per finding; the score halves for every SCORE_HALF_PENALTY points.
+SCORE_HALF_PENALTY = 50.0
+SEVERITY_PENALTY = {Severity.CRITICAL: 10.0, Severity.HIGH: 5.0, Severity.MEDIUM: 2.0, Severity.LOW: 0.5, Severity.INFO: 0.0}
+
+# Runs whose unit results are kept for incremental re-analysis.
+MAX_RETAINED_RUNS = 8
+
+
+@dataclass
+class _RunState:
+    """Per-rule unit results of one run, keyed by the settings they were computed under."""
+
+    fingerprint: Dict[str, Any]
+    memos: Dict[str, ScopeMemo]
+
+
+class AnalysisEngine:
+    """Runs registered rules over document snapshots."""
+
+    def __init__(
+        self,
+        config: Optional[AnalysisConfig] = None,
+        registry: RuleRegistry = DEFAULT_REGISTRY,
+        max_workers: Optional[int] = None,
+        cache: Optional[AnalysisResultCache] = None,
+        max_processing_time: Optional[float] = None,
+    ):
+        self.config = config or AnalysisConfig()
+        self.registry = registry
+        self.cache = cache
+        self.max_processing_time = max_processing_time
+        self._runs: "OrderedDict[str, _RunState]" = OrderedDict()
+        self._runs_lock = threading.Lock()
+        self._in_flight: Dict[str, CancellationToken] = {}
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or min(4, os.cpu_count() or 1), thread_name_prefix="analysis-rule"
+        )
+        # One writer, so cache puts never compete with rules and land in order.
+        self._cache_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="analysis-cache")
+
+    def rules(self, analysis_type: str = "full") -> List[AnalysisRule]:
+        return self.registry.select(self.config.enabled_rules, analysis_type)
+
+    def fingerprint(self, analysis_type: str = "full") -> Dict[str, Any]:
+        """Everything besides the text that determines a result."""
+
+        return {
+            "engine": ENGINE_VERSION,
+            "analysis_type": analysis_type,
+            "rules": [rule.name for rule in self.rules(analysis_type)],
+            "severities": sorted(severity.value for severity in self.config.severity_filters),
+            "confidence_threshold": self.config.confidence_threshold,
+        }
+
+    def analyze(
+        self,
+        snapshot: DocumentSnapshot,
+        analysis_type: str = "full",
+        previous: Optional[AnalysisResult] = None,
+        token: Optional[CancellationToken] = None,
+        document_key: Optional[str] = None,
+    ) -> AnalysisResult:
+        """Analyze ``snapshot``; ``analysis_type`` is ``"claims"``, ``"terminology"`` or ``"full"``.
+
+        With ``previous`` (an earlier result for this document from this
+        engine), unchanged paragraphs and claims are not checked again.
+        Falls back to a full run if that run's state is no longer held or
+        was computed under other settings.
+
+        A result served from the cache can seed an incremental run only
+        while this engine still holds the state of the run that produced it;
+        after a restart, the first edit to a cached result runs in full.
+
+        Without ``token``, the run gets one that expires after
+        ``max_processing_time``. Starting a run with a ``document_key``
+        cancels the run in flight under the same key. Raises
+        :class:`AnalysisCancelled` if the run is stopped.
+        """
+
+        if analysis_type not in ANALYSIS_TYPES:
+            raise ValueError(f"Unknown analysis type: {analysis_type}")
+        if token is None:
+            token = CancellationToken(self.max_processing_time)
+        if document_key is not None:
+            with self._runs_lock:
+                superseded = self._in_flight.get(document_key)
+                self._in_flight[document_key] = token
+            if superseded is not None:
+                superseded.cancel(SUPERSEDED)
+        try:
+            return self._analyze(snapshot, analysis_type, previous, token)
+        finally:
+            if document_key is not None:
+                with self._runs_lock:
+                    if self._in_flight.get(document_key) is token:
+                        del self._in_flight[document_key]
+
+    def _analyze(
+        self,
+        snapshot: DocumentSnapshot,
+        analysis_type: str,
+        previous: Optional[AnalysisResult],
+        token: CancellationToken,
+    ) -> AnalysisResult:
+        fingerprint = self.fingerprint(analysis_type)
+        key = None
+        if self.cache is not None:
+            key = cache_key(content_digest(snapshot.content.encode("utf-8")), fingerprint)
+            cached = self.cache.get(key)
+            if cached is not None:
+                logger.info(f"{analysis_type} analysis: {len(cached.findings)} findings from cache")
+                return replace(cached, document_id=snapshot.checksum, metrics={**(cached.metrics or {}), "cached": True})
+        token.raise_if_cancelled()
+        started_at = datetime.now()
+        start = time.perf_counter()
+        doc = parse_snapshot(snapshot)
+        parse_ms = (time.perf_counter() - start) * 1000
+
+        context = RuleContext(
+            analysis_type=analysis_type, confidence_threshold=self.config.confidence_threshold, token=token
+        )
+        rules = self.rules(analysis_type)
+        prior = self._prior_memos(previous, fingerprint)
+        token.raise_if_cancelled()
+        futures = [
+            self._executor.submit(self._run_rule, rule, doc, context, prior.get(rule.name)) for rule in rules
+        ]
+        findings: List[Finding] = []
+        memos: Dict[str, ScopeMemo] = {}
+        rule_ms: Dict[str, float] = {}
+        failed: List[str] = []
+        units = reused = 0
+        # Collected in registry order so results do not depend on thread scheduling.
+        for rule, future in zip(rules, futures):
+            rule_findings, memo, rule_reused, elapsed, ok = self._wait(future, futures, token)
+            findings.extend(rule_findings)
+            rule_ms[rule.name] = round(elapsed, 2)
+            if ok:
+                memos[rule.name] = memo
+                units += len(memo)
+                reused += rule_reused
+            else:
+                failed.append(rule.name)
+        produced = len(findings)
+        findings = _unique_ids(sorted(self._filter(findings, context), key=_finding_sort_key))
+
+        total_ms = (time.perf_counter() - start) * 1000
+        result = AnalysisResult(
+            analysis_id=uuid.uuid4().hex,
+            document_id=snapshot.checksum,
+            analysis_type=ANALYSIS_TYPES[analysis_type],
+            findings=findings,
+            claim_graph=build_claim_graph(doc, findings),
+            summary=summarize(findings),
+            metrics={
+                "engine_version": ENGINE_VERSION,
+                "parse_ms": round(parse_ms, 2),
+                "total_ms": round(total_ms, 2),
+                "rule_ms": rule_ms,
+                "rules_run": len(rules),
+                "rules_failed": failed,
+                "incremental": bool(prior),
+                "units_checked": units - reused,
+                "units_reused": reused,
+                "findings_before_filter": produced,
+                "paragraphs": len(doc.paragraphs),
+                "claims": len(doc.claims),
+                "words": doc.word_count,
+            },
+            started_at=started_at,
+            completed_at=datetime.now(),
+        )
+        logger.info(
+            f"{analysis_type} analysis: {len(findings)} findings from {len(rules)} rules in {total_ms:.0f} ms"
+            + (f" ({reused} of {units} units reused)" if prior else "")
+        )
+        with self._runs_lock:
+            self._runs[result.analysis_id] = _RunState(fingerprint, memos)
+            while len(self._runs) > MAX_RETAINED_RUNS:
+                self._runs.popitem(last=False)
+        if key is not None and not failed:
+            # Serializing a finding-heavy result can take longer than the analysis itself.
+            self._cache_writer.submit(self._store, key, result)
+        return result
+
+    def _store(self, key: str, result: AnalysisResult) -> None:
+        try:
+            self.cache.put(key, result)
+        except Exception as exc:  # pragma: no cover - defensive
+            logger.warning(f"Could not cache analysis result: {exc}")
+
+    def _prior_memos(self, previous: Optional[AnalysisResult], fingerprint: Dict[str, Any]) -> Dict[str, ScopeMemo]:
+        if previous is None:
+            return {}
+        with self._runs_lock:
+            state = self._runs.get(previous.analysis_id)
+        if state is None or state.fingerprint != fingerprint:
+            return {}
+        return state.memos
+
+    @staticmethod
+    def _wait(future: Future, futures: List[Future], token: CancellationToken) -> Tuple:
+        """A rule's outcome; on cancellation, drop the rules not yet started and re-raise.
+
+        Rules that never reach a checkpoint cannot hold the caller past the deadline.
+        """
+
+        try:
+            return future.result(timeout=token.remaining())
+        except FutureTimeout:
+            token.cancel(DEADLINE_EXCEEDED)
+            error = AnalysisCancelled(DEADLINE_EXCEEDED)
+        except AnalysisCancelled as exc:
+            error = exc
+        for pending in futures:
+            pending.cancel()
+        raise error
+
+    @staticmethod
+    def _run_rule(
+        rule: AnalysisRule, doc: ParsedDocument, context: RuleContext, previous: Optional[ScopeMemo]
+    ) -> Tuple[List[Finding], ScopeMemo, int, float, bool]:
+        start = time.perf_counter()
+        try:
+            findings, memo, reused = rule.evaluate(doc, context, previous)
+            ok = True
+        except AnalysisCancelled:
+            raise
+        except Exception as exc:
+            # One broken rule should not cost the user the rest of the analysis.
+            logger.exception(f"Analysis rule {rule.name} failed: {exc}")
+            findings, memo, reused, ok = [], {}, 0, False
+        return findings, memo, reused, (time.perf_counter() - start) * 1000, ok
+
+    def _filter(self, findings: List[Finding], context: RuleContext) -> List[Finding]:
+        severities = set(self.config.severity_filters)
+        return [
+            finding
+            for finding in findings
+            if (not severities or finding.severity in severities)
+            and finding.confidence >= context.confidence_threshold
+        ]
+
+    def cancel_all(self) -> None:
+        """Cancel every run in flight that has a ``document_key``."""
+
+        with self._runs_lock:
+            tokens = list(self._in_flight.values())
+        for token in tokens:
+            token.cancel()
+
+    def close(self) -> None:
+        """Cancel runs in flight and wait for pending cache writes."""
+
+        self.cancel_all()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._cache_writer.shutdown(wait=True)
+
+
+def _unique_ids(findings: List[Finding]) -> List[Finding]:
+    """Suffix ids shared by findings in identical paragraphs, in document order."""
+
+    seen: Counter = Counter()
+    unique = []
+    for finding in findings:
+        count = seen[finding.id]
+        seen[finding.id] += 1
+        unique.append(replace(finding, id=f"{finding.id}-{count}") if count else finding)
+    return unique
+
+
+def _finding_sort_key(finding: Finding) -> Tuple[int, int, int]:
+    anchor = finding.anchor
+    return (
+        SEVERITY_ORDER.index(finding.severity),
+        anchor.paragraph_index if anchor else -1,
+        anchor.start_offset if anchor else -1,
+    )
+
+
+def summarize(findings: List[Finding]) -> Dict:
+    """Counts per severity and type, plus a 0-100 quality score."""
+
+    counts = {severity: 0 for severity in SEVERITY_ORDER}
+    by_type: Dict[str, int] = {}
+    for finding in findings:
+        counts[finding.severity] += 1
+        by_type[finding.type.value] = by_type.get(finding.type.value, 0) + 1
+    penalty = sum(SEVERITY_PENALTY[severity] * count for severity, count in counts.items())
+    return {
+        "total_issues": len(findings),
+        "critical_issues": counts[Severity.CRITICAL],
+        "high_issues": counts[Severity.HIGH],
+        "medium_issues": counts[Severity.MEDIUM],
+        "low_issues": counts[Severity.LOW],
+        "info_issues": counts[Severity.INFO],
+        "by_type": by_type,
+        "score": round(100 * SCORE_HALF_PENALTY / (SCORE_HALF_PENALTY + penalty)),
+    }
+
+
+def build_claim_graph(doc: ParsedDocument, findings: List[Finding]) -> ClaimGraph:
+    """Claim dependency graph; each node carries the worst severity found in its claim."""
+
+    claim_of_paragraph = {paragraph: claim.number for claim in doc.claims for paragraph in claim.paragraphs}
+    worst: Dict[int, Severity] = {}
+    issues: Dict[int, int] = {}
+    for finding in findings:
+        number = claim_of_paragraph.get(finding.anchor.paragraph_index) if finding.anchor else None
+        if number is None:
+            continue
+        issues[number] = issues.get(number, 0) + 1
+        if number not in worst or SEVERITY_ORDER.index(finding.severity) < SEVERITY_ORDER.index(worst[number]):
+            worst[number] = finding.severity
+    nodes = [
+        ClaimNode(
+            id=f"claim_{number}",
+            claim_number=number,
+            claim_type="independent" if claim.is_independent else "dependent",
+            category=claim.category,
+            text=claim.text,
+            severity=worst.get(number),
+            issue_count=issues.get(number, 0),
+        )
+        for number, claim in doc.claims_by_number.items()
+    ]
+    edges = [
+        ClaimEdge(from_node=f"claim_{number}", to_node=f"claim_{parent}")
+        for number, claim in doc.claims_by_number.items()
+        for parent in claim.dependencies
+        if parent in doc.claims_by_number and parent != number
+    ]
+    return ClaimGraph(nodes=nodes, edges=edges)
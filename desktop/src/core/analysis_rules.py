@@ -0,0 +1,887 @@
+"""Rule-based checks run by the analysis engine.
+
+Each rule inspects a shared, read-only :class:`ParsedDocument` and returns
+:class:`Finding` objects. Rules are registered under the
+:class:`FindingType` they produce, so the ``enabled_rules`` list of an
+analysis config selects them by type value (``"antecedent_basis"``) or by
+rule name. Finding ids are derived from the rule, the anchored paragraph's
+text and the subject, so they survive re-analysis and edits elsewhere.
+
+Rules declare a scope. Paragraph- and claim-scoped rules split their work
+into units, each with a key covering everything its result depends on; an
+incremental run reuses the result of every unit whose key it has seen, even
+if the unit moved. Document-scoped rules run in full each time, though they
+may split the per-paragraph part of their work the same way.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+from collections import Counter, defaultdict
+from dataclasses import dataclass, replace
+from typing import Any, Dict, FrozenSet, Hashable, Iterable, Iterator, List, Optional, Sequence, Set, Tuple, Type
+
+from src.models.document import Finding, FindingType, Severity, TextAnchor
+
+from .cancellation import CancellationToken
+from .document_parser import ParsedClaim, ParsedDocument
+
+# Values accepted for ``analysis_type`` (the strings the main window passes).
+ALL_ANALYSIS_TYPES: FrozenSet[str] = frozenset({"claims", "terminology", "full"})
+
+CONTEXT_CHARS = 60
+
+PARAGRAPH_SCOPE = "paragraph"
+CLAIM_SCOPE = "claim"
+DOCUMENT_SCOPE = "document"
+
+# Paragraph indexes a unit of work covers.
+Unit = Tuple[int, ...]
+# Unit key -> (unit, result) from a previous run, for reuse by the next.
+ScopeMemo = Dict[Hashable, Tuple[Unit, Any]]
+
+_WORD = re.compile(r"[A-Za-z][A-Za-z'-]*")
+
+# Words that end a noun phrase after "a"/"the": function words and the verbs
+# and participles claims use to join elements.
+STOPWORDS: FrozenSet[str] = frozenset(
+    """
+    a an the said this that these those each every any all some another such
+    of to and or nor but in on at by with for from into onto over under upon
+    within without between among through via about against along around
+    is are was were be been being has have having had do does can may must
+    shall should will would not no than then thereby therein thereof thereto
+    wherein whereby which who whom whose when where while whereas so as if
+    comprising comprises comprise comprised including includes include
+    consisting consists having containing contains defining defines
+    configured adapted operable arranged disposed positioned located mounted
+    coupled connected attached secured fixed formed provided extending
+    extends extend further also respectively least more less one two
+    preferably optionally substantially approximately generally thereon
+    """.split()
+)
+
+# Verbs after which a bare noun introduces an element ("having blades").
+INTRODUCING_VERBS: FrozenSet[str] = frozenset(
+    {"comprising", "comprises", "including", "includes", "having", "has", "have", "with", "containing", "contains"}
+)
+
+# Nouns that never need antecedent basis ("the same", "the method of claim 1").
+ANTECEDENT_EXEMPT: FrozenSet[str] = frozenset(
+    {"same", "claim", "claims", "invention", "art", "user", "time", "other", "first", "second", "use", "following"}
+)
+
+
+@dataclass
+class RuleContext:
+    """Per-run settings shared with every rule."""
+
+    analysis_type: str = "full"
+    confidence_threshold: float = 0.0
+    token: Optional[CancellationToken] = None
+
+    def checkpoint(self) -> None:
+        """Stop the rule if the run was cancelled, superseded or ran out of time."""
+
+        if self.token is not None:
+            self.token.raise_if_cancelled()
+
+
+class AnalysisRule:
+    """Base class: subclasses set ``finding_type``, ``name`` and ``scope``.
+
+    Document-scoped rules implement :meth:`check_document`. Split rules
+    implement :meth:`units` and :meth:`check_unit`, and :meth:`combine` when
+    unit results are not simply lists of findings.
+    """
+
+    finding_type: FindingType
+    name: str = ""
+    scope: str = DOCUMENT_SCOPE
+    analysis_types: FrozenSet[str] = frozenset({"full"})
+    confidence: float = 0.8
+
+    def check(self, doc: ParsedDocument, context: RuleContext) -> List[Finding]:
+        return self.evaluate(doc, context)[0]
+
+    def evaluate(
+        self, doc: ParsedDocument, context: RuleContext, previous: Optional[ScopeMemo] = None
+    ) -> Tuple[List[Finding], ScopeMemo, int]:
+        """Findings, the memo for the next run, and how many units were reused from ``previous``."""
+
+        units = self.units(doc, context)
+        if units is None:
+            return self.check_document(doc, context), {}, 0
+        previous = previous or {}
+        memo: ScopeMemo = {}
+        parts = []
+        reused = 0
+        for key, unit in units:
+            context.checkpoint()
+            cached = previous.get(key)
+            if cached is not None:
+                part = self.relocate(cached[1], cached[0], unit)
+                reused += 1
+            else:
+                part = self.check_unit(doc, unit, context)
+            memo[key] = (unit, part)
+            parts.append((unit, part))
+        return self.combine(doc, parts, context), memo, reused
+
+    def units(self, doc: ParsedDocument, context: RuleContext) -> Optional[Iterable[Tuple[Hashable, Unit]]]:
+        """``(key, unit)`` pairs, or ``None`` if the rule is not split."""
+
+        return None
+
+    def check_unit(self, doc: ParsedDocument, unit: Unit, context: RuleContext) -> Any:
+        raise NotImplementedError
+
+    def combine(self, doc: ParsedDocument, parts: List[Tuple[Unit, Any]], context: RuleContext) -> List[Finding]:
+        return [finding for _, findings in parts for finding in findings]
+
+    def relocate(self, part: Any, old: Unit, new: Unit) -> Any:
+        """A unit result computed at paragraphs ``old``, moved to ``new``."""
+
+        if old == new:
+            return part
+        moved = dict(zip(old, new))
+        return [
+            replace(finding, anchor=replace(finding.anchor, paragraph_index=moved[finding.anchor.paragraph_index]))
+            if finding.anchor is not None and finding.anchor.paragraph_index in moved
+            else finding
+            for finding in part
+        ]
+
+    def check_document(self, doc: ParsedDocument, context: RuleContext) -> List[Finding]:
+        raise NotImplementedError
+
+    def finding(
+        self,
+        doc: ParsedDocument,
+        severity: Severity,
+        title: str,
+        description: str,
+        paragraph: Optional[int] = None,
+        start: int = 0,
+        end: int = 0,
+        key: str = "",
+        suggestion: Optional[str] = None,
+        confidence: Optional[float] = None,
+        metadata: Optional[Dict] = None,
+    ) -> Finding:
+        """Build a finding anchored at ``paragraph[start:end]`` (``None`` for document-level findings)."""
+
+        anchor = None
+        context = ""
+        if paragraph is not None:
+            text = doc.paragraphs[paragraph]
+            anchor = TextAnchor(
+                paragraph_index=paragraph,
+                start_offset=start,
+                end_offset=end,
+                text=text[start:end],
+                context_hash=hashlib.sha1(text.encode("utf-8")).hexdigest()[:12],
+            )
+            context = text[max(0, start - CONTEXT_CHARS):end + CONTEXT_CHARS].strip()
+        # Not the paragraph index: ids must not change when the paragraph moves.
+        identity = f"{self.name}|{anchor.context_hash if anchor else ''}|{start}|{end}|{key}"
+        return Finding(
+            id=hashlib.sha1(identity.encode("utf-8")).hexdigest()[:16],
+            type=self.finding_type,
+            severity=severity,
+            title=title,
+            description=description,
+            suggestion=suggestion,
+            context=context,
+            anchor=anchor,
+            metadata={"rule": self.name, **(metadata or {})},
+            confidence=self.confidence if confidence is None else confidence,
+        )
+
+
+class RuleRegistry:
+    """Rules keyed by the :class:`FindingType` they report."""
+
+    def __init__(self) -> None:
+        self._rules: Dict[FindingType, List[AnalysisRule]] = defaultdict(list)
+
+    def register(self, rule: AnalysisRule) -> AnalysisRule:
+        if not rule.name:
+            raise ValueError(f"{type(rule).__name__} has no name")
+        if any(existing.name == rule.name for existing in self):
+            raise ValueError(f"Rule {rule.name!r} is already registered")
+        self._rules[rule.finding_type].append(rule)
+        return rule
+
+    def rules_for(self, finding_type: FindingType) -> List[AnalysisRule]:
+        return list(self._rules.get(finding_type, ()))
+
+    def select(self, enabled: Sequence[str] = (), analysis_type: str = "full") -> List[AnalysisRule]:
+        """Rules for ``analysis_type`` whose type value or name is in ``enabled`` (empty: all)."""
+
+        wanted = set(enabled)
+        return [
+            rule
+            for rule in self
+            if analysis_type in rule.analysis_types
+            and (not wanted or rule.name in wanted or rule.finding_type.value in wanted)
+        ]
+
+    def __iter__(self) -> Iterator[AnalysisRule]:
+        for finding_type in FindingType:
+            yield from self._rules.get(finding_type, ())
+
+    def __len__(self) -> int:
+        return sum(len(rules) for rules in self._rules.values())
+
+
+DEFAULT_REGISTRY = RuleRegistry()
+
+
+def register_rule(cls: Type[AnalysisRule]) -> Type[AnalysisRule]:
+    """Class decorator adding an instance of ``cls`` to :data:`DEFAULT_REGISTRY`."""
+
+    DEFAULT_REGISTRY.register(cls())
+    return cls
+
+
+def _normalize(word: str) -> str:
+    word = word.lower().strip("'")
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def _phrase_after(tokens: List[re.Match], start: int, limit: int = 4) -> List[re.Match]:
+    phrase = []
+    for token in tokens[start:start + limit]:
+        if token.group().lower() in STOPWORDS:
+            break
+        phrase.append(token)
+    return phrase
+
+
+def _ancestor_texts(doc: ParsedDocument, claim: ParsedClaim) -> Tuple[Tuple[int, Optional[str]], ...]:
+    """Number and text of every claim ``claim`` depends on, directly or not (``None`` if missing)."""
+
+    seen: Dict[int, Optional[str]] = {}
+    pending = list(claim.dependencies)
+    while pending:
+        number = pending.pop()
+        if number in seen or number == claim.number:
+            continue
+        parent = doc.claim(number)
+        seen[number] = parent.text if parent else None
+        if parent is not None:
+            pending.extend(parent.dependencies)
+    return tuple(sorted(seen.items()))
+
+
+def _category_of(doc: ParsedDocument, number: int) -> Optional[str]:
+    claim = doc.claim(number)
+    return claim.category if claim else None
+
+
+def _claim_anchor(doc: ParsedDocument, claim: ParsedClaim) -> Tuple[int, int, int]:
+    """Paragraph and span of the claim number, e.g. ``"3."``."""
+
+    paragraph = claim.paragraphs[0]
+    match = re.match(r"\s*\d+\s*[.)]", doc.paragraphs[paragraph])
+    return paragraph, 0, match.end() if match else 0
+
+
+@register_rule
+class AntecedentBasisRule(AnalysisRule):
+    """"the X" / "said X" needs an earlier "a X" in the claim or a claim it depends on."""
+
+    finding_type = FindingType.ANTECEDENT_BASIS
+    name = "antecedent_basis"
+    scope = CLAIM_SCOPE
+    analysis_types = frozenset({"claims", "full"})
+    confidence = 0.85
+
+    def units(self, doc: ParsedDocument, context: RuleContext) -> Iterable[Tuple[Hashable, Unit]]:
+        for claim in doc.claims:
+            if any(doc.claim(number) is None for number in claim.dependencies):
+                continue  # Without the parent every inherited term would be reported.
+            # The result depends on the claim and on every claim it inherits terms from.
+            yield (claim.text, _ancestor_texts(doc, claim)), claim.paragraphs
+
+    def check_unit(self, doc: ParsedDocument, unit: Unit, context: RuleContext) -> List[Finding]:
+        claim = doc.claim_at(unit[0])
+        known = self._inherited(doc, claim, {}, set())
+        return self._scan(doc, claim, known)
+
+    def _inherited(
+        self,
+        doc: ParsedDocument,
+        claim: ParsedClaim,
+        introduced: Dict[int, FrozenSet[Tuple[str, ...]]],
+        visiting: Set[int],
+    ) -> Set[Tuple[str, ...]]:
+        known: Set[Tuple[str, ...]] = set()
+        visiting.add(claim.number)
+        for number in claim.dependencies:
+            parent = doc.claim(number)
+            if parent is None or number in visiting:
+                continue  # Missing parents and cycles are the dependency rule's findings.
+            if number not in introduced:
+                phrases = self._inherited(doc, parent, introduced, visiting)
+                for paragraph in parent.paragraphs:
+                    tokens = list(_WORD.finditer(doc.paragraphs[paragraph]))
+                    for index, token in enumerate(tokens):
+                        if self._introduces(tokens, index):
+                            self._add(phrases, _phrase_after(tokens, index + 1))
+                introduced[number] = frozenset(phrases)
+            known |= introduced[number]
+        return known
+
+    @staticmethod
+    def _introduces(tokens: List[re.Match], index: int) -> bool:
+        word = tokens[index].group().lower()
+        previous = tokens[index - 1].group().lower() if index else ""
+        # "a", "an", "another", "plurality of", "one or more", "at least one",
+        # and a bare noun after a transition ("having blades").
+        return (
+            word in ("a", "an", "another")
+            or (word == "of" and previous == "plurality")
+            or (word == "more" and previous == "or")
+            or (word == "one" and previous == "least")
+            or (
+                word in INTRODUCING_VERBS
+                and index + 1 < len(tokens)
+                and tokens[index + 1].group().lower() not in STOPWORDS
+            )
+        )
+
+    @staticmethod
+    def _add(known: Set[Tuple[str, ...]], phrase: List[re.Match]) -> None:
+        words = tuple(_normalize(token.group()) for token in phrase)
+        # "a rotary shaft" also introduces "shaft" and "rotary".
+        for i in range(len(words)):
+            known.add(words[i:])
+            known.add(words[:i + 1])
+
+    def _scan(self, doc: ParsedDocument, claim: ParsedClaim, known: Set[Tuple[str, ...]]) -> List[Finding]:
+        findings = []
+        reported: Set[Tuple[str, ...]] = set()
+        for paragraph in claim.paragraphs:
+            tokens = list(_WORD.finditer(doc.paragraphs[paragraph]))
+            for index, token in enumerate(tokens):
+                if self._introduces(tokens, index):
+                    self._add(known, _phrase_after(tokens, index + 1))
+                    continue
+                if token.group().lower() not in ("the", "said"):
+                    continue
+                phrase = _phrase_after(tokens, index + 1)
+                if not phrase or phrase[0].group().lower() in ANTECEDENT_EXEMPT:
+                    continue
+                words = tuple(_normalize(t.group()) for t in phrase)
+                # The phrase may run on into a verb ("the shaft rotates"); any leading part will do.
+                if any(words[:k] in known for k in range(len(words), 0, -1)) or words in reported:
+                    continue
+                reported.add(words)
+                term = " ".join(t.group() for t in phrase)
+                findings.append(
+                    self.finding(
+                        doc,
+                        Severity.HIGH,
+                        f"No antecedent basis for '{term}'",
+                        f"'{token.group()} {term}' in claim {claim.number} is not introduced earlier "
+                        "in this claim or in a claim it depends on.",
+                        paragraph,
+                        token.start(),
+                        phrase[-1].end(),
+                        key=" ".join(words),
+                        suggestion=f"Introduce the element first (e.g. 'a {term}') or refer to an element already introduced.",
+                        metadata={"claim_number": claim.number, "term": term},
+                    )
+                )
+        return findings
+
+
+@register_rule
+class ClaimDependencyRule(AnalysisRule):
+    """Dependent claims must cite an earlier, existing claim of a compatible category."""
+
+    finding_type = FindingType.CLAIM_DEPENDENCY
+    name = "claim_dependency"
+    scope = CLAIM_SCOPE
+    analysis_types = frozenset({"claims", "full"})
+    confidence = 0.95
+
+    def units(self, doc: ParsedDocument, context: RuleContext) -> Iterable[Tuple[Hashable, Unit]]:
+        for claim in doc.claims:
+            parents = tuple((number, _category_of(doc, number)) for number in claim.dependencies)
+            yield (claim.text, parents), claim.paragraphs
+
+    def check_unit(self, doc: ParsedDocument, unit: Unit, context: RuleContext) -> List[Finding]:
+        findings = []
+        claim = doc.claim_at(unit[0])
+        paragraph, start, end = _claim_anchor(doc, claim)
+        meta = {"claim_number": claim.number, "dependencies": list(claim.dependencies)}
+        for number in claim.dependencies:
+            parent = doc.claim(number)
+            if parent is None:
+                findings.append(
+                    self.finding(
+                        doc, Severity.HIGH, f"Claim {claim.number} depends on missing claim {number}",
+                        f"Claim {claim.number} refers to claim {number}, which does not exist.",
+                        paragraph, start, end, key=f"missing-{number}",
+                        suggestion="Correct the claim reference or renumber the claims.", metadata=meta,
+                    )
+                )
+            elif number >= claim.number:
+                findings.append(
+                    self.finding(
+                        doc, Severity.HIGH, f"Claim {claim.number} depends on claim {number}",
+                        f"A dependent claim must refer to a preceding claim; claim {claim.number} "
+                        f"refers to {'itself' if number == claim.number else 'a later claim'}.",
+                        paragraph, start, end, key=f"forward-{number}",
+                        suggestion="Refer to a preceding claim.", metadata=meta,
+                    )
+                )
+            elif parent.category != claim.category:
+                findings.append(
+                    self.finding(
+                        doc, Severity.MEDIUM, f"Claim {claim.number} changes category",
+                        f"Claim {claim.number} reads as a {claim.category} claim but depends on "
+                        f"{parent.category} claim {number}.",
+                        paragraph, start, end, key=f"category-{number}", confidence=0.6,
+                        suggestion="Make the dependent claim the same statutory category as its parent, "
+                        "or write it as an independent claim.", metadata=meta,
+                    )
+                )
+        if len(claim.dependencies) > 1:
+            findings.append(
+                self.finding(
+                    doc, Severity.LOW, f"Claim {claim.number} is multiple dependent",
+                    f"Claim {claim.number} depends on claims "
+                    f"{', '.join(str(n) for n in claim.dependencies)}; multiple dependent claims incur "
+                    "extra fees and may not serve as a basis for other multiple dependent claims.",
+                    paragraph, start, end, key="multiple", metadata=meta,
+                )
+            )
+        return findings
+
+
+@register_rule
+class ClaimFormattingRule(AnalysisRule):
+    """Claims are numbered consecutively from 1 and each is a single sentence ending in a period."""
+
+    finding_type = FindingType.FORMATTING_ERROR
+    name = "claim_formatting"
+    analysis_types = frozenset({"claims", "full"})
+    confidence = 0.95
+
+    _ABBREVIATIONS = re.compile(r"\b(?:FIGS?|Fig|No|e\.g|i\.e|etc|approx|vs|wt|Nos)\.|\d\.\d", re.IGNORECASE)
+    _SENTENCE_END = re.compile(r"\.(?=\s)")
+
+    def check_document(self, doc: ParsedDocument, context: RuleContext) -> List[Finding]:
+        findings = []
+        seen: Set[int] = set()
+        expected = 1
+        for claim in doc.claims:
+            context.checkpoint()
+            paragraph, start, end = _claim_anchor(doc, claim)
+            if claim.number in seen:
+                findings.append(
+                    self.finding(
+                        doc, Severity.HIGH, f"Duplicate claim number {claim.number}",
+                        f"Claim number {claim.number} is used more than once.",
+                        paragraph, start, end, key="duplicate",
+                        suggestion="Renumber the claims consecutively.",
+                    )
+                )
+            elif claim.number != expected:
+                findings.append(
+                    self.finding(
+                        doc, Severity.MEDIUM, f"Claim {claim.number} is out of sequence",
+                        f"Expected claim {expected} but found claim {claim.number}; claims must be numbered "
+                        "consecutively starting at 1.",
+                        paragraph, start, end, key=f"sequence-{expected}",
+                        suggestion="Renumber the claims consecutively.",
+                    )
+                )
+            seen.add(claim.number)
+            expected = max(expected, claim.number + 1)
+
+            last = claim.paragraphs[-1]
+            last_text = doc.paragraphs[last].rstrip()
+            if not last_text.endswith("."):
+                findings.append(
+                    self.finding(
+                        doc, Severity.MEDIUM, f"Claim {claim.number} does not end with a period",
+                        "Each claim must end with a single period.",
+                        last, max(0, len(last_text) - 1), len(last_text), key="period",
+                        suggestion="End the claim with a period.",
+                    )
+                )
+            body = self._ABBREVIATIONS.sub(lambda m: "_" * len(m.group()), claim.text)
+            # Skip the leading "1." and the final period.
+            inner = self._SENTENCE_END.search(body, end, len(body.rstrip()) - 1)
+            if inner is not None:
+                findings.append(
+                    self.finding(
+                        doc, Severity.LOW, f"Claim {claim.number} contains more than one sentence",
+                        "A claim should be a single sentence; a period appears before its end.",
+                        paragraph, start, end, key="sentences", confidence=0.6,
+                        suggestion="Replace internal periods with semicolons or commas.",
+                    )
+                )
+        return findings
+
+
+@register_rule
+class AbstractLengthRule(AnalysisRule):
+    """The abstract should not exceed 150 words."""
+
+    finding_type = FindingType.FORMATTING_ERROR
+    name = "abstract_length"
+    analysis_types = frozenset({"full"})
+    confidence = 0.95
+    max_words = 150
+
+    def check_document(self, doc: ParsedDocument, context: RuleContext) -> List[Finding]:
+        paragraphs = doc.section_paragraphs("abstract")
+        words = sum(len(doc.paragraphs[i].split()) for i in paragraphs)
+        if words <= self.max_words:
+            return []
+        first = paragraphs[0]
+        return [
+            self.finding(
+                doc, Severity.MEDIUM, f"Abstract is {words} words long",
+                f"The abstract should be no longer than {self.max_words} words.",
+                first, 0, len(doc.paragraphs[first]), key="length",
+                suggestion="Shorten the abstract.", metadata={"word_count": words},
+            )
+        ]
+
+
+@register_rule
+class MissingElementRule(AnalysisRule):
+    """Required sections, an independent claim, and a description for every referenced figure."""
+
+    finding_type = FindingType.MISSING_ELEMENT
+    name = "missing_element"
+    analysis_types = frozenset({"full"})
+    confidence = 0.9
+
+    REQUIRED_SECTIONS = (
+        ("claims", "claims", Severity.HIGH),
+        ("abstract", "abstract", Severity.MEDIUM),
+        ("detailed_description", "detailed description", Severity.MEDIUM),
+    )
+    _FIGURE = re.compile(r"\bFIG(?:URE)?S?\.?\s*(\d+[A-Z]?)", re.IGNORECASE)
+
+    def check_document(self, doc: ParsedDocument, context: RuleContext) -> List[Finding]:
+        findings = []
+        for section, label, severity in self.REQUIRED_SECTIONS:
+            if not doc.has_section(section):
+                findings.append(
+                    self.finding(
+                        doc, severity, f"No {label} section",
+                        f"The document has no {label} section heading.", key=f"section-{section}",
+                        suggestion=f"Add a {label} section with its standard heading.",
+                    )
+                )
+        if doc.claims and not any(claim.is_independent for claim in doc.claims):
+            findings.append(
+                self.finding(
+                    doc, Severity.HIGH, "No independent claim",
+                    "Every claim depends on another claim.", *_claim_anchor(doc, doc.claims[0]),
+                    key="independent", suggestion="Claim 1 should be an independent claim.",
+                )
+            )
+        if doc.has_section("drawings"):
+            findings.extend(self._undescribed_figures(doc, context))
+        return findings
+
+    def _undescribed_figures(self, doc: ParsedDocument, context: RuleContext) -> List[Finding]:
+        described = {
+            match.group(1).upper()
+            for i in doc.section_paragraphs("drawings")
+            for match in self._FIGURE.finditer(doc.paragraphs[i])
+        }
+        findings = []
+        reported: Set[str] = set()
+        for section in ("summary", "detailed_description"):
+            for i in doc.section_paragraphs(section):
+                context.checkpoint()
+                for match in self._FIGURE.finditer(doc.paragraphs[i]):
+                    figure = match.group(1).upper()
+                    # "FIG. 2A" is covered by a description of "FIG. 2".
+                    if figure in described or figure.rstrip("ABCDEFGH") in described or figure in reported:
+                        continue
+                    reported.add(figure)
+                    findings.append(
+                        self.finding(
+                            doc, Severity.MEDIUM, f"FIG. {figure} is not described",
+                            f"FIG. {figure} is referenced but has no entry in the brief description of the drawings.",
+                            i, match.start(), match.end(), key=f"figure-{figure}",
+                            suggestion=f"Add FIG. {figure} to the brief description of the drawings.",
+                        )
+                    )
+        return findings
+
+
+@register_rule
+class TerminologyConsistencyRule(AnalysisRule):
+    """The same term written with different hyphenation or capitalization."""
+
+    finding_type = FindingType.TERMINOLOGY_INCONSISTENCY
+    name = "terminology_consistency"
+    analysis_types = frozenset({"terminology", "full"})
+    confidence = 0.8
+
+    def units(self, doc: ParsedDocument, context: RuleContext) -> Iterable[Tuple[Hashable, Unit]]:
+        return (((text,), (index,)) for index, text in enumerate(doc.paragraphs))
+
+    def check_unit(self, doc: ParsedDocument, unit: Unit, context: RuleContext) -> List[Tuple[str, str, int, int]]:
+        """``(term key, spelling, start, end)`` for each term occurrence in the paragraph."""
+
+        text = doc.paragraphs[unit[0]]
+        occurrences = []
+        tokens = list(_WORD.finditer(text))
+        for position, token in enumerate(tokens):
+            word = token.group()
+            lower = word.lower()
+            if "-" in word.strip("-"):
+                parts = [part for part in lower.split("-") if part]
+                if len(parts) == 2:
+                    occurrences.append(("".join(parts), lower, token.start(), token.end()))
+                continue
+            if lower in STOPWORDS or position + 1 >= len(tokens):
+                if len(lower) > 5:
+                    occurrences.append((lower, lower, token.start(), token.end()))
+                continue
+            following = tokens[position + 1]
+            gap = text[token.end():following.start()]
+            second = following.group()
+            if gap != " " or second.lower() in STOPWORDS or "-" in second:
+                if len(lower) > 5:
+                    occurrences.append((lower, lower, token.start(), token.end()))
+                continue
+            # Two-word term: record it spaced, and capitalized when it is mid-sentence.
+            key = lower + second.lower()
+            spaced = f"{lower} {second.lower()}"
+            mid_sentence = position > 0 and not re.search(r"[.:;]\s*$", text[:token.start()])
+            if mid_sentence and word[0].isupper() and second[0].isupper() and not (word.isupper() or second.isupper()):
+                occurrences.append((key, f"{word} {second}", token.start(), following.end()))
+            elif word.islower() and second.islower():
+                occurrences.append((key, spaced, token.start(), following.end()))
+            if len(lower) > 5:
+                occurrences.append((lower, lower, token.start(), token.end()))
+        return occurrences
+
+    def relocate(self, part: Any, old: Unit, new: Unit) -> Any:
+        return part  # Offsets are paragraph-relative.
+
+    def combine(self, doc: ParsedDocument, parts: List[Tuple[Unit, Any]], context: RuleContext) -> List[Finding]:
+        # form -> [count, first paragraph, start, end]; forms are the exact spellings seen.
+        forms: Dict[str, List] = {}
+        variants: Dict[str, Set[str]] = defaultdict(set)
+        for (index,), occurrences in parts:
+            for key, form, start, end in occurrences:
+                entry = forms.get(form)
+                if entry is None:
+                    forms[form] = [1, index, start, end]
+                else:
+                    entry[0] += 1
+                variants[key].add(form)
+
+        findings = []
+        for key, spellings in variants.items():
+            if len(spellings) < 2:
+                continue
+            # Only hyphen/space/closed or capitalization variants of the same term.
+            if not any("-" in s or " " in s for s in spellings):
+                continue
+            ranked = sorted(spellings, key=lambda s: (-forms[s][0], forms[s][1], s))
+            preferred = ranked[0]
+            for variant in ranked[1:]:
+                count, paragraph, start, end = forms[variant]
+                findings.append(
+                    self.finding(
+                        doc, Severity.MEDIUM, f"Inconsistent term '{variant}'",
+                        f"'{variant}' ({count}x) and '{preferred}' ({forms[preferred][0]}x) appear to name the "
+                        "same thing.",
+                        paragraph, start, end, key=variant,
+                        suggestion=f"Use '{preferred}' throughout.",
+                        metadata={"preferred": preferred, "variants": {s: forms[s][0] for s in ranked}},
+                    )
+                )
+        return findings
+
+
+@register_rule
+class ReferenceNumeralRule(AnalysisRule):
+    """Each reference numeral names one element, and each element keeps one numeral."""
+
+    finding_type = FindingType.REFERENCE_NUMERAL
+    name = "reference_numeral"
+    analysis_types = frozenset({"full"})
+    confidence = 0.85
+
+    SECTIONS = ("summary", "drawings", "detailed_description")
+    _NUMERAL = re.compile(r"\b([A-Za-z][a-z]+)(?:\s+([a-z]+))?\s+(\d{1,4}[a-z]?'*)(?![\w.,]\d)")
+    NOT_ELEMENTS: FrozenSet[str] = frozenset(
+        """
+        fig figs figure figures claim claims step steps paragraph paragraphs section sections table
+        tables example examples embodiment embodiments page pages column col line lines no number
+        equation formula version year years about approximately than to and or of from between at in
+        by for with over under up within only least most ratio time times temperature pressure
+        """.split()
+    )
+    _UNIT = re.compile(
+        r"\s*(?:%|°|mm|cm|nm|um|µm|m|km|mg|kg|g|ml|l|s|ms|min|h|hz|khz|mhz|ghz|v|mv|kv|a|ma|w|kw|"
+        r"psi|pa|kpa|mpa|k|c|f|percent|degrees?|seconds?|minutes?|hours?|days?|weeks?|months?|"
+        r"bits?|bytes?)\b",
+        re.IGNORECASE,
+    )
+
+    def units(self, doc: ParsedDocument, context: RuleContext) -> Iterable[Tuple[Hashable, Unit]]:
+        for section in self.SECTIONS:
+            for index in doc.section_paragraphs(section):
+                yield (doc.paragraphs[index],), (index,)
+
+    def check_unit(self, doc: ParsedDocument, unit: Unit, context: RuleContext) -> List[Tuple[str, str, str, int, int]]:
+        """``(numeral, head noun, element name, start, end)`` for each labelled element in the paragraph."""
+
+        text = doc.paragraphs[unit[0]]
+        mentions = []
+        for match in self._NUMERAL.finditer(text):
+            modifier, head, numeral = match.group(1).lower(), match.group(2), match.group(3)
+            if head is None:
+                modifier, head = "", modifier
+            if head in self.NOT_ELEMENTS or modifier in ("fig", "figs", "claim", "claims"):
+                continue
+            if self._UNIT.match(text, match.end()):
+                continue
+            head = _normalize(head)
+            name = head if modifier in STOPWORDS or not modifier else f"{_normalize(modifier)} {head}"
+            mentions.append((numeral, head, name, match.start(), match.end()))
+        return mentions
+
+    def relocate(self, part: Any, old: Unit, new: Unit) -> Any:
+        return part  # Offsets are paragraph-relative.
+
+    def combine(self, doc: ParsedDocument, parts: List[Tuple[Unit, Any]], context: RuleContext) -> List[Finding]:
+        names: Dict[str, Counter] = defaultdict(Counter)  # numeral -> head noun counts
+        numerals: Dict[str, Counter] = defaultdict(Counter)  # full name -> numeral counts
+        first: Dict[Tuple[str, str], Tuple[int, int, int]] = {}
+        for (index,), mentions in parts:
+            for numeral, head, name, start, end in mentions:
+                names[numeral][head] += 1
+                numerals[name][numeral] += 1
+                first.setdefault((numeral, name), (index, start, end))
+                first.setdefault((numeral, head), (index, start, end))
+
+        findings = []
+        for numeral, heads in names.items():
+            if len(heads) < 2:
+                continue
+            (preferred, count), *others = heads.most_common()
+            for head, other_count in others:
+                paragraph, start, end = first[(numeral, head)]
+                findings.append(
+                    self.finding(
+                        doc, Severity.MEDIUM, f"Numeral {numeral} names different elements",
+                        f"Reference numeral {numeral} is used for '{preferred}' ({count}x) and '{head}' "
+                        f"({other_count}x).",
+                        paragraph, start, end, key=f"numeral-{numeral}-{head}",
+                        suggestion=f"Use a distinct numeral for '{head}', or call element {numeral} "
+                        f"'{preferred}' throughout.",
+                        metadata={"numeral": numeral, "names": dict(heads)},
+                    )
+                )
+        for name, counts in numerals.items():
+            if len(counts) < 2 or " " not in name and len(name) < 3:
+                continue
+            (preferred, count), *others = counts.most_common()
+            for numeral, other_count in others:
+                paragraph, start, end = first[(numeral, name)]
+                findings.append(
+                    self.finding(
+                        doc, Severity.LOW, f"'{name}' has several numerals",
+                        f"'{name}' is labelled {preferred} ({count}x) and {numeral} ({other_count}x).",
+                        paragraph, start, end, key=f"name-{name}-{numeral}", confidence=0.55,
+                        suggestion="Use one numeral per element, or distinguish the elements by name.",
+                        metadata={"name": name, "numerals": dict(counts)},
+                    )
+                )
+        return findings
+
+
+@register_rule
+class RedFlagTermRule(AnalysisRule):
+    """Absolute or limiting language, and indefinite terms in the claims."""
+
+    finding_type = FindingType.RED_FLAG_TERM
+    name = "red_flag_terms"
+    scope = PARAGRAPH_SCOPE
+    analysis_types = ALL_ANALYSIS_TYPES
+    confidence = 0.9
+
+    # Terms that can be read as limiting the invention wherever they appear.
+    LIMITING: Dict[str, str] = {
+        "must": "Implies the feature is required in every embodiment.",
+        "essential": "Suggests the feature is indispensable, which can narrow claim scope.",
+        "critical": "Suggests the feature is indispensable, which can narrow claim scope.",
+        "necessary": "Suggests the feature is indispensable, which can narrow claim scope.",
+        "required": "Implies the feature is required in every embodiment.",
+        "always": "Absolute language invites a narrow construction.",
+        "never": "Absolute language invites a narrow construction.",
+        "present invention": "Statements about 'the present invention' can be read as limiting all claims.",
+    }
+    # Terms that make a claim indefinite or optional.
+    INDEFINITE: Dict[str, str] = {
+        "preferably": "Optional language makes the claim scope unclear.",
+        "optionally": "Optional language makes the claim scope unclear.",
+        "such as": "Exemplary language makes the claim scope unclear.",
+        "for example": "Exemplary language makes the claim scope unclear.",
+        "e.g.": "Exemplary language makes the claim scope unclear.",
+        "etc.": "Open-ended lists are indefinite.",
+        "and/or": "Can be read as either alternative; consider 'at least one of'.",
+        "substantially": "Terms of degree need support in the specification.",
+        "approximately": "Terms of degree need support in the specification.",
+    }
+
+    def __init__(self) -> None:
+        self._spec_pattern = self._compile(self.LIMITING)
+        self._claim_pattern = self._compile({**self.LIMITING, **self.INDEFINITE})
+
+    @staticmethod
+    def _compile(terms: Dict[str, str]) -> re.Pattern:
+        alternatives = sorted((re.escape(term) for term in terms), key=len, reverse=True)
+        return re.compile(r"(?<![\w/])(?:" + "|".join(alternatives) + r")(?![\w/])", re.IGNORECASE)
+
+    def units(self, doc: ParsedDocument, context: RuleContext) -> Iterable[Tuple[Hashable, Unit]]:
+        skip = set(doc.headings)
+        for index, text in enumerate(doc.paragraphs):
+            if index in skip or not text:
+                continue
+            in_claims = index in doc.claim_paragraphs
+            if in_claims or context.analysis_type != "claims":
+                yield (text, in_claims), (index,)
+
+    def check_unit(self, doc: ParsedDocument, unit: Unit, context: RuleContext) -> List[Finding]:
+        index = unit[0]
+        text = doc.paragraphs[index]
+        in_claims = index in doc.claim_paragraphs
+        pattern = self._claim_pattern if in_claims else self._spec_pattern
+        findings = []
+        for match in pattern.finditer(text):
+            term = match.group().lower()
+            reason = self.LIMITING.get(term) or self.INDEFINITE.get(term, "")
+            findings.append(
+                self.finding(
+                    doc, Severity.MEDIUM if in_claims else Severity.LOW,
+                    f"Red flag term '{match.group()}'" + (" in claim" if in_claims else ""),
+                    reason, index, match.start(), match.end(), key=term,
+                    suggestion="Consider rewording or removing this term.",
+                    metadata={"term": term, "in_claims": in_claims},
+                )
+            )
+        return findings
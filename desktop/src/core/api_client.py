@@ -3,20 +3,35 @@
 Provides both synchronous and asynchronous helpers so the PyQt desktop
 application can talk to the platform's authentication, search, analysis,
 and annotation endpoints. The client intentionally keeps surface area
-small while handling session propagation and tracing metadata.
+small while handling session propagation and tracing metadata. Every
+attempt first takes a token from the shared :class:`RateLimiter`. When the
+backend is unreachable, or its search circuit is open, :meth:`ApiClient.search`
+and :meth:`ApiClient.search_pages` answer from the offline index of cached
+patents and drafts, if one is configured.
 """
 
 from __future__ import annotations
 
-import asyncio
 from dataclasses import dataclass
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 import aiohttp
 import requests
 from loguru import logger
 
+from src.utils.exceptions import CircuitOpenError
+
 from .config import ApiConfig
+from .connectivity import ReachabilityProber, is_connectivity_error
+from .idempotency import IDEMPOTENCY_HEADER
+from .offline_search import OfflineSearchHit, OfflineSearchIndex
+from .rate_limit import RateLimiter
+from .retry_policy import RetryPolicy
+from .search_pager import MAX_PAGE_SIZE, SearchPager
+from .single_flight import SingleFlight, request_key
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
+DEFAULT_RATE_LIMITER = RateLimiter()
 
 
 @dataclass
@@ -30,90 +45,215 @@ class AuthSession:
 class ApiClient:
     """Lightweight HTTP client for backend APIs."""
 
-    def __init__(self, api_config: ApiConfig, auth_session: Optional[AuthSession] = None):
+    def __init__(
+        self,
+        api_config: ApiConfig,
+        auth_session: Optional[AuthSession] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        offline_index: Optional[OfflineSearchIndex] = None,
+        prober: Optional[ReachabilityProber] = None,
+    ):
         self.api_config = api_config
         self.session = auth_session
+        self.retry_policy = retry_policy or DEFAULT_RETRY_POLICY
+        self.rate_limiter = rate_limiter or DEFAULT_RATE_LIMITER
+        self.offline_index = offline_index
+        self.prober = prober
+        self.single_flight = SingleFlight()
         self._aiohttp_session: Optional[aiohttp.ClientSession] = None
 
-    def _headers(self) -> Dict[str, str]:
+    def _headers(self, idempotency_key: Optional[str] = None) -> Dict[str, str]:
         headers = {"Content-Type": "application/json"}
         if self.session and self.session.access_token:
             headers["Authorization"] = f"Bearer {self.session.access_token}"
+        if idempotency_key:
+            headers[IDEMPOTENCY_HEADER] = idempotency_key
         return headers
 
     def _log_request(self, method: str, url: str) -> None:
         logger.debug(f"{method} {url} (desktop client)")
 
+    def _request(
+        self,
+        method: str,
+        url: str,
+        endpoint: str,
+        timeout: float,
+        payload: Optional[Dict[str, Any]] = None,
+        coalesce: bool = False,
+        idempotency_key: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Issue a blocking request under the retry policy and return the parsed body.
+
+        Reads (``GET`` or ``coalesce=True``) share one call with identical
+        concurrent requests; the returned dict must then be treated as read-only.
+        ``idempotency_key`` is sent unchanged on every retry.
+        """
+
+        headers = self._headers(idempotency_key)
+
+        def attempt() -> Dict[str, Any]:
+            self.rate_limiter.acquire_blocking(endpoint)
+            self._log_request(method, url)
+            response = requests.request(method, url, json=payload, timeout=timeout, headers=headers)
+            self.rate_limiter.observe(endpoint, response.status_code, response.headers)
+            response.raise_for_status()
+            return response.json()
+
+        def call() -> Dict[str, Any]:
+            return self.retry_policy.call(endpoint, attempt)
+
+        if coalesce or method == "GET":
+            return self.single_flight.do(request_key(method, url, payload), call)
+        return call()
+
     def search(self, query: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        """Call the platform search API synchronously."""
+        """Call the platform search API synchronously.
 
+        If the backend cannot be reached and an offline index is configured,
+        returns local matches instead, in the same shape plus ``"offline": True``.
+        """
+
+        if self._search_offline():
+            return self.offline_search(query, params)
         url = f"{self.api_config.search_base_url}"
         payload = {"query": query, **(params or {})}
-        self._log_request("POST", url)
-        response = requests.post(url, json=payload, timeout=30, headers=self._headers())
-        response.raise_for_status()
-        return response.json()
+        try:
+            return self._request("POST", url, "search", 30, payload, coalesce=True)
+        except Exception as exc:
+            if not self._search_offline(exc):
+                raise
+            logger.info(f"Search backend unavailable ({exc}); using offline index")
+            return self.offline_search(query, params)
+
+    def _search_offline(self, exc: Optional[BaseException] = None) -> bool:
+        """Whether to answer a search from the offline index.
+
+        Without ``exc``: the prober already knows the backend is unreachable.
+        With ``exc``: the search failed to connect or its circuit is open.
+        """
+
+        if self.offline_index is None:
+            return False
+        if exc is None:
+            return self.prober is not None and not self.prober.online
+        return isinstance(exc, CircuitOpenError) or is_connectivity_error(exc)
+
+    def offline_search(self, query: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Search cached patents and drafts; honours ``page`` and ``pageSize`` params.
+
+        Without an offline index this is an empty page in the same shape.
+        """
+
+        params = params or {}
+        page = max(1, int(params.get("page", 1)))
+        page_size = min(MAX_PAGE_SIZE, max(1, int(params.get("pageSize", 20))))
+        hits: List[OfflineSearchHit] = []
+        total = 0
+        if self.offline_index is not None:
+            hits = self.offline_index.search(query, limit=page_size, offset=(page - 1) * page_size)
+            total = self.offline_index.count_matches(query)
+        return {
+            "results": [hit.to_dict() for hit in hits],
+            "page": page,
+            "pageSize": page_size,
+            "total": total,
+            "offline": True,
+        }
+
+    def search_pages(
+        self,
+        query: str,
+        params: Optional[Dict[str, Any]] = None,
+        page_size: int = MAX_PAGE_SIZE,
+        max_pages: Optional[int] = None,
+    ) -> SearchPager:
+        """Iterate search results page by page (``async for page in ...``).
+
+        The next page is prefetched while the caller consumes the current one.
+        Pages fall back to the offline index like :meth:`search`.
+        """
+
+        return SearchPager(self, query, params, page_size=page_size, max_pages=max_pages)
 
     def submit_analysis(self, document: Dict[str, Any]) -> Dict[str, Any]:
         """Submit document for analysis and receive a job identifier."""
 
         url = f"{self.api_config.analysis_base_url}"
-        self._log_request("POST", url)
-        response = requests.post(url, json=document, timeout=60, headers=self._headers())
-        response.raise_for_status()
-        return response.json()
+        return self._request("POST", url, "analysis", 60, document)
 
     def create_annotation(self, annotation: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new annotation."""
 
         url = f"{self.api_config.annotation_base_url}"
-        self._log_request("POST", url)
-        response = requests.post(url, json=annotation, timeout=20, headers=self._headers())
-        response.raise_for_status()
-        return response.json()
+        return self._request("POST", url, "annotations", 20, annotation)
 
     def update_annotation(self, annotation_id: str, annotation: Dict[str, Any]) -> Dict[str, Any]:
         """Update an existing annotation."""
 
         url = f"{self.api_config.annotation_base_url}/{annotation_id}"
-        self._log_request("PATCH", url)
-        response = requests.patch(url, json=annotation, timeout=20, headers=self._headers())
-        response.raise_for_status()
-        return response.json()
+        return self._request("PATCH", url, "annotations", 20, annotation)
 
     def get_report(self, report_id: str) -> Dict[str, Any]:
         """Fetch analysis report metadata and content."""
 
         url = f"{self.api_config.report_base_url}/{report_id}"
-        self._log_request("GET", url)
-        response = requests.get(url, timeout=30, headers=self._headers())
-        response.raise_for_status()
-        return response.json()
+        return self._request("GET", url, "reports", 30)
 
     async def _get_aiohttp_session(self) -> aiohttp.ClientSession:
         if self._aiohttp_session is None:
             self._aiohttp_session = aiohttp.ClientSession(headers=self._headers())
         return self._aiohttp_session
 
-    async def async_annotation_sync(self, payload: Dict[str, Any]) -> Dict[str, Any]:
-        """Async helper for annotation pushes from background worker."""
+    async def _async_request(
+        self,
+        method: str,
+        url: str,
+        endpoint: str,
+        timeout: float,
+        payload: Optional[Dict[str, Any]] = None,
+        coalesce: bool = False,
+        idempotency_key: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Issue an async request under the retry policy and return the parsed body.
+
+        Coalesces identical concurrent reads like :meth:`_request`.
+        """
 
         session = await self._get_aiohttp_session()
+        headers = {IDEMPOTENCY_HEADER: idempotency_key} if idempotency_key else None
+
+        async def attempt() -> Dict[str, Any]:
+            await self.rate_limiter.acquire(endpoint)
+            self._log_request(method, url)
+            async with session.request(method, url, json=payload, timeout=timeout, headers=headers) as resp:
+                self.rate_limiter.observe(endpoint, resp.status, resp.headers)
+                resp.raise_for_status()
+                return await resp.json()
+
+        async def call() -> Dict[str, Any]:
+            return await self.retry_policy.run(endpoint, attempt)
+
+        if coalesce or method == "GET":
+            return await self.single_flight.do_async(request_key(method, url, payload), call)
+        return await call()
+
+    async def async_annotation_sync(
+        self, payload: Dict[str, Any], idempotency_key: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Async helper for annotation pushes from background worker."""
+
         url = f"{self.api_config.annotation_base_url}"
-        self._log_request("POST", url)
-        async with session.post(url, json=payload, timeout=20) as resp:
-            resp.raise_for_status()
-            return await resp.json()
+        return await self._async_request("POST", url, "annotations", 20, payload, idempotency_key=idempotency_key)
 
-    async def async_upload(self, file_payload: Dict[str, Any]) -> Dict[str, Any]:
+    async def async_upload(
+        self, file_payload: Dict[str, Any], idempotency_key: Optional[str] = None
+    ) -> Dict[str, Any]:
         """Async helper for document uploads/analysis triggers."""
 
-        session = await self._get_aiohttp_session()
         url = f"{self.api_config.analysis_base_url}/upload"
-        self._log_request("POST", url)
-        async with session.post(url, json=file_payload, timeout=60) as resp:
-            resp.raise_for_status()
-            return await resp.json()
+        return await self._async_request("POST", url, "upload", 60, file_payload, idempotency_key=idempotency_key)
 
     async def close(self) -> None:
         if self._aiohttp_session:
@@ -121,15 +261,7 @@ class ApiClient:
             self._aiohttp_session = None
 
 
-async def resilient_async(fn, retries: int = 3, delay: float = 2.0):
-    """Retry helper for async API calls."""
+async def resilient_async(fn, endpoint: str = "default", policy: Optional[RetryPolicy] = None):
+    """Retry helper for async API calls (see :class:`RetryPolicy`)."""
 
-    last_exc: Optional[BaseException] = None
-    for attempt in range(1, retries + 1):
-        try:
-            return await fn()
-        except Exception as exc:  # pragma: no cover - defensive
-            last_exc = exc
-            logger.warning(f"Async API attempt {attempt} failed: {exc}")
-            await asyncio.sleep(delay)
-    raise last_exc or RuntimeError("Async API call failed")
+    return await (policy or DEFAULT_RETRY_POLICY).run(endpoint, fn)
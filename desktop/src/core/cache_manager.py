@@ -0,0 +1,160 @@
+"""Size-budgeted LRU eviction across local caches.
+
+Caches register with one :class:`CacheManager`, which holds them to a
+shared byte budget (``AnalysisConfig.cache_size_mb``). Each cache reports
+the size and last access time of its entries; after a write pushes the
+total over budget, the least recently used entries across all caches are
+evicted until it fits again. Hit, miss and eviction counters are kept
+per cache.
+"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Protocol, Tuple
+
+from loguru import logger
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from .config import AnalysisConfig
+
+
+class ManagedCache(Protocol):
+    """What a cache must provide to be budgeted by :class:`CacheManager`."""
+
+    cache_name: str
+    cache_manager: Optional["CacheManager"]
+
+    def total_bytes(self) -> int: ...
+
+    def cache_entries(self) -> Iterable[Tuple[str, int, float]]:
+        """``(key, stored_bytes, last_access_epoch)`` for every entry."""
+        ...
+
+    def evict(self, keys: List[str]) -> int:
+        """Drop ``keys``; return the number of bytes freed."""
+        ...
+
+
+@dataclass
+class CacheStats:
+    """Counters for one managed cache."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    evicted_bytes: int = 0
+
+    @property
+    def hit_ratio(self) -> Optional[float]:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else None
+
+    def to_dict(self) -> Dict[str, object]:
+        data = asdict(self)
+        data["hit_ratio"] = self.hit_ratio
+        return data
+
+
+class CacheManager:
+    """Keeps registered caches within one byte budget using global LRU order."""
+
+    def __init__(self, budget_bytes: int, enabled: bool = True):
+        self.budget_bytes = budget_bytes
+        self.enabled = enabled
+        self._caches: Dict[str, ManagedCache] = {}
+        self._optional: Dict[str, bool] = {}
+        self._stats: Dict[str, CacheStats] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: "AnalysisConfig") -> "CacheManager":
+        return cls(budget_bytes=config.cache_size_mb * 1024 * 1024, enabled=config.cache_enabled)
+
+    def configure(self, config: "AnalysisConfig") -> None:
+        """Apply changed cache settings; shrinking the budget evicts at once."""
+
+        self.budget_bytes = config.cache_size_mb * 1024 * 1024
+        self.enabled = config.cache_enabled
+        self.enforce()
+
+    def register(self, cache: ManagedCache, optional: bool = False) -> None:
+        """Budget ``cache``; optional caches store nothing while caching is disabled."""
+
+        self._caches[cache.cache_name] = cache
+        cache.cache_manager = self
+        self._optional[cache.cache_name] = optional
+        self._stats.setdefault(cache.cache_name, CacheStats())
+        self.enforce()
+
+    def admits(self, cache_name: str) -> bool:
+        return self.enabled or not self._optional.get(cache_name, False)
+
+    def record_hit(self, cache_name: str) -> None:
+        self._stats.setdefault(cache_name, CacheStats()).hits += 1
+
+    def record_miss(self, cache_name: str) -> None:
+        self._stats.setdefault(cache_name, CacheStats()).misses += 1
+
+    def total_bytes(self) -> int:
+        return sum(cache.total_bytes() for cache in self._caches.values())
+
+    def stats(self) -> Dict[str, CacheStats]:
+        return dict(self._stats)
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "enabled": self.enabled,
+            "budget_bytes": self.budget_bytes,
+            "total_bytes": self.total_bytes(),
+            "caches": {
+                name: {"bytes": cache.total_bytes(), **self._stats[name].to_dict()}
+                for name, cache in self._caches.items()
+            },
+        }
+
+    def enforce(self, protect: Optional[Tuple[str, str]] = None) -> int:
+        """Evict least recently used entries until within budget; return how many went.
+
+        ``protect`` is a ``(cache_name, key)`` pair that must survive, normally
+        the entry whose write triggered the check. Safe to call from any
+        thread, but not while holding a registered cache's own lock.
+        """
+
+        with self._lock:
+            return self._enforce(protect)
+
+    def _enforce(self, protect: Optional[Tuple[str, str]]) -> int:
+        excess = self.total_bytes() - self.budget_bytes
+        if excess <= 0:
+            return 0
+
+        candidates = sorted(
+            (
+                (accessed_at, name, key, size)
+                for name, cache in self._caches.items()
+                for key, size, accessed_at in cache.cache_entries()
+                if (name, key) != protect
+            ),
+        )
+        victims: Dict[str, List[str]] = {}
+        planned = 0
+        for _, name, key, size in candidates:
+            if planned >= excess:
+                break
+            victims.setdefault(name, []).append(key)
+            planned += size
+
+        evicted = 0
+        for name, keys in victims.items():
+            freed = self._caches[name].evict(keys)
+            stats = self._stats[name]
+            stats.evictions += len(keys)
+            stats.evicted_bytes += freed
+            evicted += len(keys)
+        if evicted:
+            logger.info(
+                f"Cache budget {self.budget_bytes // (1024 * 1024)} MB exceeded; evicted {evicted} entries"
+            )
+        return evicted
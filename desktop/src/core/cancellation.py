@@ -0,0 +1,60 @@
+"""Cooperative cancellation for long-running work.
+
+A :class:`CancellationToken` is shared between whoever starts a piece of
+work and the code doing it. The owner calls :meth:`~CancellationToken.cancel`;
+the worker calls :meth:`~CancellationToken.raise_if_cancelled` at convenient
+points and stops with :class:`AnalysisCancelled`. A token can also carry a
+deadline, after which it counts as cancelled without anyone calling
+``cancel``.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Optional
+
+from src.utils.exceptions import AnalysisCancelled
+
+CANCELLED = "cancelled"
+SUPERSEDED = "superseded"
+DEADLINE_EXCEEDED = "timed out"
+
+
+class CancellationToken:
+    """Thread-safe cancellation flag with an optional deadline."""
+
+    def __init__(self, timeout: Optional[float] = None):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self.reason: Optional[str] = None
+        self.timeout = timeout
+        self.deadline = time.monotonic() + timeout if timeout else None
+
+    def cancel(self, reason: str = CANCELLED) -> None:
+        """Request cancellation; the first reason given is kept."""
+
+        with self._lock:
+            if not self._event.is_set():
+                self.reason = reason
+                self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        if self._event.is_set():
+            return True
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel(DEADLINE_EXCEEDED)
+            return True
+        return False
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline, or ``None`` without one."""
+
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def raise_if_cancelled(self) -> None:
+        if self.cancelled:
+            raise AnalysisCancelled(self.reason or CANCELLED)
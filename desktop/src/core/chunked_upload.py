@@ -0,0 +1,276 @@
+"""Resumable chunked uploads for large documents.
+
+Upload payloads larger than a single chunk are split into fixed-size
+chunks, each carrying its own SHA-256 checksum. Progress is persisted per
+upload in the application's data directory so a retry, or a restart of the
+desktop app, resumes from the last acknowledged chunk instead of resending
+the whole document.
+
+Protocol (all paths relative to ``ApiConfig.analysis_base_url``):
+
+* ``POST /upload/sessions`` with ``{size, chunkSize, chunkCount, checksum}``
+  returns ``{"uploadId": ...}``.
+* ``GET /upload/sessions/{id}`` returns ``{"received": n}``, the number of
+  contiguous chunks the server holds; ``404`` means the session expired.
+* ``PUT /upload/sessions/{id}/chunks/{index}`` with the raw chunk bytes and
+  an ``X-Chunk-Checksum`` header. Re-sending an acknowledged chunk is a no-op.
+* ``POST /upload/sessions/{id}/complete`` with ``{checksum}`` assembles the
+  document and returns the same body as a single-shot upload.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+import aiohttp
+from loguru import logger
+
+if TYPE_CHECKING:  # pragma: no cover - import cycle guard
+    from .api_client import ApiClient
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def encode_payload(file_payload: Dict[str, Any]) -> bytes:
+    """Serialize an upload payload deterministically so its digest is stable."""
+
+    return json.dumps(file_payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+@dataclass
+class UploadChunk:
+    """A fixed-size slice of an encoded upload payload."""
+
+    index: int
+    offset: int
+    size: int
+    checksum: str
+
+
+def split_chunks(data: bytes, chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[UploadChunk]:
+    """Split ``data`` into chunks of ``chunk_size`` bytes (the last may be shorter)."""
+
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    view = memoryview(data)
+    return [
+        UploadChunk(
+            index=index,
+            offset=offset,
+            size=len(view[offset:offset + chunk_size]),
+            checksum=_sha256(view[offset:offset + chunk_size]),
+        )
+        for index, offset in enumerate(range(0, len(data), chunk_size))
+    ]
+
+
+@dataclass
+class UploadProgress:
+    """Persisted state of a chunked upload."""
+
+    upload_key: str
+    total_size: int
+    chunk_size: int
+    chunk_count: int
+    checksum: str
+    upload_id: Optional[str] = None
+    acknowledged: int = 0
+    session_generation: int = 0  # Bumped when a session expires; keys the next creation
+    updated_at: datetime = field(default_factory=datetime.utcnow)
+
+    def to_dict(self) -> Dict[str, Any]:
+        raw = asdict(self)
+        raw["updated_at"] = self.updated_at.isoformat()
+        return raw
+
+    @staticmethod
+    def from_dict(data: Dict[str, Any]) -> "UploadProgress":
+        return UploadProgress(
+            upload_key=data["upload_key"],
+            total_size=data["total_size"],
+            chunk_size=data["chunk_size"],
+            chunk_count=data["chunk_count"],
+            checksum=data["checksum"],
+            upload_id=data.get("upload_id"),
+            acknowledged=data.get("acknowledged", 0),
+            session_generation=data.get("session_generation", 0),
+            updated_at=datetime.fromisoformat(data["updated_at"]),
+        )
+
+
+class UploadProgressStore:
+    """One small JSON file per in-flight upload, keyed by payload digest."""
+
+    def __init__(self, data_dir: Path, dirname: str = "uploads"):
+        self.root = data_dir / dirname
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, upload_key: str) -> Path:
+        return self.root / f"{upload_key}.json"
+
+    def load(self, upload_key: str) -> Optional[UploadProgress]:
+        path = self._path(upload_key)
+        if not path.exists():
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return UploadProgress.from_dict(json.load(f))
+        except Exception as exc:  # pragma: no cover - defensive
+            logger.warning(f"Discarding unreadable upload progress {path.name}: {exc}")
+            return None
+
+    def save(self, progress: UploadProgress) -> None:
+        progress.updated_at = datetime.utcnow()
+        path = self._path(progress.upload_key)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(progress.to_dict(), f)
+        tmp_path.replace(path)
+
+    def remove(self, upload_key: str) -> None:
+        self._path(upload_key).unlink(missing_ok=True)
+
+    def prune(self, max_age: timedelta = timedelta(days=7)) -> int:
+        """Drop progress records for uploads abandoned longer than ``max_age``."""
+
+        cutoff = datetime.utcnow() - max_age
+        removed = 0
+        for path in self.root.glob("*.json"):
+            progress = self.load(path.stem)
+            if progress is None or progress.updated_at < cutoff:
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+
+class ChunkedUploader:
+    """Uploads large payloads chunk by chunk, resuming from persisted progress."""
+
+    def __init__(
+        self,
+        api_client: "ApiClient",
+        progress_store: UploadProgressStore,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        on_bytes_sent: Optional[Callable[[int], None]] = None,
+    ):
+        self.api_client = api_client
+        self.progress_store = progress_store
+        self.chunk_size = chunk_size
+        self.on_bytes_sent = on_bytes_sent
+
+    def _sent(self, count: int) -> None:
+        if self.on_bytes_sent is not None:
+            self.on_bytes_sent(count)
+
+    def _sessions_url(self) -> str:
+        return f"{self.api_client.api_config.analysis_base_url}/upload/sessions"
+
+    async def upload(self, file_payload: Dict[str, Any], idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """Upload ``file_payload``, chunked when it exceeds one chunk.
+
+        Safe to call again after any failure: acknowledged chunks are skipped.
+        ``idempotency_key`` guards the requests that create server-side work
+        (session creation and completion); chunk PUTs are idempotent by index.
+        """
+
+        data = encode_payload(file_payload)
+        if len(data) <= self.chunk_size:
+            result = await self.api_client.async_upload(file_payload, idempotency_key=idempotency_key)
+            self._sent(len(data))
+            return result
+
+        upload_key = _sha256(data)
+        chunks = split_chunks(data, self.chunk_size)
+        progress = self.progress_store.load(upload_key)
+        if progress is None or progress.chunk_size != self.chunk_size:
+            progress = UploadProgress(
+                upload_key=upload_key,
+                total_size=len(data),
+                chunk_size=self.chunk_size,
+                chunk_count=len(chunks),
+                checksum=upload_key,
+            )
+
+        await self._ensure_session(progress, idempotency_key)
+
+        view = memoryview(data)
+        for chunk in chunks[progress.acknowledged:]:
+            await self._put_chunk(progress, chunk, view[chunk.offset:chunk.offset + chunk.size])
+            progress.acknowledged = chunk.index + 1
+            self.progress_store.save(progress)
+            self._sent(chunk.size)
+
+        url = f"{self._sessions_url()}/{progress.upload_id}/complete"
+        result = await self.api_client._async_request(
+            "POST", url, "upload", 60, {"checksum": progress.checksum}, idempotency_key=idempotency_key
+        )
+        self.progress_store.remove(upload_key)
+        logger.info(f"Chunked upload {progress.upload_id} complete ({progress.chunk_count} chunks)")
+        return result
+
+    async def _ensure_session(self, progress: UploadProgress, idempotency_key: Optional[str] = None) -> None:
+        """Create a server-side upload session or reconcile with an existing one."""
+
+        if progress.upload_id:
+            url = f"{self._sessions_url()}/{progress.upload_id}"
+            try:
+                status = await self.api_client._async_request("GET", url, "upload", 20)
+            except aiohttp.ClientResponseError as exc:
+                if exc.status != 404:
+                    raise
+                logger.warning(f"Upload session {progress.upload_id} expired; restarting")
+                # A fresh key, or a server honouring idempotency would replay the dead session id.
+                progress.upload_id = None
+                progress.session_generation += 1
+                self.progress_store.save(progress)
+            else:
+                # The server is authoritative: it may hold a chunk whose ack we lost.
+                progress.acknowledged = min(int(status.get("received", 0)), progress.chunk_count)
+                logger.info(
+                    f"Resuming upload {progress.upload_id} at chunk "
+                    f"{progress.acknowledged}/{progress.chunk_count}"
+                )
+                return
+
+        body = {
+            "size": progress.total_size,
+            "chunkSize": progress.chunk_size,
+            "chunkCount": progress.chunk_count,
+            "checksum": progress.checksum,
+        }
+        session_key = f"{idempotency_key}:session:{progress.session_generation}" if idempotency_key else None
+        created = await self.api_client._async_request(
+            "POST", self._sessions_url(), "upload", 20, body, idempotency_key=session_key
+        )
+        progress.upload_id = created["uploadId"]
+        progress.acknowledged = 0
+        self.progress_store.save(progress)
+
+    async def _put_chunk(self, progress: UploadProgress, chunk: UploadChunk, body: memoryview) -> None:
+        """Send one chunk; transient failures retry this chunk only."""
+
+        url = f"{self._sessions_url()}/{progress.upload_id}/chunks/{chunk.index}"
+        headers = {
+            "Content-Type": "application/octet-stream",
+            "X-Chunk-Checksum": chunk.checksum,
+            "X-Chunk-Offset": str(chunk.offset),
+        }
+        session = await self.api_client._get_aiohttp_session()
+
+        async def attempt() -> None:
+            await self.api_client.rate_limiter.acquire("upload")
+            self.api_client._log_request("PUT", url)
+            async with session.put(url, data=bytes(body), headers=headers, timeout=60) as resp:
+                self.api_client.rate_limiter.observe("upload", resp.status, resp.headers)
+                resp.raise_for_status()
+
+        await self.api_client.retry_policy.run("upload", attempt)
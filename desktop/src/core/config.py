@@ -68,6 +68,7 @@ class ApiConfig:
     auth_base_url: str = "http://localhost:3000/api/auth"
     search_base_url: str = "http://localhost:3000/api/search"
     analysis_base_url: str = "http://localhost:3000/api/analysis"
+    analysis_runs_base_url: str = "http://localhost:3000/api/analysis-runs"
     annotation_base_url: str = "http://localhost:3000/api/annotations"
     report_base_url: str = "http://localhost:3000/api/reports"
     ingestion_status_url: str = "http://localhost:3000/api/ingestion-status"
@@ -93,6 +94,29 @@ class DraftCacheConfig:
     cache_filename: str = "drafts.json"
 
 
+@dataclass
+class SyncConfig:
+    """Offline sync queue configuration."""
+
+    queue_backend: str = "journal"  # "journal" or "sqlite"
+    worker_concurrency: int = 4
+
+
+@dataclass
+class RateLimitConfig:
+    """Client-side request budgets per endpoint family (requests per second; 0 means unlimited)."""
+
+    enabled: bool = True
+    search_per_second: float = 5.0
+    analysis_per_second: float = 2.0
+    upload_per_second: float = 4.0
+    annotations_per_second: float = 10.0
+    reports_per_second: float = 5.0
+    default_per_second: float = 10.0
+    burst_seconds: float = 2.0  # Bucket capacity, in seconds of budget
+    interactive_reserve: float = 0.25  # Share of each bucket background sync may not use
+
+
 @dataclass
 class SecurityConfig:
     """Security and privacy configuration"""
@@ -118,6 +142,8 @@ class Config:
         self.network = NetworkConfig()
         self.api = ApiConfig()
         self.drafts = DraftCacheConfig()
+        self.sync = SyncConfig()
+        self.rate_limits = RateLimitConfig()
         self.security = SecurityConfig()
         self.features = FeatureFlagsConfig()
         
@@ -164,6 +190,9 @@ class Config:
         self.analysis.nlp_model = self.settings.value("analysis/nlp_model", self.analysis.nlp_model)
         self.analysis.confidence_threshold = self.settings.value("analysis/confidence_threshold", self.analysis.confidence_threshold, type=float)
         self.analysis.enable_disambiguation = self.settings.value("analysis/enable_disambiguation", self.analysis.enable_disambiguation, type=bool)
+        self.analysis.cache_enabled = self.settings.value("analysis/cache_enabled", self.analysis.cache_enabled, type=bool)
+        self.analysis.cache_size_mb = self.settings.value("analysis/cache_size_mb", self.analysis.cache_size_mb, type=int)
+        self.analysis.max_processing_time_seconds = self.settings.value("analysis/max_processing_time_seconds", self.analysis.max_processing_time_seconds, type=int)
         
         # UI settings
         self.ui.theme = self.settings.value("ui/theme", self.ui.theme)
@@ -178,6 +207,7 @@ class Config:
         self.api.auth_base_url = self.settings.value("api/auth_base_url", self.api.auth_base_url)
         self.api.search_base_url = self.settings.value("api/search_base_url", self.api.search_base_url)
         self.api.analysis_base_url = self.settings.value("api/analysis_base_url", self.api.analysis_base_url)
+        self.api.analysis_runs_base_url = self.settings.value("api/analysis_runs_base_url", self.api.analysis_runs_base_url)
         self.api.annotation_base_url = self.settings.value("api/annotation_base_url", self.api.annotation_base_url)
         self.api.report_base_url = self.settings.value("api/report_base_url", self.api.report_base_url)
         self.api.ingestion_status_url = self.settings.value("api/ingestion_status_url", self.api.ingestion_status_url)
@@ -188,6 +218,21 @@ class Config:
         self.drafts.enabled = self.settings.value("drafts/enabled", self.drafts.enabled, type=bool)
         self.drafts.cache_filename = self.settings.value("drafts/cache_filename", self.drafts.cache_filename)
 
+        # Offline sync
+        self.sync.queue_backend = self.settings.value("sync/queue_backend", self.sync.queue_backend)
+        self.sync.worker_concurrency = self.settings.value("sync/worker_concurrency", self.sync.worker_concurrency, type=int)
+
+        # Rate limits
+        self.rate_limits.enabled = self.settings.value("rate_limits/enabled", self.rate_limits.enabled, type=bool)
+        self.rate_limits.search_per_second = self.settings.value("rate_limits/search_per_second", self.rate_limits.search_per_second, type=float)
+        self.rate_limits.analysis_per_second = self.settings.value("rate_limits/analysis_per_second", self.rate_limits.analysis_per_second, type=float)
+        self.rate_limits.upload_per_second = self.settings.value("rate_limits/upload_per_second", self.rate_limits.upload_per_second, type=float)
+        self.rate_limits.annotations_per_second = self.settings.value("rate_limits/annotations_per_second", self.rate_limits.annotations_per_second, type=float)
+        self.rate_limits.reports_per_second = self.settings.value("rate_limits/reports_per_second", self.rate_limits.reports_per_second, type=float)
+        self.rate_limits.default_per_second = self.settings.value("rate_limits/default_per_second", self.rate_limits.default_per_second, type=float)
+        self.rate_limits.burst_seconds = self.settings.value("rate_limits/burst_seconds", self.rate_limits.burst_seconds, type=float)
+        self.rate_limits.interactive_reserve = self.settings.value("rate_limits/interactive_reserve", self.rate_limits.interactive_reserve, type=float)
+
         # Security settings
         self.security.encrypt_local_data = self.settings.value("security/encrypt_local_data", self.security.encrypt_local_data, type=bool)
         self.security.audit_logging = self.settings.value("security/audit_logging", self.security.audit_logging, type=bool)
@@ -214,6 +259,9 @@ class Config:
         self.settings.setValue("analysis/nlp_model", self.analysis.nlp_model)
         self.settings.setValue("analysis/confidence_threshold", self.analysis.confidence_threshold)
         self.settings.setValue("analysis/enable_disambiguation", self.analysis.enable_disambiguation)
+        self.settings.setValue("analysis/cache_enabled", self.analysis.cache_enabled)
+        self.settings.setValue("analysis/cache_size_mb", self.analysis.cache_size_mb)
+        self.settings.setValue("analysis/max_processing_time_seconds", self.analysis.max_processing_time_seconds)
         
         # UI settings
         self.settings.setValue("ui/theme", self.ui.theme)
@@ -228,6 +276,7 @@ class Config:
         self.settings.setValue("api/auth_base_url", self.api.auth_base_url)
         self.settings.setValue("api/search_base_url", self.api.search_base_url)
         self.settings.setValue("api/analysis_base_url", self.api.analysis_base_url)
+        self.settings.setValue("api/analysis_runs_base_url", self.api.analysis_runs_base_url)
         self.settings.setValue("api/annotation_base_url", self.api.annotation_base_url)
         self.settings.setValue("api/report_base_url", self.api.report_base_url)
         self.settings.setValue("api/ingestion_status_url", self.api.ingestion_status_url)
@@ -238,6 +287,21 @@ class Config:
         self.settings.setValue("drafts/enabled", self.drafts.enabled)
         self.settings.setValue("drafts/cache_filename", self.drafts.cache_filename)
 
+        # Offline sync
+        self.settings.setValue("sync/queue_backend", self.sync.queue_backend)
+        self.settings.setValue("sync/worker_concurrency", self.sync.worker_concurrency)
+
+        # Rate limits
+        self.settings.setValue("rate_limits/enabled", self.rate_limits.enabled)
+        self.settings.setValue("rate_limits/search_per_second", self.rate_limits.search_per_second)
+        self.settings.setValue("rate_limits/analysis_per_second", self.rate_limits.analysis_per_second)
+        self.settings.setValue("rate_limits/upload_per_second", self.rate_limits.upload_per_second)
+        self.settings.setValue("rate_limits/annotations_per_second", self.rate_limits.annotations_per_second)
+        self.settings.setValue("rate_limits/reports_per_second", self.rate_limits.reports_per_second)
+        self.settings.setValue("rate_limits/default_per_second", self.rate_limits.default_per_second)
+        self.settings.setValue("rate_limits/burst_seconds", self.rate_limits.burst_seconds)
+        self.settings.setValue("rate_limits/interactive_reserve", self.rate_limits.interactive_reserve)
+
         # Security settings
         self.settings.setValue("security/encrypt_local_data", self.security.encrypt_local_data)
         self.settings.setValue("security/audit_logging", self.security.audit_logging)
@@ -271,6 +335,8 @@ class Config:
             'security': self.security.__dict__,
             'api': self.api.__dict__,
             'features': self.features.__dict__,
+            'sync': self.sync.__dict__,
+            'rate_limits': self.rate_limits.__dict__,
         }
         
         with open(file_path, 'w') as f:
@@ -298,6 +364,10 @@ class Config:
             self.api = ApiConfig(**config_data['api'])
         if 'features' in config_data:
             self.features = FeatureFlagsConfig(**config_data['features'])
+        if 'sync' in config_data:
+            self.sync = SyncConfig(**config_data['sync'])
+        if 'rate_limits' in config_data:
+            self.rate_limits = RateLimitConfig(**config_data['rate_limits'])
 
         # Save to QSettings
         self.save_settings()
\ No newline at end of file
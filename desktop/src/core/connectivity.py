@@ -0,0 +1,116 @@
+"""Lightweight backend reachability detection.
+
+The prober is passive while online: callers report request outcomes and
+no traffic is generated. After a connectivity failure it switches to
+offline and probes the backend with exponential backoff until it answers,
+then notifies listeners so idle sync workers wake immediately instead of
+polling on a fixed interval.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Callable, List, Optional
+
+import aiohttp
+import requests
+from loguru import logger
+
+Listener = Callable[[bool], None]
+
+
+def is_connectivity_error(exc: BaseException) -> bool:
+    """True when ``exc`` means the backend could not be reached at all."""
+
+    return isinstance(
+        exc,
+        (
+            aiohttp.ClientConnectionError,
+            asyncio.TimeoutError,
+            ConnectionError,
+            requests.ConnectionError,
+            requests.Timeout,
+        ),
+    ) and not isinstance(exc, aiohttp.ClientResponseError)
+
+
+class ReachabilityProber:
+    """Tracks whether the backend is reachable and announces transitions."""
+
+    def __init__(
+        self,
+        probe_url: str,
+        min_interval: float = 1.0,
+        max_interval: float = 60.0,
+        timeout: float = 5.0,
+    ):
+        self.probe_url = probe_url
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.timeout = timeout
+        self.online = True
+        self._listeners: List[Listener] = []
+        self._probe_task: Optional[asyncio.Task] = None
+
+    def add_listener(self, listener: Listener) -> None:
+        self._listeners.append(listener)
+
+    def _set_online(self, online: bool) -> None:
+        if online == self.online:
+            return
+        self.online = online
+        logger.info(f"Backend {'reachable' if online else 'unreachable'} ({self.probe_url})")
+        for listener in list(self._listeners):
+            try:
+                listener(online)
+            except Exception as exc:  # pragma: no cover - defensive
+                logger.warning(f"Connectivity listener failed: {exc}")
+        if not online:
+            self._start_probing()
+
+    def report_success(self) -> None:
+        """A request just succeeded, so the backend is reachable."""
+
+        self._set_online(True)
+
+    def report_failure(self, exc: BaseException) -> None:
+        """A request just failed; go offline if it was a connectivity failure."""
+
+        if is_connectivity_error(exc):
+            self._set_online(False)
+
+    async def probe(self) -> bool:
+        """One reachability check: any HTTP response counts as reachable."""
+
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.head(
+                    self.probe_url, timeout=aiohttp.ClientTimeout(total=self.timeout), allow_redirects=False
+                ):
+                    return True
+        except (aiohttp.ClientError, asyncio.TimeoutError, OSError):
+            return False
+
+    async def check(self) -> bool:
+        """Probe now and update state (used at start-up)."""
+
+        self._set_online(await self.probe())
+        return self.online
+
+    def _start_probing(self) -> None:
+        if self._probe_task is None or self._probe_task.done():
+            self._probe_task = asyncio.ensure_future(self._probe_until_online())
+
+    async def _probe_until_online(self) -> None:
+        interval = self.min_interval
+        while not self.online:
+            await asyncio.sleep(interval)
+            if await self.probe():
+                self._set_online(True)
+                return
+            interval = min(self.max_interval, interval * 2)
+
+    def stop(self) -> None:
+        if self._probe_task is not None and not self._probe_task.done():
+            self._probe_task.cancel()
+        self._probe_task = None
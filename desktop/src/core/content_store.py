@@ -0,0 +1,220 @@
+"""Content-addressed blob storage for local caches.
+
+Text is stored once per distinct content under the SHA-256 of its UTF-8
+encoding, one file per blob in a two-level fan-out directory. Writes go to
+a temporary file that is atomically renamed into place, so a crash never
+leaves a torn blob behind.
+
+Blobs are split into independently zlib-compressed blocks behind a small
+offsets table, so a reader can memory-map the file and decode only the
+blocks it touches. Blobs written before the block format (a single zlib
+stream) remain readable.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import zlib
+from codecs import getincrementaldecoder
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional, Tuple, Union
+
+BLOCK_MAGIC = b"PFB1"
+# Magic, block size, block count, uncompressed length; then one little-endian
+# u64 end offset per block, relative to the first block.
+_HEADER = struct.Struct("<4sIIQ")
+DEFAULT_BLOCK_SIZE = 64 * 1024
+
+
+def write_atomic(path: Path, data: bytes, fsync: bool = False) -> None:
+    """Replace ``path`` with ``data`` via a temporary file and rename."""
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def content_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def encode_blocks(data: bytes, block_size: int = DEFAULT_BLOCK_SIZE, level: int = 3) -> bytes:
+    """Serialize ``data`` in the block format."""
+
+    blocks = [zlib.compress(data[i:i + block_size], level) for i in range(0, len(data), block_size)]
+    ends = []
+    position = 0
+    for block in blocks:
+        position += len(block)
+        ends.append(position)
+    header = _HEADER.pack(BLOCK_MAGIC, block_size, len(blocks), len(data))
+    return b"".join([header, struct.pack(f"<{len(ends)}Q", *ends), *blocks])
+
+
+class BlobReader:
+    """Random access to one stored blob; blocks are decompressed only when read.
+
+    Block-format files are memory-mapped, so opening a blob costs a header
+    read whatever its size. Use as a context manager, or call :meth:`close`,
+    so the mapping is released promptly.
+    """
+
+    def __init__(self, buffer: Union[mmap.mmap, bytes], handle: Optional[BinaryIO] = None):
+        self._buffer = buffer
+        self._handle = handle
+        if len(buffer) < _HEADER.size:
+            raise ValueError("truncated blob")
+        magic, self.block_size, count, self.size = _HEADER.unpack_from(buffer)
+        if magic != BLOCK_MAGIC:
+            raise ValueError("not a block-format blob")
+        try:
+            self._ends = struct.unpack_from(f"<{count}Q", buffer, _HEADER.size)
+        except struct.error as exc:
+            raise ValueError(f"truncated blob: {exc}") from exc
+        self._data_start = _HEADER.size + 8 * count
+        # Catch truncation and a damaged offsets table at open; damaged block data surfaces on read.
+        if any(end <= start for start, end in zip((0, *self._ends), self._ends)):
+            raise ValueError("corrupt blob: block offsets out of order")
+        if self._ends and self._data_start + self._ends[-1] > len(buffer):
+            raise ValueError("truncated blob")
+
+    @classmethod
+    def open(cls, path: Path) -> "BlobReader":
+        handle = open(path, "rb")
+        try:
+            if handle.read(len(BLOCK_MAGIC)) != BLOCK_MAGIC:
+                # Pre-block-format blob: a single zlib stream, decoded eagerly.
+                handle.seek(0)
+                with handle:
+                    try:
+                        return cls.from_bytes(zlib.decompress(handle.read()))
+                    except zlib.error as exc:
+                        raise ValueError(f"corrupt blob: {exc}") from exc
+            return cls(mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ), handle)
+        except BaseException:
+            handle.close()
+            raise
+
+    @classmethod
+    def from_bytes(cls, data: bytes, block_size: int = DEFAULT_BLOCK_SIZE) -> "BlobReader":
+        """Reader over in-memory content, so callers get one interface either way."""
+
+        return cls(encode_blocks(data, block_size, level=0))
+
+    @property
+    def block_count(self) -> int:
+        return len(self._ends)
+
+    def block(self, index: int) -> bytes:
+        start = self._data_start + (self._ends[index - 1] if index else 0)
+        end = self._data_start + self._ends[index]
+        try:
+            return zlib.decompress(self._buffer[start:end])
+        except zlib.error as exc:
+            raise ValueError(f"corrupt blob block {index}: {exc}") from exc
+
+    def read(self, offset: int = 0, length: Optional[int] = None) -> bytes:
+        """Uncompressed bytes ``[offset, offset + length)``, decoding only the blocks involved."""
+
+        end = self.size if length is None else min(self.size, offset + length)
+        if offset >= end:
+            return b""
+        first, last = offset // self.block_size, (end - 1) // self.block_size
+        data = b"".join(self.block(i) for i in range(first, last + 1))
+        skip = offset - first * self.block_size
+        return data[skip:skip + end - offset]
+
+    def iter_text(self) -> Iterator[str]:
+        """Decode the blob as UTF-8 one block at a time."""
+
+        decoder = getincrementaldecoder("utf-8")()
+        for index in range(self.block_count):
+            chunk = decoder.decode(self.block(index))
+            if chunk:
+                yield chunk
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            yield tail
+
+    def text(self) -> str:
+        return "".join(self.iter_text())
+
+    def close(self) -> None:
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+    def __enter__(self) -> "BlobReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class ContentStore:
+    """Block-compressed blobs addressed by the digest of their content."""
+
+    def __init__(self, root: Path, compression_level: int = 3, block_size: int = DEFAULT_BLOCK_SIZE):
+        self.root = root
+        self.compression_level = compression_level
+        self.block_size = block_size
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def path(self, digest: str) -> Path:
+        return self.root / digest[:2] / f"{digest[2:]}.z"
+
+    def __contains__(self, digest: str) -> bool:
+        return self.path(digest).exists()
+
+    def put(self, text: str) -> Tuple[str, int]:
+        """Store ``text`` unless identical content exists; return ``(digest, stored_bytes)``."""
+
+        data = text.encode("utf-8")
+        digest = content_digest(data)
+        path = self.path(digest)
+        if path.exists():
+            return digest, path.stat().st_size
+        encoded = encode_blocks(data, self.block_size, self.compression_level)
+        write_atomic(path, encoded)
+        return digest, len(encoded)
+
+    def open(self, digest: str) -> BlobReader:
+        """Lazy reader over a stored blob; close it when done.
+
+        Raises ``OSError`` if the blob is missing and ``ValueError`` if it is
+        corrupt, here or when a damaged block is read.
+        """
+
+        return BlobReader.open(self.path(digest))
+
+    def get(self, digest: str) -> str:
+        with self.open(digest) as blob:
+            return blob.text()
+
+    def stored_size(self, digest: str) -> int:
+        try:
+            return self.path(digest).stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def delete(self, digest: str) -> None:
+        path = self.path(digest)
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            return
+        try:
+            path.parent.rmdir()  # Only succeeds once the fan-out directory is empty.
+        except OSError:
+            pass
@@ -0,0 +1,212 @@
+"""Read-only parse of a document snapshot for the analysis rules.
+
+Splits the snapshot into paragraphs (the same ``\\n``-joined paragraphs
+that :class:`~.word_bridge.DocumentExtractor` produced, so indexes line up
+with :class:`TextAnchor` navigation), assigns each paragraph to a section
+and extracts the numbered claims with their dependencies. The result is
+immutable and shared by every rule of an analysis run.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from src.models.document import DocumentSnapshot
+
+# Heading prefixes (upper-cased) and the section they open.
+SECTION_HEADINGS: Tuple[Tuple[str, str], ...] = (
+    ("CROSS-REFERENCE", "cross_reference"),
+    ("CROSS REFERENCE", "cross_reference"),
+    ("FIELD", "field"),
+    ("TECHNICAL FIELD", "field"),
+    ("BACKGROUND", "background"),
+    ("SUMMARY", "summary"),
+    ("BRIEF DESCRIPTION OF THE DRAWINGS", "drawings"),
+    ("BRIEF DESCRIPTION OF DRAWINGS", "drawings"),
+    ("DETAILED DESCRIPTION", "detailed_description"),
+    ("DESCRIPTION OF EMBODIMENTS", "detailed_description"),
+    ("WHAT IS CLAIMED IS", "claims"),
+    ("I CLAIM", "claims"),
+    ("WE CLAIM", "claims"),
+    ("CLAIMS", "claims"),
+    ("ABSTRACT", "abstract"),
+)
+MAX_HEADING_LENGTH = 80
+
+_CLAIM_START = re.compile(r"^\s*(\d{1,3})\s*[.)]\s+(\S.*)$", re.DOTALL)
+_CLAIM_REFERENCE = re.compile(
+    r"\bclaims?\s+(\d{1,3})(?:\s*(?:-|–|to|through)\s*(\d{1,3}))?((?:\s*,?\s*(?:or|and)?\s*\d{1,3})*)",
+    re.IGNORECASE,
+)
+
+
+@dataclass(frozen=True)
+class ParsedClaim:
+    """One numbered claim; ``paragraphs`` holds its paragraph indexes in order."""
+
+    number: int
+    paragraphs: Tuple[int, ...]
+    text: str
+    dependencies: Tuple[int, ...]
+    category: str
+
+    @property
+    def is_independent(self) -> bool:
+        return not self.dependencies
+
+
+@dataclass(frozen=True)
+class ParsedDocument:
+    """Immutable view of a snapshot shared by all rules of one run."""
+
+    checksum: str
+    paragraphs: Tuple[str, ...]
+    sections: Tuple[str, ...]  # Section type per paragraph ("preamble" before any heading)
+    headings: Tuple[int, ...]  # Paragraph indexes that are section headings
+    claims: Tuple[ParsedClaim, ...]
+
+    @cached_property
+    def word_count(self) -> int:
+        return sum(len(paragraph.split()) for paragraph in self.paragraphs)
+
+    def claim(self, number: int) -> Optional[ParsedClaim]:
+        return self.claims_by_number.get(number)
+
+    @cached_property
+    def claims_by_number(self) -> Dict[int, ParsedClaim]:
+        # First occurrence wins; duplicates are reported by the formatting rule.
+        by_number: Dict[int, ParsedClaim] = {}
+        for claim in self.claims:
+            by_number.setdefault(claim.number, claim)
+        return by_number
+
+    def claim_at(self, paragraph: int) -> Optional[ParsedClaim]:
+        """The claim whose first paragraph is ``paragraph``."""
+
+        return self._claims_by_start.get(paragraph)
+
+    @cached_property
+    def _claims_by_start(self) -> Dict[int, ParsedClaim]:
+        return {claim.paragraphs[0]: claim for claim in self.claims}
+
+    @cached_property
+    def claim_paragraphs(self) -> FrozenSet[int]:
+        return frozenset(i for claim in self.claims for i in claim.paragraphs)
+
+    @cached_property
+    def _heading_set(self) -> FrozenSet[int]:
+        return frozenset(self.headings)
+
+    def section_paragraphs(self, section: str) -> Tuple[int, ...]:
+        """Non-heading, non-empty paragraphs of ``section``."""
+
+        return tuple(
+            i
+            for i, name in enumerate(self.sections)
+            if name == section and i not in self._heading_set and self.paragraphs[i].strip()
+        )
+
+    def has_section(self, section: str) -> bool:
+        return section in self.sections
+
+
+def heading_section(paragraph: str) -> Optional[str]:
+    """Section opened by ``paragraph`` if it is a heading."""
+
+    stripped = paragraph.strip().rstrip(":")
+    # Headings are short and unpunctuated; "Field strength is low." is prose.
+    if not stripped or len(stripped) > MAX_HEADING_LENGTH or stripped.endswith("."):
+        return None
+    if not stripped.isupper() and len(stripped.split()) > 6:
+        return None
+    text = stripped.upper()
+    for prefix, section in SECTION_HEADINGS:
+        if text.startswith(prefix):
+            return section
+    return None
+
+
+def claim_dependencies(text: str) -> Tuple[int, ...]:
+    """Claim numbers referenced as parents ("claim 1", "claims 2-4", "claim 1 or 3")."""
+
+    numbers = []
+    for match in _CLAIM_REFERENCE.finditer(text):
+        first = int(match.group(1))
+        last = int(match.group(2)) if match.group(2) else first
+        numbers.extend(range(first, last + 1) if 0 < last - first < 100 else [first])
+        numbers.extend(int(extra) for extra in re.findall(r"\d{1,3}", match.group(3) or ""))
+    return tuple(dict.fromkeys(numbers))
+
+
+def claim_category(text: str) -> str:
+    """Statutory category from the claim preamble (method, system, composition, apparatus)."""
+
+    preamble = text[:120].lower()
+    if any(word in preamble for word in ("method", "process")):
+        return "method"
+    if any(word in preamble for word in ("system", "assembly")):
+        return "system"
+    if any(word in preamble for word in ("composition", "compound")):
+        return "composition"
+    if "medium" in preamble:
+        return "medium"
+    return "apparatus"
+
+
+def parse_snapshot(snapshot: DocumentSnapshot) -> ParsedDocument:
+    paragraphs = tuple(snapshot.content.split("\n"))
+    sections = []
+    headings = []
+    current = "preamble"
+    for index, paragraph in enumerate(paragraphs):
+        section = heading_section(paragraph)
+        if section is not None:
+            current = section
+            headings.append(index)
+        sections.append(current)
+
+    claims = []
+    pending: Optional[Tuple[int, list]] = None
+
+    def close_claim() -> None:
+        if pending is None:
+            return
+        number, indexes = pending
+        text = "\n".join(paragraphs[i] for i in indexes)
+        body = _CLAIM_START.match(paragraphs[indexes[0]])
+        preamble = body.group(2) if body else text
+        # A claim citing itself or a later claim is still recorded so the dependency rule can flag it.
+        claims.append(
+            ParsedClaim(
+                number=number,
+                paragraphs=tuple(indexes),
+                text=text,
+                dependencies=claim_dependencies(preamble[:200]),
+                category=claim_category(preamble),
+            )
+        )
+
+    heading_set = set(headings)
+    for index, paragraph in enumerate(paragraphs):
+        if sections[index] != "claims" or index in heading_set:
+            close_claim()
+            pending = None
+            continue
+        match = _CLAIM_START.match(paragraph)
+        if match:
+            close_claim()
+            pending = (int(match.group(1)), [index])
+        elif pending is not None and paragraph.strip():
+            pending[1].append(index)
+    close_claim()
+
+    return ParsedDocument(
+        checksum=snapshot.checksum,
+        paragraphs=paragraphs,
+        sections=tuple(sections),
+        headings=tuple(headings),
+        claims=tuple(claims),
+    )
@@ -0,0 +1,77 @@
+"""Background persistence for autosaved drafts.
+
+Serializing, diffing, compressing and writing a large draft takes long
+enough to stall the GUI, so autosave hands the text to one writer thread
+instead. Saves for the same document coalesce: if an older save is still
+queued when a newer one arrives, only the newer text is written. A save
+whose content and metadata match what is already cached is skipped.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from loguru import logger
+
+from .offline_cache import OfflineDraftCache
+
+
+class DraftWriter:
+    """Writes draft saves to an :class:`OfflineDraftCache` on a background thread."""
+
+    def __init__(self, cache: OfflineDraftCache):
+        self.cache = cache
+        self.saved = 0
+        self.skipped = 0
+        self._pending: "OrderedDict[str, Tuple[str, Dict[str, Any]]]" = OrderedDict()
+        self._busy = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="draft-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, document_id: str, content: str, metadata: Optional[Dict[str, Any]] = None) -> None:
+        """Queue a save; replaces any queued save of the same document."""
+
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("DraftWriter is closed")
+            self._pending[document_id] = (content, metadata or {})
+            self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued save is on disk; ``False`` on timeout."""
+
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and not self._busy, timeout)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Write what is queued, then stop the thread."""
+
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._closed)
+                if not self._pending:
+                    return
+                document_id, (content, metadata) = self._pending.popitem(last=False)
+                self._busy = True
+            try:
+                if self.cache.is_current(document_id, content, metadata):
+                    self.skipped += 1
+                else:
+                    self.cache.save_draft(document_id, content, metadata)
+                    self.saved += 1
+            except Exception as exc:  # pragma: no cover - defensive
+                logger.error(f"Failed to save draft for {document_id}: {exc}")
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
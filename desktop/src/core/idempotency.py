@@ -0,0 +1,109 @@
+"""Idempotency keys for replayed sync work.
+
+Every :class:`SyncTask` carries a key derived from its ``task_id`` that is
+sent as the ``Idempotency-Key`` header on every attempt, so a retry of a
+request the server already processed (for example after a timeout) is
+recognised server-side instead of creating a duplicate annotation or
+analysis run. Keys the server has acknowledged are also recorded locally
+so a task resurrected by a crash between acknowledgement and dequeue is
+dropped without another round trip.
+"""
+
+from __future__ import annotations
+
+import time
+import uuid
+from itertools import takewhile
+from pathlib import Path
+from typing import Dict
+
+from loguru import logger
+
+from .sync_journal import SyncJournal
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+# Fixed namespace so a task maps to the same key across processes and restarts.
+_KEY_NAMESPACE = uuid.UUID("5b0f8a8e-3c1d-4f6e-9a3b-7d2c1e0f4a91")
+
+
+def idempotency_key(task_id: str) -> str:
+    """Stable idempotency key for the task with ``task_id``."""
+
+    return str(uuid.uuid5(_KEY_NAMESPACE, task_id))
+
+
+class AcknowledgedKeys:
+    """Journal-backed set of idempotency keys acknowledged by the server.
+
+    Entries expire after ``retention_seconds``; the server is expected to
+    remember keys at least that long. Keys are held in acknowledgement
+    order, so expired ones are pruned from the front as new ones arrive.
+    """
+
+    def __init__(
+        self,
+        data_dir: Path,
+        filename: str = "sync-acked.journal",
+        retention_seconds: float = 7 * 24 * 3600,
+        compact_min_records: int = 1024,
+    ):
+        self.retention_seconds = retention_seconds
+        self.compact_min_records = compact_min_records
+        self._acked: Dict[str, float] = {}
+        self.journal = SyncJournal(data_dir / filename)
+        self._load()
+
+    def _load(self) -> None:
+        horizon = time.time() - self.retention_seconds
+        try:
+            for record in self.journal.replay():
+                if record.get("at", 0) >= horizon:
+                    self._remember(record["key"], record["at"])
+        except Exception as exc:  # pragma: no cover - defensive
+            logger.warning(f"Failed to load acknowledged idempotency keys: {exc}")
+            self._acked = {}
+        self._maybe_compact()
+
+    def __contains__(self, key: str) -> bool:
+        acked_at = self._acked.get(key)
+        return acked_at is not None and acked_at >= time.time() - self.retention_seconds
+
+    def __len__(self) -> int:
+        return len(self._acked)
+
+    def record(self, key: str) -> None:
+        """Remember that the server acknowledged ``key``."""
+
+        now = time.time()
+        self._remember(key, now)
+        self.journal.append({"key": key, "at": now})
+        self._prune(now)
+        self._maybe_compact()
+
+    def _remember(self, key: str, acked_at: float) -> None:
+        # Re-insert so the dict stays ordered by acknowledgement time.
+        self._acked.pop(key, None)
+        self._acked[key] = acked_at
+
+    def _prune(self, now: float) -> None:
+        """Forget expired keys; their journal records become garbage for compaction."""
+
+        horizon = now - self.retention_seconds
+        expired = [key for key, _ in takewhile(lambda item: item[1] < horizon, self._acked.items())]
+        for key in expired:
+            del self._acked[key]
+
+    def _maybe_compact(self) -> None:
+        if self.journal.record_count - len(self._acked) > max(self.compact_min_records, len(self._acked)):
+            self.compact()
+
+    def compact(self) -> None:
+        """Drop expired keys and rewrite the journal with the live ones."""
+
+        horizon = time.time() - self.retention_seconds
+        self._acked = {key: at for key, at in self._acked.items() if at >= horizon}
+        self.journal.rewrite({"key": key, "at": at} for key, at in self._acked.items())
+
+    def close(self) -> None:
+        self.journal.close()
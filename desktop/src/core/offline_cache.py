@@ -1,20 +1,42 @@
 """Offline draft caching utilities.
 
 Provides lightweight caching for unsent or in-progress drafts so users can
-resume work while offline. Drafts are stored on disk in the application's
-data directory using a simple JSON structure keyed by document checksum.
+resume work while offline. Each draft body is a compressed, content-
+addressed blob (identical content is stored once, in independently
+compressed blocks that can be memory-mapped) and a small JSON index
+maps document ids to their current blob plus metadata. Later saves of a
+draft store line-level deltas against that base, so an autosave writes
+in proportion to the edit rather than the document. The index loads at
+startup without reading any draft bodies.
+
+When a :class:`~.cache_manager.CacheManager` is attached, the cache reports
+hits and misses to it and lets it evict least recently used drafts to stay
+within the shared byte budget.
 """
 
 from __future__ import annotations
 
 import json
-from dataclasses import dataclass, asdict
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict, field, replace
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Optional, Any
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Any, Tuple
 
 from loguru import logger
 
+from .content_store import BlobReader, ContentStore, content_digest, write_atomic
+from .text_delta import apply_line_ops, decode_delta, encode_delta, line_delta
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from .cache_manager import CacheManager
+
+# Called with (document_id, content, metadata) after a body changes, and
+# with content ``None`` after an entry is removed, evicted or cleared.
+ChangeListener = Callable[[str, Optional[str], Dict[str, Any]], None]
+
 
 @dataclass
 class DraftEntry:
@@ -40,60 +62,474 @@ class DraftEntry:
         )
 
 
+@dataclass
+class DraftRecord:
+    """Index entry for a cached draft: where its body lives, not the body itself.
+
+    The body is the ``digest`` base blob with ``deltas`` applied in order.
+    """
+
+    document_id: str
+    digest: str
+    size: int  # Characters of content
+    stored_size: int  # Compressed bytes of the base blob
+    updated_at: datetime
+    metadata: Dict[str, Any]
+    accessed_at: float = 0.0  # Epoch seconds of the last save or load, for LRU eviction
+    deltas: List[Tuple[str, int]] = field(default_factory=list)  # (digest, compressed bytes)
+    head: str = ""  # Digest of the full current content
+
+    @property
+    def delta_bytes(self) -> int:
+        return sum(size for _, size in self.deltas)
+
+    def blobs(self) -> List[Tuple[str, int]]:
+        return [(self.digest, self.stored_size), *self.deltas]
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["updated_at"] = self.updated_at.isoformat()
+        return data
+
+    @staticmethod
+    def from_dict(data: Dict[str, Any]) -> "DraftRecord":
+        return DraftRecord(
+            document_id=data["document_id"],
+            digest=data["digest"],
+            size=data.get("size", 0),
+            stored_size=data.get("stored_size", 0),
+            updated_at=datetime.fromisoformat(data["updated_at"]),
+            metadata=data.get("metadata", {}),
+            accessed_at=data.get("accessed_at", 0.0),
+            deltas=[tuple(delta) for delta in data.get("deltas", [])],
+            head=data.get("head", ""),
+        )
+
+
 class OfflineDraftCache:
-    """Simple offline cache for draft content."""
+    """Offline cache for draft content backed by a content-addressed store.
+
+    A save whose previous version is cached stores only a line-level delta
+    against it; after ``max_deltas`` deltas, or once the deltas reach
+    ``rebase_ratio`` of the base's size, the full content becomes the new
+    base. ``filename`` names the legacy single-file JSON cache, which is
+    migrated into ``dirname`` on first start. A cache manager that
+    registers the cache knows it as ``cache_name`` (``dirname`` by default).
 
-    def __init__(self, data_dir: Path, filename: str = "drafts.json"):
-        self.cache_path = data_dir / filename
-        self._cache: Dict[str, DraftEntry] = {}
-        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
-        self._load_cache()
+    With a positive ``index_write_interval`` saves rewrite the index at most
+    that often and :meth:`flush` writes the rest; blobs saved after the last
+    index write of a session that never flushed are deleted on the next start.
+    """
 
-    def _load_cache(self) -> None:
-        if not self.cache_path.exists():
-            self._cache = {}
+    INDEX_FILENAME = "index.json"
+    INDEX_VERSION = 2
+    RECENT_BODIES = 4
+
+    def __init__(
+        self,
+        data_dir: Path,
+        filename: Optional[str] = "drafts.json",
+        dirname: str = "drafts",
+        cache_name: Optional[str] = None,
+        max_deltas: int = 32,
+        rebase_ratio: float = 0.5,
+        index_write_interval: float = 0.0,
+    ):
+        self.root = data_dir / dirname
+        self.index_path = self.root / self.INDEX_FILENAME
+        self.store = ContentStore(self.root / "objects")
+        self.cache_name = cache_name or dirname
+        self.cache_manager: Optional["CacheManager"] = None
+        self.max_deltas = max_deltas
+        self.rebase_ratio = rebase_ratio
+        self.index_write_interval = index_write_interval
+        self._index: Dict[str, DraftRecord] = {}
+        self._refs: Dict[str, int] = {}
+        self._stored_bytes = 0
+        # Latest bodies of recently saved or loaded drafts, so the next delta needs no read.
+        self._recent: "OrderedDict[str, str]" = OrderedDict()
+        # Autosave writes from a background thread while the GUI thread reads.
+        self._lock = threading.RLock()
+        self._listeners: List[ChangeListener] = []
+        # Reads only bump ``accessed_at`` in memory, and deferred saves only touch the
+        # in-memory index; either way the index is rewritten on the next write or flush.
+        self._index_dirty = False
+        self._last_index_write = float("-inf")
+        # Whether the index on disk lists every stored blob (false between deferred writes).
+        self._index_complete = True
+        self._load_index()
+        if filename:
+            self._migrate_legacy(data_dir / filename)
+
+    def _load_index(self) -> None:
+        self._index = {}
+        self._refs = {}
+        self._stored_bytes = 0
+        if not self.index_path.exists():
             return
 
         try:
-            with open(self.cache_path, "r", encoding="utf-8") as f:
+            with open(self.index_path, "r", encoding="utf-8") as f:
                 raw = json.load(f)
-                self._cache = {
-                    key: DraftEntry.from_dict(value) for key, value in raw.items()
-                }
+            for key, value in raw.get("drafts", {}).items():
+                self._add(key, DraftRecord.from_dict(value))
         except Exception as exc:  # pragma: no cover - defensive
-            logger.warning(f"Failed to load draft cache: {exc}")
-            self._cache = {}
+            logger.warning(f"Failed to load the {self.cache_name} cache index: {exc}")
+            self._index = {}
+            self._refs = {}
+            self._stored_bytes = 0
+            return
+        if not raw.get("complete", True):
+            self._sweep_orphans()
 
-    def _persist_cache(self) -> None:
-        serializable = {key: entry.to_serializable() for key, entry in self._cache.items()}
-        with open(self.cache_path, "w", encoding="utf-8") as f:
-            json.dump(serializable, f, indent=2)
+    def _sweep_orphans(self) -> None:
+        """Delete blobs no index entry references: saves a crash kept out of the index."""
 
-    def save_draft(self, document_id: str, content: str, metadata: Optional[Dict[str, Any]] = None) -> None:
-        metadata = metadata or {}
-        entry = DraftEntry(
+        orphans = [
+            path.parent.name + path.stem for path in self.store.root.glob("*/*.z")
+            if path.parent.name + path.stem not in self._refs
+        ]
+        for digest in orphans:
+            self.store.delete(digest)
+        if orphans:
+            logger.info(f"Deleted {len(orphans)} unindexed blobs from the {self.cache_name} cache")
+
+    def _persist_index(self, complete: bool = True) -> None:
+        raw = {
+            "version": self.INDEX_VERSION,
+            "complete": complete,
+            "drafts": {key: record.to_dict() for key, record in self._index.items()},
+        }
+        write_atomic(self.index_path, json.dumps(raw, separators=(",", ":")).encode("utf-8"))
+        self._index_dirty = False
+        self._index_complete = complete
+        self._last_index_write = time.monotonic()
+
+    def _persist_after_save(self) -> None:
+        """Rewrite the index now, or leave it to a later save or :meth:`flush`."""
+
+        if self.index_write_interval <= 0:
+            self._persist_index()
+            return
+        self._index_dirty = True
+        # The first deferred save marks the index on disk incomplete before anything goes missing from it.
+        if self._index_complete or time.monotonic() - self._last_index_write >= self.index_write_interval:
+            self._persist_index(complete=False)
+
+    def flush(self) -> None:
+        """Persist access times and deferred saves since the index was last written.
+
+        Call on shutdown; a crash before then loses LRU recency and deferred
+        saves only, never saves written with ``index_write_interval`` 0.
+        """
+
+        with self._lock:
+            if self._index_dirty or not self._index_complete:
+                self._persist_index()
+
+    def _add(self, document_id: str, record: DraftRecord) -> None:
+        self._index[document_id] = record
+        self._ref(record)
+
+    def _ref(self, record: DraftRecord) -> None:
+        for digest, size in record.blobs():
+            count = self._refs.get(digest, 0)
+            if not count:
+                self._stored_bytes += size
+            self._refs[digest] = count + 1
+
+    def _release(self, record: DraftRecord) -> None:
+        """Drop one reference to each of ``record``'s blobs, deleting unreferenced ones."""
+
+        for digest, size in record.blobs():
+            remaining = self._refs.get(digest, 1) - 1
+            if remaining:
+                self._refs[digest] = remaining
+            else:
+                self._refs.pop(digest, None)
+                self._stored_bytes -= size
+                self.store.delete(digest)
+
+    def _drop(self, document_id: str) -> Optional[DraftRecord]:
+        """Remove ``document_id`` from the index and delete its blobs if now unreferenced."""
+
+        self._recent.pop(document_id, None)
+        record = self._index.pop(document_id, None)
+        if record is not None:
+            self._release(record)
+        return record
+
+    def add_listener(self, listener: ChangeListener) -> None:
+        self._listeners.append(listener)
+
+    def _notify(self, document_id: str, content: Optional[str], metadata: Dict[str, Any]) -> None:
+        for listener in list(self._listeners):
+            try:
+                listener(document_id, content, metadata)
+            except Exception as exc:  # pragma: no cover - defensive
+                logger.warning(f"Listener on the {self.cache_name} cache failed: {exc}")
+
+    def _remember(self, document_id: str, content: str) -> None:
+        self._recent[document_id] = content
+        self._recent.move_to_end(document_id)
+        while len(self._recent) > self.RECENT_BODIES:
+            self._recent.popitem(last=False)
+
+    def _read(self, record: DraftRecord) -> str:
+        """Rebuild a draft body from its base blob and delta chain.
+
+        Raises ``OSError`` for a missing blob and ``ValueError`` for a corrupt one.
+        """
+
+        cached = self._recent.get(record.document_id)
+        if cached is not None:
+            return cached
+        if not record.deltas:
+            return self.store.get(record.digest)
+        lines = self.store.get(record.digest).splitlines(keepends=True)
+        try:
+            for digest, _ in record.deltas:
+                lines = apply_line_ops(lines, decode_delta(self.store.get(digest)))
+        except TypeError as exc:  # Valid JSON that is not a delta.
+            raise ValueError(f"corrupt delta: {exc}") from exc
+        content = "".join(lines)
+        # A damaged delta can still apply cleanly; the head digest catches it.
+        if record.head and content_digest(content.encode("utf-8")) != record.head:
+            raise ValueError("rebuilt draft does not match its digest")
+        return content
+
+    def _migrate_legacy(self, legacy_path: Path) -> None:
+        """Move drafts from the old whole-file ``drafts.json`` into the store."""
+
+        if not legacy_path.exists():
+            return
+        try:
+            with open(legacy_path, "r", encoding="utf-8") as f:
+                legacy = [DraftEntry.from_dict(value) for value in json.load(f).values()]
+        except Exception as exc:  # pragma: no cover - defensive
+            logger.warning(f"Failed to migrate legacy draft cache: {exc}")
+            return
+        for entry in legacy:
+            current = self._index.get(entry.document_id)
+            if current is None or current.updated_at < entry.updated_at:
+                self._write(entry.document_id, entry.content, entry.metadata, entry.updated_at)
+        self._persist_index()
+        legacy_path.unlink()
+        logger.info(f"Migrated {len(legacy)} drafts from {legacy_path.name}")
+
+    def _append_delta(self, previous: DraftRecord, content: str) -> Optional[List[Tuple[str, int]]]:
+        """Store ``content`` as a delta on ``previous``; ``None`` means rebase instead."""
+
+        if len(previous.deltas) >= self.max_deltas:
+            return None
+        try:
+            old = self._read(previous)
+        except (OSError, ValueError):
+            return None
+        digest, size = self.store.put(encode_delta(line_delta(old, content)))
+        if previous.delta_bytes + size > previous.stored_size * self.rebase_ratio:
+            if digest not in self._refs:
+                self.store.delete(digest)
+            return None
+        return [*previous.deltas, (digest, size)]
+
+    def _write(self, document_id: str, content: str, metadata: Dict[str, Any], updated_at: datetime) -> DraftRecord:
+        head = content_digest(content.encode("utf-8"))
+        previous = self._index.get(document_id)
+        if previous is not None and previous.head == head:
+            # Unchanged body: refresh the index entry only.
+            record = replace(previous, updated_at=updated_at, metadata=metadata, accessed_at=time.time())
+            self._index[document_id] = record
+            self._remember(document_id, content)
+            return record
+
+        deltas = self._append_delta(previous, content) if previous is not None else None
+        if deltas is not None:
+            digest, stored_size = previous.digest, previous.stored_size
+        else:
+            (digest, stored_size), deltas = self.store.put(content), []
+        record = DraftRecord(
             document_id=document_id,
-            content=content,
-            updated_at=datetime.utcnow(),
+            digest=digest,
+            size=len(content),
+            stored_size=stored_size,
+            updated_at=updated_at,
             metadata=metadata,
+            accessed_at=time.time(),
+            deltas=deltas,
+            head=head,
+        )
+        # Reference the new blobs before releasing the old ones so shared content survives.
+        self._ref(record)
+        if previous is not None:
+            self._release(previous)
+        self._index[document_id] = record
+        self._remember(document_id, content)
+        return record
+
+    def save_draft(self, document_id: str, content: str, metadata: Optional[Dict[str, Any]] = None) -> None:
+        manager = self.cache_manager
+        if manager is not None and not manager.admits(self.cache_name):
+            return
+        with self._lock:
+            previous = self._index.get(document_id)
+            record = self._write(document_id, content, metadata or {}, datetime.utcnow())
+            self._persist_after_save()
+        if previous is None or previous.head != record.head:
+            self._notify(document_id, content, record.metadata)
+        # Outside our lock: eviction may lock other caches, which may be saving into this one.
+        if manager is not None:
+            manager.enforce(protect=(self.cache_name, document_id))
+        logger.info(f"Saved {document_id} to the {self.cache_name} cache")
+
+    def is_current(self, document_id: str, content: str, metadata: Optional[Dict[str, Any]] = None) -> bool:
+        """Whether saving would change nothing: same content digest and metadata."""
+
+        with self._lock:
+            record = self._index.get(document_id)
+        return (
+            record is not None
+            and record.metadata == (metadata or {})
+            and record.head == content_digest(content.encode("utf-8"))
         )
-        self._cache[document_id] = entry
-        self._persist_cache()
-        logger.info(f"Saved offline draft for document {document_id}")
 
     def load_draft(self, document_id: str) -> Optional[DraftEntry]:
-        return self._cache.get(document_id)
+        with self._lock:
+            record = self._index.get(document_id)
+            if record is None:
+                self._record_lookup(hit=False)
+                return None
+            try:
+                content = self._read(record)
+            except (OSError, ValueError) as exc:
+                logger.warning(f"{document_id} in the {self.cache_name} cache is unreadable; discarding it: {exc}")
+                self.remove_draft(document_id)
+                self._record_lookup(hit=False)
+                return None
+            self._record_lookup(hit=True)
+            self._remember(document_id, content)
+            record.accessed_at = time.time()
+            self._index_dirty = True
+        return DraftEntry(
+            document_id=document_id,
+            content=content,
+            updated_at=record.updated_at,
+            metadata=record.metadata,
+        )
+
+    def read_content(self, document_id: str) -> Optional[str]:
+        """Body of ``document_id`` without counting it as an access (for indexing)."""
+
+        with self._lock:
+            record = self._index.get(document_id)
+            if record is None:
+                return None
+            try:
+                return self._read(record)
+            except (OSError, ValueError) as exc:
+                logger.warning(f"{document_id} in the {self.cache_name} cache is unreadable: {exc}")
+                return None
+
+    def open_draft(self, document_id: str) -> Optional[BlobReader]:
+        """Lazy reader over a cached body, for paging through large patents.
+
+        Bodies stored without deltas are memory-mapped and decoded block by
+        block as they are read; a body with pending deltas is rebuilt in
+        memory first. A damaged block raises ``ValueError`` when it is read.
+        Close the reader when done.
+        """
+
+        with self._lock:
+            record = self._index.get(document_id)
+            if record is None:
+                self._record_lookup(hit=False)
+                return None
+            try:
+                if record.deltas or document_id in self._recent:
+                    reader = BlobReader.from_bytes(self._read(record).encode("utf-8"))
+                else:
+                    reader = self.store.open(record.digest)
+            except (OSError, ValueError) as exc:
+                logger.warning(f"{document_id} in the {self.cache_name} cache is unreadable; discarding it: {exc}")
+                self.remove_draft(document_id)
+                self._record_lookup(hit=False)
+                return None
+            self._record_lookup(hit=True)
+            record.accessed_at = time.time()
+            self._index_dirty = True
+            return reader
+
+    def _record_lookup(self, hit: bool) -> None:
+        if self.cache_manager is None:
+            return
+        if hit:
+            self.cache_manager.record_hit(self.cache_name)
+        else:
+            self.cache_manager.record_miss(self.cache_name)
+
+    def get_record(self, document_id: str) -> Optional[DraftRecord]:
+        """Index entry for ``document_id`` without reading its body."""
+
+        with self._lock:
+            return self._index.get(document_id)
+
+    def list_records(self) -> Dict[str, DraftRecord]:
+        """All index entries; no draft bodies are read."""
+
+        with self._lock:
+            return dict(self._index)
 
     def list_drafts(self) -> Dict[str, DraftEntry]:
-        return self._cache
+        """All drafts with their content (reads every body; prefer :meth:`list_records`)."""
+
+        drafts = {}
+        for document_id in self.list_records():
+            entry = self.load_draft(document_id)
+            if entry is not None:
+                drafts[document_id] = entry
+        return drafts
 
     def remove_draft(self, document_id: str) -> None:
-        if document_id in self._cache:
-            self._cache.pop(document_id)
-            self._persist_cache()
-            logger.info(f"Removed offline draft for document {document_id}")
+        with self._lock:
+            if self._drop(document_id) is None:
+                return
+            self._persist_index()
+        self._notify(document_id, None, {})
+        logger.info(f"Removed {document_id} from the {self.cache_name} cache")
+
+    def total_bytes(self) -> int:
+        """Compressed bytes on disk, counting shared blobs once."""
+
+        return self._stored_bytes
+
+    def cache_entries(self) -> List[Tuple[str, int, float]]:
+        with self._lock:
+            # A blob shared with another draft frees nothing until its last reference goes.
+            return [
+                (document_id, sum(size for digest, size in record.blobs() if self._refs.get(digest) == 1), record.accessed_at)
+                for document_id, record in self._index.items()
+            ]
+
+    def evict(self, keys: List[str]) -> int:
+        """Drop ``keys`` for the cache manager; return the bytes freed."""
+
+        with self._lock:
+            before = self._stored_bytes
+            for document_id in keys:
+                self._drop(document_id)
+            self._persist_index()
+            freed = before - self._stored_bytes
+        for document_id in keys:
+            self._notify(document_id, None, {})
+        logger.info(f"Evicted {len(keys)} entries ({freed} bytes) from the {self.cache_name} cache")
+        return freed
 
     def clear(self) -> None:
-        self._cache = {}
-        self._persist_cache()
-        logger.info("Cleared offline draft cache")
+        with self._lock:
+            removed = list(self._index)
+            for document_id in removed:
+                self._drop(document_id)
+            self._persist_index()
+        for document_id in removed:
+            self._notify(document_id, None, {})
+        logger.info(f"Cleared the {self.cache_name} cache")
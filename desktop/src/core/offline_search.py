@@ -0,0 +1,236 @@
+"""Offline full-text search over cached patents and drafts.
+
+A SQLite FTS5 index mirrors the bodies held by :class:`OfflineDraftCache`
+instances. It is updated incrementally as entries are saved, removed or
+evicted, and :meth:`OfflineSearchIndex.reconcile` catches up with changes
+made while it was not attached (first run, crashes). Queries accept plain terms,
+``"quoted phrases"`` and ``prefix*`` terms and are ranked by BM25.
+"""
+
+from __future__ import annotations
+
+import re
+import sqlite3
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from .offline_cache import OfflineDraftCache
+
+_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS search_docs USING fts5(
+    title, body, tokenize = 'porter unicode61'
+);
+CREATE TABLE IF NOT EXISTS search_keys (
+    source TEXT NOT NULL,
+    document_id TEXT NOT NULL,
+    doc_rowid INTEGER NOT NULL,
+    head TEXT NOT NULL,
+    PRIMARY KEY (source, document_id)
+);
+CREATE INDEX IF NOT EXISTS idx_search_keys_rowid ON search_keys (doc_rowid);
+"""
+
+# A quoted phrase, or a bare term with an optional trailing ``*``.
+_QUERY_TOKEN = re.compile(r'"([^"]*)"|([^\s"]+)')
+_WORD = re.compile(r"\w+")
+
+
+def to_fts_query(query: str) -> str:
+    """Translate user input into a safe FTS5 expression (terms are ANDed).
+
+    Punctuation that FTS5 would treat as syntax is dropped, so any input
+    yields a valid expression (possibly empty).
+    """
+
+    parts = []
+    for phrase, term in _QUERY_TOKEN.findall(query):
+        if phrase:
+            words = _WORD.findall(phrase)
+            if words:
+                parts.append('"' + " ".join(words) + '"')
+            continue
+        words = _WORD.findall(term)
+        if not words:
+            continue
+        prefix = "*" if term.endswith("*") else ""
+        # "non-obvious" becomes the phrase "non obvious", matching the tokenizer.
+        parts.append('"' + " ".join(words) + '"' + prefix)
+    return " ".join(parts)
+
+
+@dataclass
+class OfflineSearchHit:
+    """One ranked match from the offline index."""
+
+    id: str
+    source: str
+    title: str
+    snippet: str
+    score: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class OfflineSearchIndex:
+    """SQLite FTS5 index kept in step with attached offline caches."""
+
+    def __init__(self, data_dir: Path, filename: str = "offline-search.sqlite3"):
+        self.path = data_dir / filename
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Caches save from the autosave writer thread; searches come from the GUI thread.
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._lock = threading.Lock()
+        self._sources: List[Tuple[OfflineDraftCache, str]] = []
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+            # Title matches weigh five times body matches in ORDER BY rank.
+            self._conn.execute("INSERT INTO search_docs (search_docs, rank) VALUES ('rank', 'bm25(5.0, 1.0)')")
+            self._conn.commit()
+
+    def attach(self, cache: OfflineDraftCache, source: str) -> None:
+        """Follow ``cache``'s changes under ``source`` from now on.
+
+        Call :meth:`reconcile` afterwards to catch up on changes made while
+        the index was not attached.
+        """
+
+        def on_change(document_id: str, content: Optional[str], metadata: Dict[str, Any]) -> None:
+            if content is None:
+                self.remove(source, document_id)
+            else:
+                record = cache.get_record(document_id)
+                self.upsert(source, document_id, content, record.head if record else "", metadata.get("title", ""))
+
+        cache.add_listener(on_change)
+        self._sources.append((cache, source))
+
+    def reconcile(self) -> int:
+        """Bring the index in line with every attached cache; return entries (re)indexed.
+
+        Only entries whose content digest differs from the indexed one are
+        read, so an up-to-date index costs one query per cache. Safe to run
+        on a background thread while the caches are in use.
+        """
+
+        indexed_total = 0
+        for cache, source in list(self._sources):
+            try:
+                with self._lock:
+                    indexed = dict(
+                        self._conn.execute("SELECT document_id, head FROM search_keys WHERE source = ?", (source,))
+                    )
+                records = cache.list_records()
+                for document_id in indexed.keys() - records.keys():
+                    self.remove(source, document_id)
+                for document_id, record in records.items():
+                    if indexed.get(document_id) == record.head:
+                        continue
+                    content = cache.read_content(document_id)
+                    if content is not None:
+                        self.upsert(source, document_id, content, record.head, record.metadata.get("title", ""))
+                        indexed_total += 1
+            except sqlite3.ProgrammingError:  # pragma: no cover - index closed during shutdown
+                return indexed_total
+        if indexed_total:
+            logger.info(f"Indexed {indexed_total} cached entries for offline search")
+        return indexed_total
+
+    def upsert(self, source: str, document_id: str, text: str, head: str = "", title: str = "") -> None:
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT doc_rowid, head FROM search_keys WHERE source = ? AND document_id = ?",
+                (source, document_id),
+            ).fetchone()
+            if row is not None:
+                if head and row[1] == head:
+                    return
+                self._conn.execute("DELETE FROM search_docs WHERE rowid = ?", (row[0],))
+            cursor = self._conn.execute("INSERT INTO search_docs (title, body) VALUES (?, ?)", (title, text))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO search_keys (source, document_id, doc_rowid, head) VALUES (?, ?, ?, ?)",
+                (source, document_id, cursor.lastrowid, head),
+            )
+
+    def remove(self, source: str, document_id: str) -> None:
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT doc_rowid FROM search_keys WHERE source = ? AND document_id = ?",
+                (source, document_id),
+            ).fetchone()
+            if row is None:
+                return
+            self._conn.execute("DELETE FROM search_docs WHERE rowid = ?", (row[0],))
+            self._conn.execute(
+                "DELETE FROM search_keys WHERE source = ? AND document_id = ?", (source, document_id)
+            )
+
+    def count(self, source: Optional[str] = None) -> int:
+        with self._lock:
+            if source is None:
+                return self._conn.execute("SELECT COUNT(*) FROM search_keys").fetchone()[0]
+            return self._conn.execute("SELECT COUNT(*) FROM search_keys WHERE source = ?", (source,)).fetchone()[0]
+
+    def count_matches(self, query: str) -> int:
+        expression = to_fts_query(query)
+        if not expression:
+            return 0
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM search_docs WHERE search_docs MATCH ?", (expression,)
+            ).fetchone()[0]
+
+    def search(
+        self,
+        query: str,
+        limit: int = 20,
+        offset: int = 0,
+        source: Optional[str] = None,
+        snippets: bool = True,
+    ) -> List[OfflineSearchHit]:
+        """Best matches first (BM25, title weighted above body).
+
+        Ranking touches only the index; each snippet re-reads its document,
+        so they are built for the requested page alone (``snippets=False``
+        skips them).
+        """
+
+        expression = to_fts_query(query)
+        if not expression:
+            return []
+        sql = "SELECT d.rowid, d.rank, k.document_id, k.source, d.title FROM search_docs d"
+        args: List[Any] = []
+        if source is not None:
+            sql += " JOIN search_keys k ON k.doc_rowid = d.rowid AND k.source = ?"
+            args.append(source)
+        else:
+            sql += " JOIN search_keys k ON k.doc_rowid = d.rowid"
+        sql += " WHERE search_docs MATCH ? ORDER BY d.rank LIMIT ? OFFSET ?"
+        args += [expression, limit, offset]
+        with self._lock:
+            rows = self._conn.execute(sql, args).fetchall()
+            excerpts: Dict[int, str] = {}
+            if snippets and rows:
+                placeholders = ",".join("?" * len(rows))
+                excerpts = dict(
+                    self._conn.execute(
+                        "SELECT rowid, snippet(search_docs, 1, '[', ']', ' … ', 12) FROM search_docs"
+                        f" WHERE search_docs MATCH ? AND rowid IN ({placeholders})",
+                        [expression, *(row[0] for row in rows)],
+                    )
+                )
+        # bm25() is lower-is-better; report higher-is-better scores.
+        return [
+            OfflineSearchHit(id=document_id, source=src, title=title, snippet=excerpts.get(rowid, ""), score=-rank)
+            for rowid, rank, document_id, src, title in rows
+        ]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,197 @@
+"""Client-side token-bucket rate limiting for backend calls.
+
+Each endpoint family ("search", "annotations", "upload", ...) has its own
+bucket that is shared by every caller of one :class:`ApiClient`, so
+background sync replay and interactive calls draw on the same budget.
+Background traffic may not take the last ``interactive_reserve`` share of
+a bucket, which keeps headroom for the user even while a large offline
+queue drains. A ``Retry-After`` from the server (429/503) pauses the whole
+family until it expires.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import TYPE_CHECKING, Dict, Iterator, Mapping, Optional
+
+from loguru import logger
+
+if TYPE_CHECKING:  # pragma: no cover - import cycle guard
+    from .config import RateLimitConfig
+
+THROTTLED_STATUS_CODES = frozenset({429, 503})
+
+# Traffic class of the current task or thread; SyncEngine workers mark theirs background.
+_background: ContextVar[bool] = ContextVar("background_traffic", default=False)
+
+
+@contextmanager
+def background_traffic() -> Iterator[None]:
+    """Mark calls made inside the block (and tasks it spawns) as background work."""
+
+    token = _background.set(True)
+    try:
+        yield
+    finally:
+        _background.reset(token)
+
+
+def is_background() -> bool:
+    return _background.get()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a ``Retry-After`` header (delta-seconds or HTTP date)."""
+
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """Sustained rate (requests/second) and burst capacity (requests); a rate of 0 or less is unlimited."""
+
+    rate: float
+    burst: float
+
+
+class TokenBucket:
+    """Thread-safe token bucket with a reserve only interactive callers may use."""
+
+    def __init__(self, limit: RateLimit, interactive_reserve: float = 0.25):
+        self.rate = limit.rate
+        self.capacity = max(1.0, limit.burst)
+        # Background callers need a whole token above the reserve, or low-rate buckets would never admit them.
+        self.reserve = min(self.capacity * min(max(interactive_reserve, 0.0), 0.9), self.capacity - 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_take(self, background: bool) -> float:
+        """Take one token and return 0, or return how long to wait before trying again."""
+
+        with self._lock:
+            now = time.monotonic()
+            if now < self._blocked_until:
+                return self._blocked_until - now
+            if self.rate <= 0:
+                return 0.0
+            self._refill(now)
+            floor = self.reserve if background else 0.0
+            if self._tokens - 1 >= floor:
+                self._tokens -= 1
+                return 0.0
+            return (floor + 1 - self._tokens) / self.rate
+
+    def block_for(self, seconds: float) -> None:
+        """Pause every caller for ``seconds`` (server asked us to back off)."""
+
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+
+class RateLimiter:
+    """Per-endpoint-family token buckets shared by sync replay and interactive calls."""
+
+    def __init__(
+        self,
+        limits: Optional[Mapping[str, RateLimit]] = None,
+        default: RateLimit = RateLimit(rate=10.0, burst=20.0),
+        interactive_reserve: float = 0.25,
+        enabled: bool = True,
+    ):
+        self.limits = dict(limits or {})
+        self.default = default
+        self.interactive_reserve = interactive_reserve
+        self.enabled = enabled
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: "RateLimitConfig") -> "RateLimiter":
+        def limit(rate: float) -> RateLimit:
+            return RateLimit(rate=rate, burst=max(1.0, rate * config.burst_seconds))
+
+        return cls(
+            limits={
+                "search": limit(config.search_per_second),
+                "analysis": limit(config.analysis_per_second),
+                "upload": limit(config.upload_per_second),
+                "annotations": limit(config.annotations_per_second),
+                "reports": limit(config.reports_per_second),
+            },
+            default=limit(config.default_per_second),
+            interactive_reserve=config.interactive_reserve,
+            enabled=config.enabled,
+        )
+
+    def bucket(self, endpoint: str) -> TokenBucket:
+        bucket = self._buckets.get(endpoint)
+        if bucket is None:
+            with self._lock:
+                bucket = self._buckets.get(endpoint)
+                if bucket is None:
+                    limit = self.limits.get(endpoint, self.default)
+                    bucket = self._buckets[endpoint] = TokenBucket(limit, self.interactive_reserve)
+        return bucket
+
+    async def acquire(self, endpoint: str) -> None:
+        """Wait (without blocking the loop) until a call to ``endpoint`` may proceed."""
+
+        if not self.enabled:
+            return
+        bucket = self.bucket(endpoint)
+        background = is_background()
+        while True:
+            wait = bucket.try_take(background)
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+    def acquire_blocking(self, endpoint: str) -> None:
+        """Thread-blocking variant of :meth:`acquire` for the synchronous client."""
+
+        if not self.enabled:
+            return
+        bucket = self.bucket(endpoint)
+        background = is_background()
+        while True:
+            wait = bucket.try_take(background)
+            if not wait:
+                return
+            time.sleep(wait)
+
+    def observe(self, endpoint: str, status: int, headers: Mapping[str, str]) -> None:
+        """Honour ``Retry-After`` on a throttling response for ``endpoint``."""
+
+        if status not in THROTTLED_STATUS_CODES:
+            return
+        delay = parse_retry_after(headers.get("Retry-After"))
+        if delay:
+            logger.info(f"Server throttled '{endpoint}' ({status}); pausing {delay:.1f}s")
+            self.bucket(endpoint).block_for(delay)
@@ -0,0 +1,246 @@
+"""Retry policy shared by the API client and the sync engine.
+
+Combines exponential backoff with full jitter, a classifier that only
+retries transient failures, a global retry budget that caps retries to a
+fraction of overall traffic, and per-endpoint circuit breakers that fail
+fast while an endpoint is known to be down. Without jitter and a budget,
+every queued task retries in lockstep during a backend outage.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+import aiohttp
+import requests
+from loguru import logger
+
+from src.utils.exceptions import CircuitOpenError
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS_CODES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+
+def error_status(exc: BaseException) -> Optional[int]:
+    """Return the HTTP status carried by ``exc``, if any."""
+
+    if isinstance(exc, aiohttp.ClientResponseError):
+        return exc.status
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        return exc.response.status_code
+    return None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Classify an exception as transient (worth retrying) or permanent."""
+
+    if isinstance(exc, CircuitOpenError):
+        return False
+    status = error_status(exc)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES
+    return isinstance(
+        exc,
+        (
+            aiohttp.ClientConnectionError,
+            aiohttp.ClientPayloadError,
+            asyncio.TimeoutError,
+            requests.ConnectionError,
+            requests.Timeout,
+            ConnectionError,
+        ),
+    )
+
+
+class RetryBudget:
+    """Token bucket limiting retries to a fraction of first attempts.
+
+    Every call deposits ``ratio`` tokens (up to ``capacity``); every retry
+    withdraws one. Under a sustained outage retries therefore settle at
+    ``ratio`` times the request rate instead of multiplying it.
+    """
+
+    def __init__(self, ratio: float = 0.2, capacity: float = 10.0):
+        self.ratio = ratio
+        self.capacity = capacity
+        self._tokens = capacity
+        self._lock = threading.Lock()
+
+    @property
+    def tokens(self) -> float:
+        return self._tokens
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + self.ratio)
+
+    def try_withdraw(self) -> bool:
+        with self._lock:
+            if self._tokens < 1.0:
+                return False
+            self._tokens -= 1.0
+            return True
+
+
+class CircuitState(Enum):
+    """Circuit breaker states"""
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Per-endpoint breaker: opens after consecutive failures, probes after a cool-down."""
+
+    def __init__(self, endpoint: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.endpoint = endpoint
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def retry_after(self) -> float:
+        """Seconds until the breaker will admit a probe (0 when closed)."""
+
+        if self.state is CircuitState.CLOSED:
+            return 0.0
+        return max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+
+    def before_call(self) -> None:
+        """Admit a call or raise :class:`CircuitOpenError`."""
+
+        with self._lock:
+            if self.state is CircuitState.CLOSED:
+                return
+            if self.state is CircuitState.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = CircuitState.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state is CircuitState.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            raise CircuitOpenError(self.endpoint, self.retry_after())
+
+    def release_probe(self) -> None:
+        """Give back an admitted call that ended without an outcome, e.g. because it was cancelled."""
+
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state is not CircuitState.CLOSED:
+                logger.info(f"Circuit for {self.endpoint} closed")
+            self.state = CircuitState.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self.state is CircuitState.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state is not CircuitState.OPEN:
+                    logger.warning(f"Circuit for {self.endpoint} opened after {self._failures} failures")
+                self.state = CircuitState.OPEN
+                self._opened_at = time.monotonic()
+
+
+@dataclass
+class RetryPolicy:
+    """Retry behaviour for calls to backend endpoints."""
+
+    max_attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 30.0
+    failure_threshold: int = 5
+    reset_timeout: float = 30.0
+    budget: RetryBudget = field(default_factory=RetryBudget)
+    classifier: Callable[[BaseException], bool] = is_retryable
+    _breakers: Dict[str, CircuitBreaker] = field(default_factory=dict, repr=False)
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter delay before retry number ``attempt`` (1-based)."""
+
+        ceiling = min(self.max_delay, self.base_delay * (2 ** max(0, attempt - 1)))
+        return random.uniform(0, ceiling)
+
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        breaker = self._breakers.get(endpoint)
+        if breaker is None:
+            breaker = self._breakers.setdefault(
+                endpoint, CircuitBreaker(endpoint, self.failure_threshold, self.reset_timeout)
+            )
+        return breaker
+
+    def _on_failure(self, endpoint: str, breaker: CircuitBreaker, exc: Exception, attempt: int) -> bool:
+        """Record a failed attempt; return True when another attempt should follow."""
+
+        retryable = self.classifier(exc)
+        if retryable:
+            breaker.record_failure()
+        else:
+            # The endpoint answered; the request itself was bad.
+            breaker.record_success()
+        if not retryable or attempt >= self.max_attempts or breaker.state is CircuitState.OPEN:
+            return False
+        if not self.budget.try_withdraw():
+            logger.warning(f"Retry budget exhausted; not retrying {endpoint}: {exc}")
+            return False
+        logger.warning(f"{endpoint} attempt {attempt} failed: {exc}")
+        return True
+
+    async def run(self, endpoint: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """Await ``fn`` under this policy, retrying transient failures."""
+
+        breaker = self.breaker(endpoint)
+        self.budget.deposit()
+        attempt = 0
+        while True:
+            attempt += 1
+            breaker.before_call()
+            try:
+                result = await fn()
+            except Exception as exc:
+                if not self._on_failure(endpoint, breaker, exc, attempt):
+                    raise
+                await asyncio.sleep(self.backoff(attempt))
+                continue
+            except BaseException:
+                # Cancelled mid-call: say nothing about the endpoint, but free the half-open probe slot.
+                breaker.release_probe()
+                raise
+            breaker.record_success()
+            return result
+
+    def call(self, endpoint: str, fn: Callable[[], T]) -> T:
+        """Blocking counterpart of :meth:`run` for synchronous requests."""
+
+        breaker = self.breaker(endpoint)
+        self.budget.deposit()
+        attempt = 0
+        while True:
+            attempt += 1
+            breaker.before_call()
+            try:
+                result = fn()
+            except Exception as exc:
+                if not self._on_failure(endpoint, breaker, exc, attempt):
+                    raise
+                time.sleep(self.backoff(attempt))
+                continue
+            except BaseException:
+                # Cancelled mid-call: say nothing about the endpoint, but free the half-open probe slot.
+                breaker.release_probe()
+                raise
+            breaker.record_success()
+            return result
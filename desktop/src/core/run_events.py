@@ -0,0 +1,209 @@
+"""Server-sent event stream for analysis-run progress.
+
+Subscribes to ``/api/analysis-runs/{id}/events`` instead of polling for the
+report. The stream is parsed incrementally as bytes arrive, reconnects with
+``Last-Event-ID`` when the connection drops, and surfaces progress and
+completion to the UI through Qt signals. The ``COMPLETED`` event already
+carries the run's ``outputs``, ``steps`` and ``completedAt``, so completion
+needs no further request.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional
+
+import aiohttp
+from loguru import logger
+from PyQt6.QtCore import QObject, pyqtSignal
+
+if TYPE_CHECKING:  # pragma: no cover - import cycle guard
+    from .api_client import ApiClient
+
+TERMINAL_STATUSES = {"COMPLETED", "FAILED", "error"}
+
+
+@dataclass
+class ServerSentEvent:
+    """A single dispatched event from a ``text/event-stream`` response."""
+
+    data: str
+    event: str = "message"
+    id: Optional[str] = None
+
+    def json(self) -> Dict[str, Any]:
+        return json.loads(self.data)
+
+
+class SSEParser:
+    """Incremental parser for the ``text/event-stream`` wire format.
+
+    Bytes may be fed in arbitrarily sized pieces; complete events are
+    returned as soon as their terminating blank line has been seen.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._data: List[str] = []
+        self._event = ""
+        # The last line ended in "\r"; a "\n" starting the next chunk belongs to it.
+        self._after_cr = False
+        self.last_event_id: Optional[str] = None
+        self.retry_ms: Optional[int] = None
+
+    def feed(self, chunk: bytes) -> List[ServerSentEvent]:
+        self._buffer.extend(chunk)
+        events: List[ServerSentEvent] = []
+        start = 0
+        if self._after_cr and self._buffer:
+            start = 1 if self._buffer[0] == 0x0A else 0
+            self._after_cr = False
+        while True:
+            lf = self._buffer.find(b"\n", start)
+            cr = self._buffer.find(b"\r", start)
+            if cr != -1 and (lf == -1 or cr < lf):
+                end = cr
+                if cr + 1 == len(self._buffer):
+                    next_start, self._after_cr = cr + 1, True
+                else:
+                    next_start = cr + (2 if self._buffer[cr + 1] == 0x0A else 1)
+            elif lf != -1:
+                end, next_start = lf, lf + 1
+            else:
+                break
+            event = self._process_line(self._buffer[start:end].decode("utf-8", errors="replace"))
+            if event is not None:
+                events.append(event)
+            start = next_start
+        del self._buffer[:start]
+        return events
+
+    def _process_line(self, line: str) -> Optional[ServerSentEvent]:
+        if not line:
+            return self._dispatch()
+        if line.startswith(":"):
+            return None  # Comment / keep-alive.
+
+        name, _, value = line.partition(":")
+        if value.startswith(" "):
+            value = value[1:]
+        if name == "data":
+            self._data.append(value)
+        elif name == "event":
+            self._event = value
+        elif name == "id" and "\0" not in value:
+            self.last_event_id = value
+        elif name == "retry" and value.isdigit():
+            self.retry_ms = int(value)
+        return None
+
+    def _dispatch(self) -> Optional[ServerSentEvent]:
+        if not self._data:
+            self._event = ""
+            return None
+        event = ServerSentEvent(
+            data="\n".join(self._data),
+            event=self._event or "message",
+            id=self.last_event_id,
+        )
+        self._data = []
+        self._event = ""
+        return event
+
+
+class AnalysisRunEventStream:
+    """Async iterator over the progress events of one analysis run."""
+
+    def __init__(
+        self,
+        api_client: "ApiClient",
+        run_id: str,
+        idle_timeout: float = 60.0,
+        reconnect_delay: float = 3.0,
+        max_reconnects: int = 5,
+    ):
+        self.api_client = api_client
+        self.run_id = run_id
+        self.idle_timeout = idle_timeout
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnects = max_reconnects
+
+    def _url(self) -> str:
+        return f"{self.api_client.api_config.analysis_runs_base_url}/{self.run_id}/events"
+
+    async def events(self) -> AsyncIterator[Dict[str, Any]]:
+        """Yield decoded event payloads until the run reaches a terminal status."""
+
+        parser = SSEParser()
+        failures = 0
+        url = self._url()
+        timeout = aiohttp.ClientTimeout(total=None, sock_read=self.idle_timeout)
+        while True:
+            headers = {"Accept": "text/event-stream", "Cache-Control": "no-cache"}
+            if parser.last_event_id:
+                headers["Last-Event-ID"] = parser.last_event_id
+            session = await self.api_client._get_aiohttp_session()
+            self.api_client._log_request("GET", url)
+            try:
+                async with session.get(url, headers=headers, timeout=timeout) as resp:
+                    resp.raise_for_status()
+                    async for chunk in resp.content.iter_any():
+                        for event in parser.feed(chunk):
+                            failures = 0
+                            try:
+                                payload = event.json()
+                            except ValueError:
+                                logger.warning(f"Ignoring malformed run event: {event.data[:200]}")
+                                continue
+                            yield payload
+                            if payload.get("status") in TERMINAL_STATUSES:
+                                return
+                reason = "stream closed before completion"
+            except aiohttp.ClientResponseError as exc:
+                if 400 <= exc.status < 500:
+                    raise
+                reason = str(exc)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+                reason = str(exc) or type(exc).__name__
+
+            failures += 1
+            if failures > self.max_reconnects:
+                raise ConnectionError(f"Event stream for run {self.run_id} lost: {reason}")
+            delay = parser.retry_ms / 1000.0 if parser.retry_ms is not None else self.reconnect_delay
+            logger.warning(f"Run {self.run_id} event stream interrupted ({reason}); reconnecting in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+
+class AnalysisRunMonitor(QObject):
+    """Bridges analysis-run events to Qt signals for the UI."""
+
+    progress = pyqtSignal(str, object)  # run_id, event payload
+    completed = pyqtSignal(str, object)  # run_id, final event (outputs, steps, completedAt)
+    failed = pyqtSignal(str, str)  # run_id, message
+
+    def __init__(self, api_client: "ApiClient", parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.api_client = api_client
+
+    async def watch(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """Follow a run to completion and return its final event (``None`` on failure)."""
+
+        try:
+            async for event in AnalysisRunEventStream(self.api_client, run_id).events():
+                status = event.get("status")
+                if status == "COMPLETED":
+                    self.completed.emit(run_id, event)
+                    return event
+                if status in TERMINAL_STATUSES:
+                    self.failed.emit(run_id, event.get("message") or f"Analysis run {run_id} failed")
+                    return None
+                self.progress.emit(run_id, event)
+        except Exception as exc:
+            logger.error(f"Watching analysis run {run_id} failed: {exc}")
+            self.failed.emit(run_id, str(exc))
+            return None
+
+        self.failed.emit(run_id, f"Event stream for run {run_id} ended without a result")
+        return None
@@ -0,0 +1,279 @@
+"""Paginated, streaming search results.
+
+``SearchPager`` walks the platform search API page by page and yields each
+page as soon as it is parsed, while the next page is already being fetched
+in the background. Large response bodies are decoded incrementally as
+bytes arrive, so the raw body and the parsed page never have to sit in
+memory together.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import codecs
+import json
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+if TYPE_CHECKING:  # pragma: no cover - import cycle guard
+    from .api_client import ApiClient
+
+MAX_PAGE_SIZE = 50
+MAX_PAGE = 50  # The search API rejects later pages (src/app/api/search/route.ts)
+INCREMENTAL_PARSE_THRESHOLD = 256 * 1024
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+_NUMBER_END = _WHITESPACE + ",]}"
+
+
+@dataclass
+class SearchPage:
+    """One page of search results plus the response metadata."""
+
+    page: int
+    page_size: int
+    total: int
+    results: List[Dict[str, Any]]
+    meta: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def has_more(self) -> bool:
+        return bool(self.results) and self.page < MAX_PAGE and self.page * self.page_size < self.total
+
+    @staticmethod
+    def from_response(body: Dict[str, Any], page: int, page_size: int) -> "SearchPage":
+        results = body.pop("results", []) or []
+        return SearchPage(
+            page=int(body.pop("page", page)),
+            page_size=int(body.pop("pageSize", page_size)),
+            total=int(body.pop("total", len(results))),
+            results=results,
+            meta=body,
+        )
+
+
+class JsonObjectStream:
+    """Incremental decoder for a top-level JSON object with one large array member.
+
+    Members are decoded one at a time with ``JSONDecoder.raw_decode`` as data
+    arrives; elements of ``array_key`` are emitted individually rather than
+    materialising the whole array text first.
+    """
+
+    def __init__(self, array_key: str = "results"):
+        self.array_key = array_key
+        self.members: Dict[str, Any] = {}
+        self._buffer = ""
+        self._pos = 0
+        self._state = "start"  # start -> key -> value -> (array) -> next -> done
+        self._key: Optional[str] = None
+
+    def _skip_ws(self) -> None:
+        while self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE:
+            self._pos += 1
+
+    def _decode(self, final: bool) -> Tuple[bool, Any]:
+        """Decode one value at the cursor; ``(False, None)`` if more data is needed."""
+
+        try:
+            value, end = _decoder.raw_decode(self._buffer, self._pos)
+        except json.JSONDecodeError:
+            if final:
+                raise
+            return False, None
+        if not final:
+            if end == len(self._buffer):
+                return False, None  # A number may continue in the next chunk.
+            if isinstance(value, (int, float)) and self._buffer[end] not in _NUMBER_END:
+                return False, None  # e.g. "1.5e" decoded as 1.5 before its exponent arrived.
+        self._pos = end
+        return True, value
+
+    def _expect(self, char: str) -> bool:
+        self._skip_ws()
+        if self._pos >= len(self._buffer):
+            return False
+        if self._buffer[self._pos] != char:
+            raise json.JSONDecodeError(f"Expected {char!r}", self._buffer, self._pos)
+        self._pos += 1
+        return True
+
+    def feed(self, text: str, final: bool = False) -> List[Any]:
+        """Consume ``text`` and return any complete ``array_key`` elements."""
+
+        self._buffer = self._buffer[self._pos:] + text
+        self._pos = 0
+        items: List[Any] = []
+        while True:
+            if self._state == "start":
+                if not self._expect("{"):
+                    break
+                self._state = "key"
+            elif self._state == "key":
+                self._skip_ws()
+                if self._buffer.startswith("}", self._pos):
+                    self._pos += 1
+                    self._state = "done"
+                    continue
+                checkpoint = self._pos
+                ok, key = self._decode(final)
+                if not ok:
+                    break
+                if not self._expect(":"):
+                    self._pos = checkpoint
+                    break
+                self._key = key
+                self._state = "value"
+            elif self._state == "value":
+                self._skip_ws()
+                if self._key == self.array_key and self._buffer.startswith("[", self._pos):
+                    self._pos += 1
+                    self._state = "array_first"
+                    continue
+                ok, value = self._decode(final)
+                if not ok:
+                    break
+                self.members[self._key] = value
+                self._state = "next"
+            elif self._state in ("array_first", "array"):
+                self._skip_ws()
+                if self._buffer.startswith("]", self._pos):
+                    self._pos += 1
+                    self._state = "next"
+                    continue
+                checkpoint = self._pos
+                if self._state == "array":
+                    if not self._expect(","):
+                        break
+                    self._skip_ws()
+                ok, value = self._decode(final)
+                if not ok:
+                    self._pos = checkpoint
+                    break
+                items.append(value)
+                self._state = "array"
+            elif self._state == "next":
+                self._skip_ws()
+                if self._pos >= len(self._buffer):
+                    break
+                char = self._buffer[self._pos]
+                self._pos += 1
+                if char == "}":
+                    self._state = "done"
+                elif char == ",":
+                    self._state = "key"
+                else:
+                    raise json.JSONDecodeError("Expected ',' or '}'", self._buffer, self._pos - 1)
+            else:  # done
+                break
+        if final and self._state != "done":
+            raise json.JSONDecodeError("Truncated JSON object", self._buffer, self._pos)
+        return items
+
+
+class SearchPager:
+    """Async iterator over search result pages with one-page background prefetch.
+
+    Iteration stops after page :data:`MAX_PAGE`, the last page the search
+    API serves, even when ``total`` reports more results.
+    """
+
+    def __init__(
+        self,
+        api_client: "ApiClient",
+        query: str,
+        params: Optional[Dict[str, Any]] = None,
+        page_size: int = MAX_PAGE_SIZE,
+        start_page: int = 1,
+        max_pages: Optional[int] = None,
+        prefetch: bool = True,
+    ):
+        self.api_client = api_client
+        self.query = query
+        self.params = dict(params or {})
+        self.page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+        self.start_page = start_page
+        self.max_pages = max_pages
+        self.prefetch = prefetch
+
+    def __aiter__(self) -> AsyncIterator[SearchPage]:
+        return self._pages()
+
+    async def _pages(self) -> AsyncIterator[SearchPage]:
+        page_number = self.start_page
+        pending: Optional[asyncio.Task] = None
+        fetched = 0
+        if page_number > MAX_PAGE:
+            return
+        try:
+            current = await self.fetch_page(page_number)
+            while True:
+                fetched += 1
+                more = current.has_more and (self.max_pages is None or fetched < self.max_pages)
+                if more and self.prefetch:
+                    pending = asyncio.ensure_future(self.fetch_page(page_number + 1))
+                yield current
+                if not more:
+                    return
+                page_number += 1
+                if pending is not None:
+                    current, pending = await pending, None
+                else:
+                    current = await self.fetch_page(page_number)
+        finally:
+            if pending is not None and not pending.done():
+                pending.cancel()
+
+    async def fetch_page(self, page: int) -> SearchPage:
+        """Fetch and parse a single page under the client's retry policy.
+
+        Served from the client's offline index when the backend is
+        unreachable or the search circuit is open, as for ``ApiClient.search``.
+        """
+
+        client = self.api_client
+        if client._search_offline():
+            return self._offline_page(page)
+        try:
+            return await self._fetch_remote(page)
+        except Exception as exc:
+            if not client._search_offline(exc):
+                raise
+            logger.info(f"Search backend unavailable ({exc}); paging the offline index")
+            return self._offline_page(page)
+
+    def _offline_page(self, page: int) -> SearchPage:
+        params = {**self.params, "page": page, "pageSize": self.page_size}
+        return SearchPage.from_response(self.api_client.offline_search(self.query, params), page, self.page_size)
+
+    async def _fetch_remote(self, page: int) -> SearchPage:
+        url = f"{self.api_client.api_config.search_base_url}"
+        payload = {**self.params, "query": self.query, "page": page, "pageSize": self.page_size}
+        session = await self.api_client._get_aiohttp_session()
+
+        async def attempt() -> SearchPage:
+            await self.api_client.rate_limiter.acquire("search")
+            self.api_client._log_request("POST", url)
+            async with session.post(url, json=payload, timeout=30) as resp:
+                self.api_client.rate_limiter.observe("search", resp.status, resp.headers)
+                resp.raise_for_status()
+                if resp.content_length is not None and resp.content_length < INCREMENTAL_PARSE_THRESHOLD:
+                    return SearchPage.from_response(await resp.json(), page, self.page_size)
+                return await self._parse_incrementally(resp, page)
+
+        return await self.api_client.retry_policy.run("search", attempt)
+
+    async def _parse_incrementally(self, resp, page: int) -> SearchPage:
+        stream = JsonObjectStream("results")
+        results: List[Dict[str, Any]] = []
+        charset = resp.charset or "utf-8"
+        decoder = codecs.getincrementaldecoder(charset)()
+        async for chunk in resp.content.iter_chunked(64 * 1024):
+            results.extend(stream.feed(decoder.decode(chunk)))
+        results.extend(stream.feed(decoder.decode(b"", final=True), final=True))
+        body = stream.members
+        body["results"] = results
+        return SearchPage.from_response(body, page, self.page_size)
@@ -0,0 +1,108 @@
+"""Single-flight coalescing of identical in-flight requests.
+
+When several UI components ask for the same report or search at the same
+time, only the first caller (the leader) performs the network call; the
+others wait for its outcome and receive the same parsed result or
+exception. Results are shared objects and must be treated as read-only.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+def request_key(method: str, url: str, body: Optional[Any] = None) -> str:
+    """Key identifying a request by method, URL and a hash of its body."""
+
+    body_hash = ""
+    if body is not None:
+        encoded = json.dumps(body, sort_keys=True, separators=(",", ":"), default=str)
+        body_hash = hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+    return f"{method.upper()} {url} {body_hash}"
+
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class _AsyncCall:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Future):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls sharing a key, for threads and coroutines."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._tasks: Dict[str, _AsyncCall] = {}
+
+    def in_flight(self) -> int:
+        return len(self._calls) + len(self._tasks)
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        """Run ``fn`` unless an identical call is in flight; then share its outcome."""
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    async def do_async(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """Coroutine counterpart of :meth:`do` (single event loop).
+
+        The shared call runs as its own task, so a caller that is cancelled
+        leaves it running for the others; it is cancelled only once every
+        caller waiting on it has gone away.
+        """
+
+        call = self._tasks.get(key)
+        if call is None:
+            call = self._tasks[key] = _AsyncCall(asyncio.ensure_future(fn()))
+            call.task.add_done_callback(lambda _task: self._forget(key, call))
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if not call.waiters and not call.task.done():
+                # Forget it now: a caller arriving before the cancellation lands must not inherit it.
+                self._forget(key, call)
+                call.task.cancel()
+
+    def _forget(self, key: str, call: "_AsyncCall") -> None:
+        if self._tasks.get(key) is call:
+            del self._tasks[key]
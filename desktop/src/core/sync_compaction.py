@@ -0,0 +1,84 @@
+"""Compaction of superseded tasks in the offline sync queue.
+
+Ten offline edits to one annotation should replay as one request, not
+ten. Tasks of the same kind that share a :attr:`SyncTask.compaction_key`
+are collapsed to the freshest payload; the merged task keeps the oldest
+``updated_at`` so queue age and replay latency count from the first edit.
+Tasks currently being replayed are never touched.
+"""
+
+from __future__ import annotations
+
+from dataclasses import replace
+from datetime import datetime
+from typing import Callable, Dict, List, Set
+
+from loguru import logger
+
+from .sync_queue import SyncTask
+
+# Newer-than check; SyncEngine passes its ``_resolve_conflict``.
+Freshness = Callable[[SyncTask, datetime], bool]
+
+
+def merge_tasks(older: SyncTask, newer: SyncTask, is_fresher: Freshness) -> SyncTask:
+    """Collapse two tasks of one kind for the same entity into one carrying ``newer``'s identity."""
+
+    # Ties go to the later enqueue (coarse clocks can stamp two edits identically).
+    winner = older if is_fresher(older, newer.updated_at) else newer
+    return replace(
+        newer,
+        payload=dict(winner.payload),
+        updated_at=min(older.updated_at, newer.updated_at),
+        attempts=0,
+        next_attempt_at=0.0,
+        last_error=None,
+    )
+
+
+def compact_on_enqueue(queue, task: SyncTask, in_flight: Set[str], is_fresher: Freshness) -> SyncTask:
+    """Fold pending tasks superseded by ``task`` into it and drop them from ``queue``."""
+
+    key = task.compaction_key
+    if not key:
+        return task
+    superseded = [
+        existing
+        for existing in queue.with_compaction_key(key)
+        if existing.task_id not in in_flight and existing.task_id != task.task_id and existing.kind == task.kind
+    ]
+    if not superseded:
+        return task
+    # Fold oldest first so each step compares against the next newer task.
+    merged = superseded[0]
+    for newer in superseded[1:] + [task]:
+        merged = merge_tasks(merged, newer, is_fresher)
+    for existing in superseded:
+        queue.remove(existing.task_id)
+    logger.debug(f"Compacted queued work for {key} into task {merged.task_id}")
+    return merged
+
+
+def compact_queue(queue, in_flight: Set[str], is_fresher: Freshness) -> int:
+    """Collapse every group of superseded tasks; return how many tasks were removed."""
+
+    groups: Dict[str, List[SyncTask]] = {}
+    for task in queue.tasks:
+        key = task.compaction_key
+        if key and task.task_id not in in_flight:
+            groups.setdefault(key, []).append(task)
+
+    removed = 0
+    for tasks in groups.values():
+        if len(tasks) < 2:
+            continue
+        merged = tasks[0]
+        for task in tasks[1:]:
+            merged = merge_tasks(merged, task, is_fresher)
+        for task in tasks[:-1]:
+            queue.remove(task.task_id)
+            removed += 1
+        queue.enqueue(merged)
+    if removed:
+        logger.info(f"Compacted sync queue: {removed} superseded tasks removed")
+    return removed
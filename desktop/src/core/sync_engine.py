@@ -1,105 +1,51 @@
 """Background sync engine for offline annotations and uploads.
 
-The engine persists a small JSON queue on disk and replays it when
-connectivity resumes. Conflict resolution prefers the most recently
-updated payload by comparing timestamps embedded in each task.
+The engine persists queued work in an append-only journal on disk and
+replays it when connectivity resumes. Workers are event driven: they
+sleep until work is enqueued or a reachability prober reports the backend
+is back, and stay idle while it is offline. A failed task is rescheduled
+with exponential backoff through its own ``next_attempt_at`` so it never
+blocks unrelated work, and tasks that cannot succeed are dead-lettered
+for inspection and replay. Live backlog and throughput figures are kept
+in :class:`SyncMetrics`. Every attempt carries the task's idempotency key,
+and acknowledged keys are remembered so completed work is never resent.
+Conflict resolution prefers the most recently updated payload by
+comparing timestamps embedded in each task.
 """
 
 from __future__ import annotations
 
 import asyncio
-import json
-import uuid
-from dataclasses import asdict, dataclass
+import random
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Set
 
 from loguru import logger
 
-from .api_client import ApiClient, resilient_async
-from .offline_cache import OfflineDraftCache
-
-
-@dataclass
-class SyncTask:
-    """Represents a queued offline operation."""
-
-    task_id: str
-    kind: str
-    payload: Dict[str, Any]
-    updated_at: datetime
-    attempts: int = 0
-
-    @classmethod
-    def create(cls, kind: str, payload: Dict[str, Any]) -> "SyncTask":
-        return cls(
-            task_id=str(uuid.uuid4()),
-            kind=kind,
-            payload=payload,
-            updated_at=datetime.utcnow(),
-        )
-
-    def to_dict(self) -> Dict[str, Any]:
-        raw = asdict(self)
-        raw["updated_at"] = self.updated_at.isoformat()
-        return raw
-
-    @staticmethod
-    def from_dict(data: Dict[str, Any]) -> "SyncTask":
-        return SyncTask(
-            task_id=data["task_id"],
-            kind=data["kind"],
-            payload=data["payload"],
-            updated_at=datetime.fromisoformat(data["updated_at"]),
-            attempts=data.get("attempts", 0),
-        )
-
-
-class SyncQueue:
-    """Simple JSON-backed queue for offline work."""
+from src.utils.exceptions import CircuitOpenError
 
-    def __init__(self, data_dir: Path, filename: str = "sync-queue.json"):
-        self.path = data_dir / filename
-        self.tasks: List[SyncTask] = []
-        self.path.parent.mkdir(parents=True, exist_ok=True)
-        self._load()
+from .api_client import ApiClient
+from .chunked_upload import ChunkedUploader, UploadProgressStore, encode_payload
+from .connectivity import ReachabilityProber
+from .idempotency import AcknowledgedKeys
+from .rate_limit import background_traffic
+from .offline_cache import OfflineDraftCache
+from .sync_compaction import compact_on_enqueue, compact_queue
+from .sync_metrics import SyncMetrics, SyncMetricsSnapshot
+from .sync_queue import SyncQueue, SyncTask
+from .sync_store import SqliteSyncQueue
 
-    def _load(self) -> None:
-        if not self.path.exists():
-            self.tasks = []
-            return
-        try:
-            with open(self.path, "r", encoding="utf-8") as f:
-                raw_tasks = json.load(f)
-                self.tasks = [SyncTask.from_dict(task) for task in raw_tasks]
-        except Exception as exc:  # pragma: no cover - defensive
-            logger.warning(f"Failed to load sync queue: {exc}")
-            self.tasks = []
-
-    def _persist(self) -> None:
-        serializable = [task.to_dict() for task in self.tasks]
-        with open(self.path, "w", encoding="utf-8") as f:
-            json.dump(serializable, f, indent=2)
-
-    def enqueue(self, task: SyncTask) -> None:
-        self.tasks.append(task)
-        self._persist()
-        logger.info(f"Enqueued offline task {task.kind} ({task.task_id})")
-
-    def pop(self) -> Optional[SyncTask]:
-        if not self.tasks:
-            return None
-        task = self.tasks.pop(0)
-        self._persist()
-        return task
 
-    def peek(self) -> Optional[SyncTask]:
-        return self.tasks[0] if self.tasks else None
+def create_sync_queue(data_dir: Path, backend: str = "journal"):
+    """Build the queue storage selected by ``SyncConfig.queue_backend``."""
 
-    def remove(self, task_id: str) -> None:
-        self.tasks = [task for task in self.tasks if task.task_id != task_id]
-        self._persist()
+    if backend == "sqlite":
+        return SqliteSyncQueue(data_dir)
+    if backend != "journal":
+        logger.warning(f"Unknown sync queue backend '{backend}'; using journal")
+    return SyncQueue(data_dir)
 
 
 class SyncEngine:
@@ -111,80 +57,223 @@ class SyncEngine:
         api_client: ApiClient,
         offline_cache: OfflineDraftCache,
         poll_interval: float = 5.0,
+        queue_backend: str = "journal",
+        concurrency: int = 4,
+        prober: Optional[ReachabilityProber] = None,
+        max_attempts: int = 5,
+        retry_base_delay: float = 2.0,
+        retry_max_delay: float = 600.0,
     ):
-        self.queue = SyncQueue(data_dir)
+        self.queue = create_sync_queue(data_dir, queue_backend)
         self.api_client = api_client
         self.offline_cache = offline_cache
+        self.metrics = SyncMetrics()
+        self.acked_keys = AcknowledgedKeys(data_dir)
+        self.uploader = ChunkedUploader(
+            api_client, UploadProgressStore(data_dir), on_bytes_sent=self.metrics.record_bytes
+        )
         self.poll_interval = poll_interval
-        self._task: Optional[asyncio.Task] = None
+        self.concurrency = max(1, concurrency)
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self._workers: List[asyncio.Task] = []
+        self._busy_keys: Set[str] = set()
+        self._in_flight: Set[str] = set()
         self._running = False
+        # Set whenever idle workers may have something to do: new work, a freed
+        # ordering key, connectivity restored, or shutdown.
+        self._wakeup = asyncio.Event()
+        self.prober = prober or ReachabilityProber(api_client.api_config.annotation_base_url)
+        self.prober.add_listener(self._on_connectivity_change)
 
-    def queue_annotation(self, annotation: Dict[str, Any]) -> SyncTask:
-        task = SyncTask.create("annotation", annotation)
+    def _notify(self) -> None:
+        self._wakeup.set()
+
+    def _on_connectivity_change(self, online: bool) -> None:
+        if online:
+            self._notify()
+
+    def _enqueue(self, task: SyncTask) -> SyncTask:
+        task = compact_on_enqueue(self.queue, task, self._in_flight, self._resolve_conflict)
         self.queue.enqueue(task)
+        self._notify()
         return task
 
+    def queue_annotation(self, annotation: Dict[str, Any]) -> SyncTask:
+        return self._enqueue(SyncTask.create("annotation", annotation))
+
     def queue_upload(self, payload: Dict[str, Any]) -> SyncTask:
-        task = SyncTask.create("upload", payload)
-        self.queue.enqueue(task)
-        return task
+        return self._enqueue(SyncTask.create("upload", payload))
 
     def queue_analysis_trigger(self, payload: Dict[str, Any]) -> SyncTask:
-        task = SyncTask.create("analysis", payload)
-        self.queue.enqueue(task)
+        return self._enqueue(SyncTask.create("analysis", payload))
+
+    def dead_letters(self) -> List[SyncTask]:
+        """Tasks that were rejected or exhausted their retries."""
+
+        return self.queue.dead_letters()
+
+    def replay_dead_letter(self, task_id: str) -> Optional[SyncTask]:
+        """Put a dead-lettered task back on the queue with a fresh retry budget."""
+
+        task = self.queue.replay_dead_letter(task_id)
+        if task is not None:
+            self._notify()
         return task
 
+    def purge_dead_letter(self, task_id: str) -> None:
+        self.queue.purge_dead_letter(task_id)
+
+    def metrics_snapshot(self) -> SyncMetricsSnapshot:
+        """Current queue depth, latency and throughput figures."""
+
+        oldest = self.queue.peek()
+        p50 = self.metrics.latency.quantile(0.5)
+        p95 = self.metrics.latency.quantile(0.95)
+        successes, failures = self.metrics.rates_per_minute()
+        return SyncMetricsSnapshot(
+            queue_depth=self.queue.count_by_kind(),
+            oldest_task_age_seconds=(
+                (datetime.utcnow() - oldest.updated_at).total_seconds() if oldest is not None else None
+            ),
+            latency_p50_seconds=p50,
+            latency_p95_seconds=p95,
+            latency_buckets=self.metrics.latency.buckets(),
+            succeeded=self.metrics.succeeded,
+            failed=self.metrics.failed,
+            dead_lettered=self.metrics.dead_lettered,
+            successes_per_minute=successes,
+            failures_per_minute=failures,
+            bytes_transferred=self.metrics.bytes_transferred,
+            online=self.prober.online,
+            in_flight=len(self._in_flight),
+            dead_letters=self.queue.dead_letter_count(),
+        )
+
+    def _retry_delay(self, attempts: int) -> float:
+        """Equal-jitter exponential delay before a task's next attempt."""
+
+        ceiling = min(self.retry_max_delay, self.retry_base_delay * (2 ** max(0, attempts - 1)))
+        return random.uniform(ceiling / 2, ceiling)
+
     def _resolve_conflict(self, local: SyncTask, remote_updated_at: datetime) -> bool:
         """Return True if local task should be replayed based on freshness."""
 
         return local.updated_at > remote_updated_at
 
     async def _process_task(self, task: SyncTask) -> None:
+        # Request-level retries, jitter and circuit breaking happen in the shared RetryPolicy.
+        key = task.idempotency_key
         if task.kind == "annotation":
-            await resilient_async(lambda: self.api_client.async_annotation_sync(task.payload))
+            await self.api_client.async_annotation_sync(task.payload, idempotency_key=key)
+            self.metrics.record_bytes(len(encode_payload(task.payload)))
         elif task.kind == "upload":
-            await resilient_async(lambda: self.api_client.async_upload(task.payload))
+            await self.uploader.upload(task.payload, idempotency_key=key)  # Reports bytes per acknowledged chunk.
         elif task.kind == "analysis":
-            await resilient_async(lambda: self.api_client.async_upload(task.payload))
+            await self.api_client.async_upload(task.payload, idempotency_key=key)
+            self.metrics.record_bytes(len(encode_payload(task.payload)))
         else:  # pragma: no cover - defensive
             logger.warning(f"Unknown sync task kind: {task.kind}")
             return
         logger.info(f"Synced task {task.task_id} ({task.kind})")
 
     async def _worker(self) -> None:
-        self._running = True
+        # Replay draws on the client's shared rate limit but leaves the interactive reserve alone.
+        with background_traffic():
+            await self._work()
+
+    async def _work(self) -> None:
         while self._running:
-            next_task = self.queue.peek()
+            # Claiming and marking the key busy happen without an await in between,
+            # so two workers never run tasks with the same ordering key.
+            next_task = self.queue.claim_next(self._busy_keys) if self.prober.online else None
             if not next_task:
-                await asyncio.sleep(self.poll_interval)
+                # Nothing can run until an enqueue, a finished task, reconnection
+                # or the next scheduled retry comes due.
+                self._wakeup.clear()
+                due = self.queue.next_due_at() if self.prober.online else None
+                timeout = max(0.0, due - time.time()) if due is not None else None
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
                 continue
 
+            key = next_task.ordering_key
+            self._busy_keys.add(key)
+            self._in_flight.add(next_task.task_id)
             try:
-                await self._process_task(next_task)
-                self.queue.remove(next_task.task_id)
-            except Exception as exc:  # pragma: no cover - defensive
-                next_task.attempts += 1
-                logger.warning(f"Sync task {next_task.task_id} failed ({next_task.attempts} attempts): {exc}")
-                if next_task.attempts >= 5:
-                    self.queue.remove(next_task.task_id)
-                    logger.error(f"Dropping task {next_task.task_id} after repeated failures")
-                else:
-                    self.queue._persist()
-                    await asyncio.sleep(self.poll_interval)
+                await self._run_task(next_task)
+            finally:
+                self._busy_keys.discard(key)
+                self._in_flight.discard(next_task.task_id)
+                self._notify()  # Tasks queued behind this ordering key can now run.
+
+    async def _run_task(self, next_task: SyncTask) -> None:
+        if next_task.idempotency_key in self.acked_keys:
+            # Acknowledged before a crash or restart lost the dequeue; don't resend.
+            logger.info(f"Skipping already acknowledged task {next_task.task_id}")
+            self.queue.remove(next_task.task_id)
+            return
+        try:
+            await self._process_task(next_task)
+            # Record the ack before dequeuing so a crash in between cannot cause a resend.
+            self.acked_keys.record(next_task.idempotency_key)
+            self.queue.remove(next_task.task_id)
+            self.prober.report_success()
+            self.metrics.record_success((datetime.utcnow() - next_task.updated_at).total_seconds())
+        except CircuitOpenError as exc:
+            # Endpoint is known to be down; reschedule without charging the task an attempt.
+            logger.info(f"Sync deferred: {exc}")
+            next_task.next_attempt_at = time.time() + max(exc.retry_after, self.poll_interval)
+            self.queue.update(next_task)
+        except Exception as exc:  # pragma: no cover - defensive
+            self.metrics.record_failure()
+            self.prober.report_failure(exc)
+            if not self.prober.online:
+                # Unreachable, not rejected: park until the prober sees the backend again.
+                logger.info(f"Sync paused while offline: {exc}")
+                return
+            next_task.attempts += 1
+            next_task.last_error = str(exc)
+            logger.warning(f"Sync task {next_task.task_id} failed ({next_task.attempts} attempts): {exc}")
+            if not self.api_client.retry_policy.classifier(exc):
+                self.queue.dead_letter(next_task, f"Rejected by server: {exc}")
+                self.metrics.record_dead_letter()
+            elif next_task.attempts >= self.max_attempts:
+                self.queue.dead_letter(next_task, f"Gave up after {next_task.attempts} attempts: {exc}")
+                self.metrics.record_dead_letter()
+            else:
+                next_task.next_attempt_at = time.time() + self._retry_delay(next_task.attempts)
+                self.queue.update(next_task)
 
     def start(self) -> None:
-        if self._task and not self._task.done():
+        if any(not worker.done() for worker in self._workers):
             return
-        self._task = asyncio.create_task(self._worker())
-        logger.info("Sync engine started")
+        compact_queue(self.queue, self._in_flight, self._resolve_conflict)
+        self._running = True
+        self._wakeup.set()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        logger.info(f"Sync engine started with {self.concurrency} workers")
 
     async def stop(self) -> None:
         self._running = False
-        if self._task:
-            await self._task
+        self._notify()
+        self.prober.stop()
+        if self._workers:
+            await asyncio.gather(*self._workers, return_exceptions=True)
+            self._workers = []
         await self.api_client.close()
+        self.close_storage()
         logger.info("Sync engine stopped")
 
+    def close_storage(self) -> None:
+        """Flush and close the on-disk queue and acknowledgement journals."""
+
+        self.queue.close()
+        self.acked_keys.close()
+
     def cache_recent_patent(self, document_id: str, content: str, metadata: Optional[Dict[str, Any]] = None) -> None:
         """Persist patent content locally for offline viewing."""
 
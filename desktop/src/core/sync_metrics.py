@@ -0,0 +1,134 @@
+"""Live throughput and latency metrics for the sync engine.
+
+Counters are updated in place by the engine's workers and read as an
+immutable :class:`SyncMetricsSnapshot`, which the status bar polls. The
+enqueue-to-ack latency histogram uses fixed buckets, so recording is O(1)
+and memory does not grow with the number of tasks synced.
+"""
+
+from __future__ import annotations
+
+import bisect
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Deque, Dict, List, Optional, Tuple
+
+# Upper bucket bounds in seconds; the last bucket is open-ended.
+LATENCY_BUCKETS: Tuple[float, ...] = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900, 3600)
+
+
+class LatencyHistogram:
+    """Fixed-bucket histogram with approximate quantiles."""
+
+    def __init__(self, bounds: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts: List[int] = [0] * (len(bounds) + 1)
+        self.total = 0
+        self.sum = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.total += 1
+        self.sum += seconds
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the ``q`` quantile (None when empty)."""
+
+        if not self.total:
+            return None
+        rank = q * self.total
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return self.bounds[index] if index < len(self.bounds) else float("inf")
+        return float("inf")  # pragma: no cover - defensive
+
+    def buckets(self) -> Dict[str, int]:
+        labels = [f"<={bound:g}s" for bound in self.bounds] + [f">{self.bounds[-1]:g}s"]
+        return dict(zip(labels, self.counts))
+
+
+@dataclass
+class SyncMetricsSnapshot:
+    """Point-in-time view of the sync backlog and its throughput."""
+
+    queue_depth: Dict[str, int]
+    oldest_task_age_seconds: Optional[float]
+    latency_p50_seconds: Optional[float]
+    latency_p95_seconds: Optional[float]
+    latency_buckets: Dict[str, int]
+    succeeded: int
+    failed: int
+    dead_lettered: int
+    successes_per_minute: float
+    failures_per_minute: float
+    bytes_transferred: int
+    online: bool
+    in_flight: int
+    dead_letters: int = 0
+    captured_at: float = field(default_factory=time.time)
+
+    @property
+    def total_queued(self) -> int:
+        return sum(self.queue_depth.values())
+
+    @property
+    def success_ratio(self) -> Optional[float]:
+        attempts = self.succeeded + self.failed
+        return self.succeeded / attempts if attempts else None
+
+    def to_dict(self) -> Dict[str, object]:
+        data = asdict(self)
+        data["total_queued"] = self.total_queued
+        data["success_ratio"] = self.success_ratio
+        return data
+
+
+class SyncMetrics:
+    """Mutable counters maintained by :class:`SyncEngine`."""
+
+    def __init__(self, rate_window_seconds: float = 300.0):
+        self.rate_window_seconds = rate_window_seconds
+        self.latency = LatencyHistogram()
+        self.succeeded = 0
+        self.failed = 0
+        self.dead_lettered = 0
+        self.bytes_transferred = 0
+        # (monotonic time, succeeded?) for attempts inside the rate window.
+        self._recent: Deque[Tuple[float, bool]] = deque()
+
+    def _note(self, ok: bool) -> None:
+        now = time.monotonic()
+        self._recent.append((now, ok))
+        self._trim(now)
+
+    def _trim(self, now: float) -> None:
+        horizon = now - self.rate_window_seconds
+        while self._recent and self._recent[0][0] < horizon:
+            self._recent.popleft()
+
+    def record_success(self, enqueue_to_ack_seconds: float) -> None:
+        self.succeeded += 1
+        self.latency.record(max(0.0, enqueue_to_ack_seconds))
+        self._note(True)
+
+    def record_failure(self) -> None:
+        self.failed += 1
+        self._note(False)
+
+    def record_dead_letter(self) -> None:
+        self.dead_lettered += 1
+
+    def record_bytes(self, count: int) -> None:
+        self.bytes_transferred += count
+
+    def rates_per_minute(self) -> Tuple[float, float]:
+        """Successes and failures per minute over the rate window."""
+
+        self._trim(time.monotonic())
+        successes = sum(1 for _, ok in self._recent if ok)
+        failures = len(self._recent) - successes
+        minutes = self.rate_window_seconds / 60
+        return successes / minutes, failures / minutes
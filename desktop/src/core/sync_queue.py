@@ -0,0 +1,465 @@
+"""Offline sync queue: task model and journal-backed storage.
+
+Tasks are kept in memory in insertion order and every mutation is
+appended to a :class:`SyncJournal`, so queue operations cost O(1) disk
+I/O regardless of backlog size. Each task carries its own
+``next_attempt_at``, so a failing task backs off without blocking the
+tasks behind it, and tasks that exhaust their retries move to a
+dead-letter set instead of being deleted. :mod:`sync_store` provides a
+SQLite backend with the same interface.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import json
+import os
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from loguru import logger
+
+from .idempotency import idempotency_key
+from .sync_journal import SyncJournal
+
+# Lower runs first: small interactive edits go ahead of bulk uploads.
+PRIORITY_INTERACTIVE = 0
+PRIORITY_DEFAULT = 1
+PRIORITY_BULK = 2
+
+_KIND_PRIORITY = {
+    "annotation": PRIORITY_INTERACTIVE,
+    "analysis": PRIORITY_DEFAULT,
+    "upload": PRIORITY_BULK,
+}
+
+
+@dataclass
+class SyncTask:
+    """Represents a queued offline operation."""
+
+    task_id: str
+    kind: str
+    payload: Dict[str, Any]
+    updated_at: datetime
+    attempts: int = 0
+    next_attempt_at: float = 0.0
+    last_error: Optional[str] = None
+
+    @classmethod
+    def create(cls, kind: str, payload: Dict[str, Any]) -> "SyncTask":
+        return cls(
+            task_id=str(uuid.uuid4()),
+            kind=kind,
+            payload=payload,
+            updated_at=datetime.utcnow(),
+        )
+
+    @property
+    def document_id(self) -> Optional[str]:
+        """Document the task belongs to, when its payload names one."""
+
+        return self.payload.get("document_id") or self.payload.get("documentId")
+
+    @property
+    def ordering_key(self) -> str:
+        """Tasks sharing a key replay in order; different keys may run concurrently."""
+
+        if self.document_id:
+            return f"document:{self.document_id}"
+        entity_id = self.payload.get("id") or self.payload.get("annotation_id")
+        if entity_id:
+            return f"{self.kind}:{entity_id}"
+        return f"task:{self.task_id}"
+
+    @property
+    def idempotency_key(self) -> str:
+        """Sent with every attempt so the server can discard duplicate replays."""
+
+        return idempotency_key(self.task_id)
+
+    @property
+    def priority(self) -> int:
+        return _KIND_PRIORITY.get(self.kind, PRIORITY_DEFAULT)
+
+    def is_ready(self, now: float) -> bool:
+        return self.next_attempt_at <= now
+
+    @property
+    def compaction_key(self) -> Optional[str]:
+        """Tasks sharing this key target the same entity and can be collapsed.
+
+        Keys never span kinds: an analysis trigger is a separate request from
+        the upload of the same document.
+        """
+
+        if self.kind == "annotation":
+            entity_id = self.payload.get("id") or self.payload.get("annotation_id")
+            return f"annotation:{entity_id}" if entity_id else None
+        if self.kind in ("upload", "analysis") and self.document_id:
+            return f"{self.kind}:{self.document_id}"
+        return None
+
+    def to_dict(self) -> Dict[str, Any]:
+        raw = asdict(self)
+        raw["updated_at"] = self.updated_at.isoformat()
+        return raw
+
+    @staticmethod
+    def from_dict(data: Dict[str, Any]) -> "SyncTask":
+        return SyncTask(
+            task_id=data["task_id"],
+            kind=data["kind"],
+            payload=data["payload"],
+            updated_at=datetime.fromisoformat(data["updated_at"]),
+            attempts=data.get("attempts", 0),
+            next_attempt_at=data.get("next_attempt_at", 0.0),
+            last_error=data.get("last_error"),
+        )
+
+
+def _unindex(index: Dict[Any, Dict[str, None]], key: Any, task_id: str) -> None:
+    bucket = index.get(key) if key is not None else None
+    if bucket is not None:
+        bucket.pop(task_id, None)
+        if not bucket:
+            del index[key]
+
+
+class SyncQueue:
+    """Journal-backed queue for offline work.
+
+    Tasks live in an insertion-ordered dict with per-key indexes and a
+    heap of ordering-key heads, so enqueue, remove and claims cost at most
+    O(log n) however large the backlog; every mutation appends one record
+    to a :class:`SyncJournal` instead of rewriting the whole queue file.
+    Dead-lettered tasks are kept in the same journal.
+    """
+
+    LEGACY_FILENAME = "sync-queue.json"
+
+    def __init__(
+        self,
+        data_dir: Path,
+        filename: str = "sync-queue.journal",
+        fsync_batch: int = 64,
+        compact_min_records: int = 1024,
+    ):
+        self.path = data_dir / filename
+        self.compact_min_records = compact_min_records
+        self._tasks: Dict[str, SyncTask] = {}
+        self._dead: Dict[str, SyncTask] = {}
+        self._reset_indexes()
+        self.journal = SyncJournal(self.path, fsync_batch=fsync_batch)
+        self._load()
+        self._migrate_legacy(data_dir / self.LEGACY_FILENAME)
+
+    @property
+    def tasks(self) -> List[SyncTask]:
+        return list(self._tasks.values())
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def _reset_indexes(self) -> None:
+        # Each index maps a key to an insertion-ordered set of task ids.
+        self._by_compaction_key: Dict[str, Dict[str, None]] = {}
+        self._by_ordering_key: Dict[str, Dict[str, None]] = {}
+        self._by_kind: Dict[str, Dict[str, None]] = {}
+        # Claim candidates: the head task of every ordering key sits in one of
+        # two heaps, ``_ready`` by (priority, seq) once due and ``_waiting`` by
+        # next_attempt_at while backing off. Entries are superseded rather than
+        # removed; only the entry recorded in ``_heads`` for its key is live.
+        self._heads: Dict[str, Tuple[tuple, Tuple[str, int, float]]] = {}
+        self._ready: List[tuple] = []
+        self._waiting: List[tuple] = []
+        self._seq: Dict[str, int] = {}
+        self._next_seq = itertools.count()
+
+    def _index_keys(self, task: SyncTask) -> List[tuple]:
+        return [
+            (self._by_compaction_key, task.compaction_key),
+            (self._by_ordering_key, task.ordering_key),
+            (self._by_kind, task.kind),
+        ]
+
+    def _load(self) -> None:
+        self._tasks = {}
+        self._dead = {}
+        self._reset_indexes()
+        self._compaction_blocked = False
+        applied = 0
+        records = self.journal.replay()
+        try:
+            for record in records:
+                self._apply(record)
+                applied += 1
+        except Exception as exc:
+            records.close()
+            self._set_journal_aside(exc, applied)
+
+    def _set_journal_aside(self, exc: Exception, applied: int) -> None:
+        """Keep the state replayed before ``exc`` and move the unreadable journal aside.
+
+        The original file is never compacted over: the recovered state goes
+        into a fresh journal, or, if the file cannot be moved, compaction is
+        disabled so the journal is only ever appended to.
+        """
+
+        aside = self.path.with_name(f"{self.path.name}.unreadable-{int(time.time())}")
+        logger.error(
+            f"Sync journal replay failed after {applied} records ({exc}); "
+            f"kept {len(self._tasks)} queued and {len(self._dead)} dead-lettered tasks"
+        )
+        try:
+            os.replace(self.path, aside)
+        except OSError as move_exc:
+            logger.error(f"Could not move {self.path.name} aside ({move_exc}); journal compaction disabled")
+            self._compaction_blocked = True
+            return
+        logger.warning(f"Moved unreadable sync journal to {aside.name}")
+        self.compact()
+
+    def _store(self, task: SyncTask) -> None:
+        previous = self._tasks.get(task.task_id)
+        if previous is None:
+            self._seq[task.task_id] = next(self._next_seq)
+        old_keys = [key for _, key in self._index_keys(previous)] if previous is not None else [None] * 3
+        self._tasks[task.task_id] = task
+        for (index, key), old_key in zip(self._index_keys(task), old_keys):
+            if previous is not None:
+                if key == old_key:
+                    continue  # Keep the task's position in its bucket.
+                _unindex(index, old_key, task.task_id)
+            if key is not None:
+                index.setdefault(key, {})[task.task_id] = None
+        self._schedule(task.ordering_key)
+        if previous is not None and previous.ordering_key != task.ordering_key:
+            self._schedule(previous.ordering_key)
+
+    def _discard(self, task_id: str) -> Optional[SyncTask]:
+        task = self._tasks.pop(task_id, None)
+        if task is not None:
+            for index, key in self._index_keys(task):
+                _unindex(index, key, task_id)
+            self._seq.pop(task_id, None)
+            self._schedule(task.ordering_key)
+        return task
+
+    def _schedule(self, key: str) -> None:
+        """Make the oldest queued task of ``key`` its claim candidate."""
+
+        lane = self._by_ordering_key.get(key)
+        if not lane:
+            self._heads.pop(key, None)
+            return
+        task = self._tasks[next(iter(lane))]
+        state = (task.task_id, task.priority, task.next_attempt_at)
+        current = self._heads.get(key)
+        if current is not None and current[0][3] is task and current[1] == state:
+            return
+        if task.is_ready(time.time()):
+            self._push(self._ready, (task.priority, self._seq[task.task_id], key, task), state)
+        else:
+            self._push(self._waiting, (task.next_attempt_at, self._seq[task.task_id], key, task), state)
+
+    def _push(self, heap: List[tuple], entry: tuple, state: Tuple[str, int, float]) -> None:
+        # Sequence numbers are unique, so comparisons never reach the key or task.
+        self._heads[entry[2]] = (entry, state)
+        heapq.heappush(heap, entry)
+        if len(self._ready) + len(self._waiting) > 2 * len(self._heads) + 64:
+            self._ready = [entry for entry in self._ready if self._is_live(entry)]
+            self._waiting = [entry for entry in self._waiting if self._is_live(entry)]
+            heapq.heapify(self._ready)
+            heapq.heapify(self._waiting)
+
+    def _is_live(self, entry: tuple) -> bool:
+        current = self._heads.get(entry[2])
+        return current is not None and current[0] is entry
+
+    def _apply(self, record: Dict[str, Any]) -> None:
+        op = record.get("op")
+        if op == "put":
+            task = SyncTask.from_dict(record["task"])
+            self._dead.pop(task.task_id, None)
+            self._store(task)
+        elif op == "update":
+            task = self._tasks.get(record["id"])
+            if task is not None:
+                task.attempts = record.get("attempts", task.attempts)
+                task.next_attempt_at = record.get("next_attempt_at", task.next_attempt_at)
+                task.last_error = record.get("last_error", task.last_error)
+                self._schedule(task.ordering_key)
+        elif op == "ack":
+            self._discard(record["id"])
+        elif op == "dead":
+            task = SyncTask.from_dict(record["task"])
+            self._discard(task.task_id)
+            self._dead[task.task_id] = task
+        elif op == "purge":
+            self._dead.pop(record["id"], None)
+
+    def _migrate_legacy(self, legacy_path: Path) -> None:
+        """Fold a queue written by the old whole-file JSON format into the journal."""
+
+        if not legacy_path.exists():
+            return
+        try:
+            with open(legacy_path, "r", encoding="utf-8") as f:
+                legacy = [SyncTask.from_dict(task) for task in json.load(f)]
+        except Exception as exc:  # pragma: no cover - defensive
+            logger.warning(f"Failed to migrate legacy sync queue: {exc}")
+            return
+        for task in legacy:
+            if task.task_id not in self._tasks:
+                self._store(task)
+        self.compact()
+        legacy_path.unlink()
+        logger.info(f"Migrated {len(legacy)} tasks from {legacy_path.name}")
+
+    def _maybe_compact(self) -> None:
+        live = len(self._tasks) + len(self._dead)
+        if self.journal.record_count - live > max(self.compact_min_records, live):
+            self.compact()
+
+    def compact(self) -> None:
+        """Rewrite the journal as one record per queued or dead-lettered task."""
+
+        if self._compaction_blocked:
+            return
+        records = [{"op": "put", "task": task.to_dict()} for task in self._tasks.values()]
+        records.extend({"op": "dead", "task": task.to_dict()} for task in self._dead.values())
+        self.journal.rewrite(records)
+
+    def enqueue(self, task: SyncTask) -> None:
+        self._store(task)
+        self.journal.append({"op": "put", "task": task.to_dict()})
+        logger.info(f"Enqueued offline task {task.kind} ({task.task_id})")
+
+    def pop(self) -> Optional[SyncTask]:
+        task = self.peek()
+        if task is not None:
+            self.remove(task.task_id)
+        return task
+
+    def peek(self) -> Optional[SyncTask]:
+        return next(iter(self._tasks.values()), None)
+
+    def claim_next(self, busy_keys: Set[str], now: Optional[float] = None) -> Optional[SyncTask]:
+        """Highest-priority runnable task, oldest first within a priority.
+
+        Only the oldest task of each ordering key is eligible, so per-key
+        order is kept; it must be due and its key must not be in ``busy_keys``.
+        Costs O(log n) per head that came due or whose key is busy,
+        independent of how many tasks wait behind those heads.
+        """
+
+        now = time.time() if now is None else now
+        while self._waiting and self._waiting[0][0] <= now:
+            entry = heapq.heappop(self._waiting)
+            if self._is_live(entry):
+                task = entry[3]
+                self._push(self._ready, (task.priority, entry[1], entry[2], task), self._heads[entry[2]][1])
+        skipped: List[tuple] = []
+        try:
+            while self._ready:
+                entry = self._ready[0]
+                if not self._is_live(entry):
+                    heapq.heappop(self._ready)
+                elif entry[2] in busy_keys:
+                    skipped.append(heapq.heappop(self._ready))
+                elif not entry[3].is_ready(now):  # Only when ``now`` is earlier than the clock.
+                    heapq.heappop(self._ready)
+                    task = entry[3]
+                    self._push(self._waiting, (task.next_attempt_at, entry[1], entry[2], task), self._heads[entry[2]][1])
+                else:
+                    return entry[3]
+            return None
+        finally:
+            for entry in skipped:
+                heapq.heappush(self._ready, entry)
+
+    def next_due_at(self) -> Optional[float]:
+        """Earliest ``next_attempt_at`` among tasks that are backing off."""
+
+        while self._waiting and not self._is_live(self._waiting[0]):
+            heapq.heappop(self._waiting)
+        return self._waiting[0][0] if self._waiting else None
+
+    def remove(self, task_id: str) -> None:
+        if self._discard(task_id) is None:
+            return
+        self.journal.append({"op": "ack", "id": task_id})
+        self._maybe_compact()
+
+    def with_compaction_key(self, key: str) -> List[SyncTask]:
+        """Queued tasks sharing ``key``, oldest first."""
+
+        return [self._tasks[task_id] for task_id in self._by_compaction_key.get(key, ())]
+
+    def pending_for_document(self, document_id: str, kind: Optional[str] = None) -> List[SyncTask]:
+        """Pending tasks for one document, optionally restricted to a kind."""
+
+        return [
+            task for task in self._tasks.values()
+            if task.document_id == document_id and (kind is None or task.kind == kind)
+        ]
+
+    def count_by_kind(self) -> Dict[str, int]:
+        return {kind: len(task_ids) for kind, task_ids in self._by_kind.items()}
+
+    def update(self, task: SyncTask) -> None:
+        """Persist a change to a queued task's retry bookkeeping."""
+
+        if task.task_id in self._tasks:
+            self._schedule(task.ordering_key)
+            self.journal.append(
+                {
+                    "op": "update",
+                    "id": task.task_id,
+                    "attempts": task.attempts,
+                    "next_attempt_at": task.next_attempt_at,
+                    "last_error": task.last_error,
+                }
+            )
+            self._maybe_compact()
+
+    def dead_letter(self, task: SyncTask, error: str) -> None:
+        """Move a task that will not succeed by retrying out of the queue."""
+
+        if self._discard(task.task_id) is None:
+            return
+        task.last_error = error
+        self._dead[task.task_id] = task
+        self.journal.append({"op": "dead", "task": task.to_dict()})
+        logger.warning(f"Dead-lettered task {task.kind} ({task.task_id}): {error}")
+
+    def dead_letters(self) -> List[SyncTask]:
+        return list(self._dead.values())
+
+    def dead_letter_count(self) -> int:
+        return len(self._dead)
+
+    def replay_dead_letter(self, task_id: str) -> Optional[SyncTask]:
+        """Requeue a dead-lettered task at the back of the queue with a fresh retry budget."""
+
+        task = self._dead.pop(task_id, None)
+        if task is None:
+            return None
+        task.attempts = 0
+        task.next_attempt_at = 0.0
+        self.enqueue(task)
+        return task
+
+    def purge_dead_letter(self, task_id: str) -> None:
+        if self._dead.pop(task_id, None) is not None:
+            self.journal.append({"op": "purge", "id": task_id})
+            self._maybe_compact()
+
+    def close(self) -> None:
+        self.journal.close()
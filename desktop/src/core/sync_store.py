@@ -0,0 +1,339 @@
+"""SQLite storage backend for the offline sync queue.
+
+Drop-in alternative to the journal-backed :class:`SyncQueue` for large
+backlogs. Tasks are rows indexed by status, kind, document and next
+attempt time, and a head table holds the oldest pending task of each
+ordering key, so queue operations stay logarithmic in the backlog and the
+UI can ask questions such as "pending uploads for document X" directly.
+Dead-lettered tasks stay in the table with ``status = 'dead'``. The
+database runs in WAL mode and every acknowledgement is its own
+transaction.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from loguru import logger
+
+from .sync_queue import SyncTask
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sync_tasks (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_id TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL,
+    document_id TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sync_tasks_status ON sync_tasks(status);
+CREATE INDEX IF NOT EXISTS idx_sync_tasks_status_next ON sync_tasks(status, next_attempt_at);
+CREATE INDEX IF NOT EXISTS idx_sync_tasks_kind ON sync_tasks(kind, status);
+CREATE INDEX IF NOT EXISTS idx_sync_tasks_document ON sync_tasks(document_id, status);
+"""
+
+# The oldest pending task of each ordering key, the only one that may run;
+# kept in step with sync_tasks so claims never scan the tasks behind a head.
+# ``ready`` is set once the head's next_attempt_at has passed.
+_HEADS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sync_heads (
+    ordering_key TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    priority INTEGER NOT NULL,
+    next_attempt_at REAL NOT NULL,
+    ready INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sync_heads_ready ON sync_heads(ready, priority, seq);
+CREATE INDEX IF NOT EXISTS idx_sync_heads_waiting ON sync_heads(ready, next_attempt_at);
+"""
+
+_LATE_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_sync_tasks_compaction ON sync_tasks(compaction_key, status)",
+    "CREATE INDEX IF NOT EXISTS idx_sync_tasks_ordering ON sync_tasks(ordering_key, status, seq)",
+    "DROP INDEX IF EXISTS idx_sync_tasks_claim",
+)
+
+# Columns added after the first schema, with their definitions.
+_LATE_COLUMNS = {
+    "compaction_key": "TEXT",
+    "ordering_key": "TEXT",
+    "priority": "INTEGER NOT NULL DEFAULT 1",
+    "last_error": "TEXT",
+}
+# Late columns computed from the task itself; rows predating any of them are backfilled.
+_DERIVED_COLUMNS = frozenset({"compaction_key", "ordering_key", "priority"})
+
+_COLUMNS = "task_id, kind, payload, updated_at, attempts, next_attempt_at, last_error"
+_TASK_COLUMNS = ", ".join(f"t.{column}" for column in _COLUMNS.split(", "))
+
+
+class SqliteSyncQueue:
+    """SQLite-backed queue with the same interface as :class:`SyncQueue`."""
+
+    def __init__(self, data_dir: Path, filename: str = "sync-queue.sqlite3"):
+        self.path = data_dir / filename
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        if self._migrate():
+            self._rebuild_heads()
+        self._conn.commit()
+
+    def _migrate(self) -> bool:
+        """Add columns and tables introduced after a database was first created.
+
+        Returns True when the head table has to be rebuilt from the tasks.
+        """
+
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(sync_tasks)")}
+        added = [name for name in _LATE_COLUMNS if name not in columns]
+        for name in added:
+            self._conn.execute(f"ALTER TABLE sync_tasks ADD COLUMN {name} {_LATE_COLUMNS[name]}")
+        for statement in _LATE_INDEXES:
+            self._conn.execute(statement)
+        has_heads = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sync_heads'"
+        ).fetchone()
+        self._conn.executescript(_HEADS_SCHEMA)
+        backfill = bool(_DERIVED_COLUMNS.intersection(added))
+        if backfill:
+            rows = self._conn.execute(f"SELECT {_COLUMNS} FROM sync_tasks").fetchall()
+            self._conn.executemany(
+                "UPDATE sync_tasks SET ordering_key = ?, priority = ?, compaction_key = ? WHERE task_id = ?",
+                [
+                    (task.ordering_key, task.priority, task.compaction_key, task.task_id)
+                    for task in map(self._row_to_task, rows)
+                ],
+            )
+        return backfill or not has_heads
+
+    def _rebuild_heads(self) -> None:
+        self._conn.execute("DELETE FROM sync_heads")
+        # SQLite takes the bare columns from the row holding MIN(seq).
+        self._conn.execute(
+            "INSERT INTO sync_heads (ordering_key, seq, priority, next_attempt_at, ready) "
+            "SELECT ordering_key, MIN(seq), priority, next_attempt_at, 0 FROM sync_tasks "
+            "WHERE status = 'pending' GROUP BY ordering_key"
+        )
+
+    def _refresh_head(self, ordering_key: Optional[str]) -> None:
+        """Point ``ordering_key``'s head row at its oldest pending task, if any."""
+
+        if ordering_key is None:
+            return
+        self._conn.execute("DELETE FROM sync_heads WHERE ordering_key = ?", (ordering_key,))
+        self._conn.execute(
+            "INSERT INTO sync_heads (ordering_key, seq, priority, next_attempt_at, ready) "
+            "SELECT ordering_key, seq, priority, next_attempt_at, 0 FROM sync_tasks "
+            "WHERE ordering_key = ? AND status = 'pending' ORDER BY seq LIMIT 1",
+            (ordering_key,),
+        )
+
+    def _ordering_key_of(self, task_id: str) -> Optional[str]:
+        row = self._conn.execute("SELECT ordering_key FROM sync_tasks WHERE task_id = ?", (task_id,)).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _row_to_task(row: tuple) -> SyncTask:
+        task_id, kind, payload, updated_at, attempts, next_attempt_at, last_error = row
+        return SyncTask(
+            task_id=task_id,
+            kind=kind,
+            payload=json.loads(payload),
+            updated_at=datetime.fromisoformat(updated_at),
+            attempts=attempts,
+            next_attempt_at=next_attempt_at,
+            last_error=last_error,
+        )
+
+    @property
+    def tasks(self) -> List[SyncTask]:
+        rows = self._conn.execute(
+            f"SELECT {_COLUMNS} FROM sync_tasks WHERE status = 'pending' ORDER BY seq"
+        ).fetchall()
+        return [self._row_to_task(row) for row in rows]
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM sync_tasks WHERE status = 'pending'").fetchone()[0]
+
+    def _insert(self, task: SyncTask) -> None:
+        previous_key = self._ordering_key_of(task.task_id)
+        self._conn.execute(
+            "INSERT INTO sync_tasks (task_id, kind, document_id, attempts, next_attempt_at, last_error, "
+            "updated_at, payload, compaction_key, ordering_key, priority) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(task_id) DO UPDATE SET kind = excluded.kind, status = 'pending', "
+            "attempts = excluded.attempts, next_attempt_at = excluded.next_attempt_at, "
+            "last_error = excluded.last_error, updated_at = excluded.updated_at, payload = excluded.payload, "
+            "compaction_key = excluded.compaction_key, ordering_key = excluded.ordering_key, "
+            "priority = excluded.priority",
+            (
+                task.task_id,
+                task.kind,
+                task.document_id,
+                task.attempts,
+                task.next_attempt_at,
+                task.last_error,
+                task.updated_at.isoformat(),
+                json.dumps(task.payload, separators=(",", ":")),
+                task.compaction_key,
+                task.ordering_key,
+                task.priority,
+            ),
+        )
+        self._refresh_head(task.ordering_key)
+        if previous_key != task.ordering_key:
+            self._refresh_head(previous_key)
+
+    def enqueue(self, task: SyncTask) -> None:
+        with self._conn:
+            self._insert(task)
+        logger.info(f"Enqueued offline task {task.kind} ({task.task_id})")
+
+    def peek(self) -> Optional[SyncTask]:
+        row = self._conn.execute(
+            f"SELECT {_COLUMNS} FROM sync_tasks WHERE status = 'pending' ORDER BY seq LIMIT 1"
+        ).fetchone()
+        return self._row_to_task(row) if row else None
+
+    def claim_next(self, busy_keys: Set[str], now: Optional[float] = None) -> Optional[SyncTask]:
+        """Highest-priority due task heading its ordering key, oldest first.
+
+        Reads only the head table, so the cost depends on the number of busy
+        keys and newly due heads, not on the tasks queued behind them.
+        """
+
+        now = time.time() if now is None else now
+        if self._conn.execute(
+            "SELECT 1 FROM sync_heads WHERE ready = 0 AND next_attempt_at <= ? LIMIT 1", (now,)
+        ).fetchone():
+            with self._conn:
+                self._conn.execute("UPDATE sync_heads SET ready = 1 WHERE ready = 0 AND next_attempt_at <= ?", (now,))
+        cursor = self._conn.execute(
+            f"SELECT {_TASK_COLUMNS}, h.ordering_key "
+            "FROM sync_heads h INDEXED BY idx_sync_heads_ready JOIN sync_tasks t ON t.seq = h.seq "
+            "WHERE h.ready = 1 AND h.next_attempt_at <= ? ORDER BY h.priority, h.seq",
+            (now,),
+        )
+        try:
+            for row in cursor:
+                if row[-1] not in busy_keys:
+                    return self._row_to_task(row[:-1])
+        finally:
+            cursor.close()
+        return None
+
+    def next_due_at(self) -> Optional[float]:
+        """Earliest ``next_attempt_at`` among tasks that are backing off."""
+
+        row = self._conn.execute(
+            "SELECT MIN(next_attempt_at) FROM sync_heads WHERE ready = 0 AND next_attempt_at > ?",
+            (time.time(),),
+        ).fetchone()
+        return row[0]
+
+    def pop(self) -> Optional[SyncTask]:
+        task = self.peek()
+        if task is not None:
+            self.remove(task.task_id)
+        return task
+
+    def remove(self, task_id: str) -> None:
+        """Acknowledge a task: delete it in its own transaction."""
+
+        with self._conn:
+            ordering_key = self._ordering_key_of(task_id)
+            self._conn.execute("DELETE FROM sync_tasks WHERE task_id = ?", (task_id,))
+            self._refresh_head(ordering_key)
+
+    def update(self, task: SyncTask) -> None:
+        with self._conn:
+            self._conn.execute(
+                "UPDATE sync_tasks SET attempts = ?, next_attempt_at = ?, last_error = ? WHERE task_id = ?",
+                (task.attempts, task.next_attempt_at, task.last_error, task.task_id),
+            )
+            self._refresh_head(self._ordering_key_of(task.task_id))
+
+    def dead_letter(self, task: SyncTask, error: str) -> None:
+        """Move a task that will not succeed by retrying out of the queue."""
+
+        task.last_error = error
+        with self._conn:
+            self._conn.execute(
+                "UPDATE sync_tasks SET status = 'dead', attempts = ?, last_error = ? "
+                "WHERE task_id = ? AND status = 'pending'",
+                (task.attempts, error, task.task_id),
+            )
+            self._refresh_head(self._ordering_key_of(task.task_id))
+        logger.warning(f"Dead-lettered task {task.kind} ({task.task_id}): {error}")
+
+    def dead_letters(self) -> List[SyncTask]:
+        rows = self._conn.execute(
+            f"SELECT {_COLUMNS} FROM sync_tasks WHERE status = 'dead' ORDER BY seq"
+        ).fetchall()
+        return [self._row_to_task(row) for row in rows]
+
+    def dead_letter_count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM sync_tasks WHERE status = 'dead'").fetchone()[0]
+
+    def replay_dead_letter(self, task_id: str) -> Optional[SyncTask]:
+        """Requeue a dead-lettered task at the back of the queue with a fresh retry budget."""
+
+        row = self._conn.execute(
+            f"SELECT {_COLUMNS} FROM sync_tasks WHERE task_id = ? AND status = 'dead'", (task_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        task = self._row_to_task(row)
+        task.attempts = 0
+        task.next_attempt_at = 0.0
+        with self._conn:
+            # Delete and reinsert so the task takes a new sequence number.
+            self._conn.execute("DELETE FROM sync_tasks WHERE task_id = ?", (task_id,))
+            self._insert(task)
+        logger.info(f"Replaying dead-lettered task {task.kind} ({task.task_id})")
+        return task
+
+    def purge_dead_letter(self, task_id: str) -> None:
+        with self._conn:
+            self._conn.execute("DELETE FROM sync_tasks WHERE task_id = ? AND status = 'dead'", (task_id,))
+
+    def with_compaction_key(self, key: str) -> List[SyncTask]:
+        """Pending tasks sharing ``key``, oldest first."""
+
+        rows = self._conn.execute(
+            f"SELECT {_COLUMNS} FROM sync_tasks WHERE compaction_key = ? AND status = 'pending' ORDER BY seq",
+            (key,),
+        ).fetchall()
+        return [self._row_to_task(row) for row in rows]
+
+    def pending_for_document(self, document_id: str, kind: Optional[str] = None) -> List[SyncTask]:
+        """Pending tasks for one document, optionally restricted to a kind."""
+
+        query = f"SELECT {_COLUMNS} FROM sync_tasks WHERE document_id = ? AND status = 'pending'"
+        params: List[Any] = [document_id]
+        if kind is not None:
+            query += " AND kind = ?"
+            params.append(kind)
+        rows = self._conn.execute(query + " ORDER BY seq", params).fetchall()
+        return [self._row_to_task(row) for row in rows]
+
+    def count_by_kind(self) -> Dict[str, int]:
+        rows = self._conn.execute(
+            "SELECT kind, COUNT(*) FROM sync_tasks WHERE status = 'pending' GROUP BY kind"
+        ).fetchall()
+        return dict(rows)
+
+    def close(self) -> None:
+        self._conn.close()
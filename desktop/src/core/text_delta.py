@@ -0,0 +1,86 @@
+"""Line-level text deltas for incremental draft storage.
+
+A delta is a JSON list of operations applied to the old text's lines in
+order: a positive integer copies that many lines, a negative integer skips
+that many, and a list of strings inserts those lines. The common prefix and
+suffix are trimmed before diffing, so a small edit in a large document costs
+a scan of the text plus a diff of only the changed region.
+"""
+
+from __future__ import annotations
+
+import difflib
+import json
+from typing import List, Union
+
+DeltaOp = Union[int, List[str]]
+
+
+def line_delta(old: str, new: str) -> List[DeltaOp]:
+    """Operations that turn ``old`` into ``new``."""
+
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+
+    prefix = 0
+    limit = min(len(old_lines), len(new_lines))
+    while prefix < limit and old_lines[prefix] == new_lines[prefix]:
+        prefix += 1
+    suffix = 0
+    limit -= prefix
+    while suffix < limit and old_lines[-1 - suffix] == new_lines[-1 - suffix]:
+        suffix += 1
+
+    ops: List[DeltaOp] = []
+
+    def copy(count: int) -> None:
+        if count:
+            if ops and isinstance(ops[-1], int) and ops[-1] > 0:
+                ops[-1] += count
+            else:
+                ops.append(count)
+
+    copy(prefix)
+    old_mid = old_lines[prefix:len(old_lines) - suffix]
+    new_mid = new_lines[prefix:len(new_lines) - suffix]
+    matcher = difflib.SequenceMatcher(None, old_mid, new_mid, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            copy(i2 - i1)
+            continue
+        if i2 > i1:
+            ops.append(i1 - i2)
+        if j2 > j1:
+            ops.append(new_mid[j1:j2])
+    copy(suffix)
+    return ops
+
+
+def apply_line_delta(old: str, ops: List[DeltaOp]) -> str:
+    """Rebuild the new text from ``old`` and the operations from :func:`line_delta`."""
+
+    return "".join(apply_line_ops(old.splitlines(keepends=True), ops))
+
+
+def apply_line_ops(old_lines: List[str], ops: List[DeltaOp]) -> List[str]:
+    """:func:`apply_line_delta` on pre-split lines, for applying a chain of deltas."""
+
+    out: List[str] = []
+    pos = 0
+    for op in ops:
+        if isinstance(op, list):
+            out.extend(op)
+        elif op > 0:
+            out.extend(old_lines[pos:pos + op])
+            pos += op
+        else:
+            pos -= op
+    return out
+
+
+def encode_delta(ops: List[DeltaOp]) -> str:
+    return json.dumps(ops, ensure_ascii=False, separators=(",", ":"))
+
+
+def decode_delta(text: str) -> List[DeltaOp]:
+    return json.loads(text)
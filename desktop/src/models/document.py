@@ -149,7 +149,7 @@ class ReferenceNumeral:
     family: str  # Base numeral without suffix
     text: str
     context: str
-    locations: List[TextLocation]
+    locations: List["TextLocation"]
     figure_references: List[str]
     claim_references: List[str]
 
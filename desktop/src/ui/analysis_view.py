@@ -11,6 +11,7 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtGui import QFont, QPixmap
 from loguru import logger
+from qasync import asyncSlot
 
 from src.core.navigation_handler import NavigationHandler
 from src.models.document import Finding, AnalysisResult, Severity
@@ -234,6 +235,7 @@ class AnalysisView(QWidget):
         self.clear_finding()
         self.summary_label.setText("No analysis results")
         
+    @asyncSlot()
     async def navigate_to_location(self):
         """Navigate to the finding location in Word"""
         if self.current_finding and self.current_finding.anchor:
@@ -4,6 +4,7 @@ Primary user interface with dark theme and professional layout
 """
 
 import asyncio
+import threading
 from typing import Optional, Dict, Any
 from PyQt6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
@@ -14,15 +15,31 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtCore import Qt, QTimer, pyqtSignal, QThread
 from PyQt6.QtGui import QAction, QIcon, QFont, QPixmap
 from loguru import logger
+from qasync import asyncSlot
 
 from src.core.config import Config
 from src.core.word_bridge import ConnectionManager, DocumentExtractor, ConnectionState
 from src.core.navigation_handler import NavigationHandler
 from src.core.offline_cache import OfflineDraftCache
+from src.core.cache_manager import CacheManager
+from src.core.draft_writer import DraftWriter
+from src.core.offline_search import OfflineSearchIndex
+from src.core.analysis_cache import AnalysisResultCache
+from src.core.analysis_engine import ANALYSIS_TYPES, AnalysisEngine
+from src.core.cancellation import SUPERSEDED
+from src.core.api_client import ApiClient
+from src.core.connectivity import ReachabilityProber
+from src.core.rate_limit import RateLimiter
+from src.core.sync_engine import SyncEngine
 from src.ui.analysis_view import AnalysisView
 from src.ui.claim_graph_view import ClaimGraphView
 from src.ui.settings_dialog import SettingsDialog
-from src.models.document import DocumentSnapshot, Finding, Severity
+from src.ui.sync_status import SyncStatusIndicator
+from src.models.document import AnalysisConfig, AnalysisResult, AnalysisType, DocumentSnapshot, Finding, Severity
+from src.utils.exceptions import AnalysisCancelled
+
+# The window shows one document at a time, so each analysis run supersedes the last
+ACTIVE_DOCUMENT_KEY = "active-document"
 
 
 class MainWindow(QMainWindow):
@@ -40,6 +57,42 @@ class MainWindow(QMainWindow):
         self.document_extractor = DocumentExtractor(self.connection_manager)
         self.navigation_handler = NavigationHandler(self.connection_manager)
         self.draft_cache = OfflineDraftCache(config.data_dir, config.drafts.cache_filename)
+        self.patent_cache = OfflineDraftCache(config.data_dir, filename=None, dirname="patents")
+        self.cache_manager = CacheManager.from_config(config.analysis)
+        self.cache_manager.register(self.draft_cache)
+        self.cache_manager.register(self.patent_cache, optional=True)
+        self.analysis_cache = AnalysisResultCache(config.data_dir)
+        self.cache_manager.register(self.analysis_cache, optional=True)
+        self.draft_writer = DraftWriter(self.draft_cache)
+        self.offline_search = OfflineSearchIndex(config.data_dir)
+        self.offline_search.attach(self.patent_cache, "patent")
+        self.offline_search.attach(self.draft_cache, "draft")
+        # Catching up after the first start can read every cached body; keep it off the GUI thread
+        threading.Thread(target=self.offline_search.reconcile, name="offline-search-reconcile", daemon=True).start()
+        # One reachability view for sync replay and offline search fallback
+        self.prober = ReachabilityProber(config.network.api_base_url)
+        self.api_client = ApiClient(
+            config.api,
+            rate_limiter=RateLimiter.from_config(config.rate_limits),
+            offline_index=self.offline_search,
+            prober=self.prober,
+        )
+        self.analysis_engine = AnalysisEngine(
+            AnalysisConfig(
+                confidence_threshold=config.analysis.confidence_threshold,
+                enable_disambiguation=config.analysis.enable_disambiguation,
+            ),
+            cache=self.analysis_cache,
+            max_processing_time=config.analysis.max_processing_time_seconds,
+        )
+        self.sync_engine = SyncEngine(
+            config.data_dir,
+            self.api_client,
+            self.patent_cache,
+            queue_backend=config.sync.queue_backend,
+            concurrency=config.sync.worker_concurrency,
+            prober=self.prober,
+        )
 
         # UI Components
         self.central_widget = None
@@ -57,6 +110,11 @@ class MainWindow(QMainWindow):
         # Current document state
         self.current_document: Optional[DocumentSnapshot] = None
         self.current_findings: list = []
+        # Latest result per analysis type; the next run of that type only re-checks what changed
+        self.last_analysis: Dict[AnalysisType, AnalysisResult] = {}
+        # Threads stay referenced until they finish; a superseded run may still be winding down
+        self.analysis_threads: set = set()
+        self.draft_dirty = False
         
         # Setup UI
         self.setup_ui()
@@ -65,6 +123,10 @@ class MainWindow(QMainWindow):
         self.setup_tool_bar()
         self.setup_status_bar()
         self.setup_autosave()
+
+        # Replay offline work once the event loop is running
+        if self.config.features.background_workers_enabled:
+            QTimer.singleShot(0, self.start_sync_engine)
         
         # Auto-connect to Word if enabled
         if self.config.word.auto_connect:
@@ -183,6 +245,13 @@ class MainWindow(QMainWindow):
         self.auto_save_timer.setInterval(interval_ms)
         self.auto_save_timer.timeout.connect(self.save_current_draft)
         self.auto_save_timer.start()
+
+        # Only save when the document actually changed since the last save
+        self.document_view.document().contentsChanged.connect(self.mark_draft_dirty)
+
+    def mark_draft_dirty(self):
+        """Flag the current document for the next autosave"""
+        self.draft_dirty = True
         
     def setup_menu_bar(self):
         """Set up the menu bar"""
@@ -279,7 +348,16 @@ class MainWindow(QMainWindow):
         # Document info
         self.document_info_label = QLabel("No document")
         self.status_bar.addPermanentWidget(self.document_info_label)
+
+        # Offline sync backlog
+        self.sync_status_indicator = SyncStatusIndicator(self.sync_engine.metrics_snapshot)
+        self.status_bar.addPermanentWidget(self.sync_status_indicator)
+
+    def start_sync_engine(self):
+        """Start background replay of queued offline work"""
+        self.sync_engine.start()
         
+    @asyncSlot()
     async def connect_to_word(self):
         """Connect to Word application"""
         try:
@@ -350,9 +428,18 @@ class MainWindow(QMainWindow):
             self.show_progress(f"Running {analysis_type} analysis...")
             
             # Create analysis thread
-            self.analysis_thread = AnalysisThread(self.current_document, analysis_type)
-            self.analysis_thread.completed.connect(self.on_analysis_completed)
-            self.analysis_thread.start()
+            thread = AnalysisThread(
+                self.analysis_engine,
+                self.current_document,
+                analysis_type,
+                previous=self.last_analysis.get(ANALYSIS_TYPES[analysis_type]),
+                document_key=ACTIVE_DOCUMENT_KEY,
+            )
+            thread.completed.connect(self.on_analysis_completed)
+            thread.cancelled.connect(self.on_analysis_cancelled)
+            thread.finished.connect(lambda: self.analysis_threads.discard(thread))
+            self.analysis_threads.add(thread)
+            thread.start()
             
         except Exception as e:
             logger.error(f"Analysis failed: {e}")
@@ -372,12 +459,22 @@ class MainWindow(QMainWindow):
             self.document_view.setPlainText(cached.content)
             self.show_message("Loaded offline draft content for this document", "info")
         
+    def on_analysis_cancelled(self, reason: str):
+        """Handle an analysis run that stopped early"""
+        if reason == SUPERSEDED:
+            return  # The newer run owns the progress indicator
+        self.hide_progress()
+        self.show_message(f"Analysis {reason}", "warning")
+
     def on_analysis_completed(self, analysis_result):
         """Handle analysis completed event"""
         self.hide_progress()
+        if analysis_result:
+            self.last_analysis[analysis_result.analysis_type] = analysis_result
         
         if analysis_result and analysis_result.findings:
             self.current_findings = analysis_result.findings
+            self.draft_dirty = True  # analysis_ready metadata changed
             self.populate_findings_tree(analysis_result.findings)
             self.analysis_view.display_results(analysis_result)
             
@@ -438,6 +535,7 @@ class MainWindow(QMainWindow):
         if finding:
             self.analysis_view.display_finding(finding)
             
+    @asyncSlot()
     async def navigate_to_selected_finding(self):
         """Navigate to the selected finding in Word"""
         current_item = self.findings_tree.currentItem()
@@ -475,15 +573,17 @@ class MainWindow(QMainWindow):
         logger.info(f"Message ({type}): {message}")
 
     def save_current_draft(self):
-        """Persist current document state for offline recovery."""
-        if not self.config.drafts.enabled or not self.current_document:
+        """Queue current document state for offline recovery."""
+        if not self.config.drafts.enabled or not self.current_document or not self.draft_dirty:
             return
 
+        self.draft_dirty = False
         content = self.document_view.toPlainText()
         if not content.strip():
             return
 
-        self.draft_cache.save_draft(
+        # Digest check, diffing and disk writes happen on the writer thread
+        self.draft_writer.submit(
             document_id=self.current_document.checksum,
             content=content,
             metadata={"analysis_ready": bool(self.current_findings)},
@@ -494,6 +594,9 @@ class MainWindow(QMainWindow):
         dialog = SettingsDialog(self.config, self)
         if dialog.exec() == 1:  # Accepted
             self.config.save_settings()
+            self.analysis_engine.config.confidence_threshold = self.config.analysis.confidence_threshold
+            self.analysis_engine.max_processing_time = self.config.analysis.max_processing_time_seconds
+            self.cache_manager.configure(self.config.analysis)
             
     def show_about(self):
         """Show about dialog"""
@@ -507,12 +610,15 @@ class MainWindow(QMainWindow):
             "© 2024 PatentFlow. All rights reserved."
         )
         
+    @asyncSlot()
     async def disconnect_from_word(self):
         """Disconnect from Word"""
         try:
             await self.connection_manager.disconnect()
+            self.analysis_engine.cancel_all()
             self.current_document = None
             self.current_findings = []
+            self.last_analysis.clear()
             self.findings_tree.clear()
             self.document_view.clear()
             self.analysis_view.clear()
@@ -541,95 +647,63 @@ class MainWindow(QMainWindow):
     def closeEvent(self, event):
         """Handle application close"""
         try:
-            # Disconnect from Word
-            if self.connection_manager.is_connected():
-                asyncio.create_task(self.disconnect_from_word())
-                
             # Save settings
             self.config.save_settings()
-            
+            self.sync_status_indicator.refresh_timer.stop()
             event.accept()
             
         except Exception as e:
             logger.error(f"Error during shutdown: {e}")
             event.accept()
 
+    async def shutdown(self):
+        """Release Word and flush drafts and offline sync once the window has closed"""
+        await asyncio.to_thread(self.analysis_engine.close)
+        self.save_current_draft()
+        await asyncio.to_thread(self.draft_writer.close)
+        try:
+            if self.connection_manager.is_connected():
+                await self.connection_manager.disconnect()
+        except Exception as e:
+            logger.error(f"Disconnect failed during shutdown: {e}")
+        await self.sync_engine.stop()
+        self.offline_search.close()
+        for cache in (self.draft_cache, self.patent_cache, self.analysis_cache):
+            cache.flush()
+
 
 class AnalysisThread(QThread):
     """Worker thread for document analysis"""
     
     completed = pyqtSignal(object)
+    cancelled = pyqtSignal(str)  # Reason
     
-    def __init__(self, document, analysis_type):
+    def __init__(
+        self,
+        engine: AnalysisEngine,
+        document,
+        analysis_type,
+        previous: Optional[AnalysisResult] = None,
+        document_key: Optional[str] = None,
+    ):
         super().__init__()
+        self.engine = engine
         self.document = document
         self.analysis_type = analysis_type
+        self.previous = previous
+        self.document_key = document_key
         
     def run(self):
         """Run analysis in background thread"""
         try:
-            # Mock analysis for now
-            import random
-            from src.models.document import Finding, FindingType, Severity, TextAnchor
-            from datetime import datetime
-            
-            # Generate mock findings
-            findings = []
-            
-            if self.analysis_type in ["claims", "full"]:
-                findings.append(Finding(
-                    id="1",
-                    type=FindingType.ANTECEDENT_BASIS,
-                    severity=Severity.HIGH,
-                    title="Missing Antecedent Basis",
-                    description="Term 'the rotary shaft' lacks proper antecedent basis",
-                    suggestion="Add 'a rotary shaft' in claim 1",
-                    context="3. The system of claim 1, wherein the rotary shaft...",
-                    anchor=TextAnchor(
-                        paragraph_index=10,
-                        start_offset=25,
-                        end_offset=40,
-                        text="the rotary shaft"
-                    )
-                ))
-                
-            if self.analysis_type in ["terminology", "full"]:
-                findings.append(Finding(
-                    id="2",
-                    type=FindingType.TERMINOLOGY_INCONSISTENCY,
-                    severity=Severity.MEDIUM,
-                    title="Inconsistent Terminology",
-                    description="Term 'rotary shaft' appears with different capitalization",
-                    suggestion="Standardize to 'rotary shaft' throughout",
-                    context="Found 'rotary shaft' and 'Rotary Shaft'",
-                    anchor=TextAnchor(
-                        paragraph_index=5,
-                        start_offset=10,
-                        end_offset=25,
-                        text="Rotary Shaft"
-                    )
-                ))
-                
-            # Create mock analysis result
-            from src.models.document import AnalysisResult, AnalysisType, ClaimGraph, ClaimNode, ClaimEdge
-            
-            result = AnalysisResult(
-                analysis_id="mock_analysis",
-                document_id="mock_doc",
-                analysis_type=AnalysisType.FULL_ANALYSIS,
-                findings=findings,
-                summary={
-                    'total_issues': len(findings),
-                    'critical_issues': 0,
-                    'high_issues': 1,
-                    'medium_issues': 1,
-                    'low_issues': 0,
-                    'score': 85
-                }
+            self.completed.emit(
+                self.engine.analyze(
+                    self.document, self.analysis_type, previous=self.previous, document_key=self.document_key
+                )
             )
-            
-            self.completed.emit(result)
-            
+        except AnalysisCancelled as e:
+            logger.info(f"{self.analysis_type} analysis {e.reason}")
+            self.cancelled.emit(e.reason)
         except Exception as e:
             logger.error(f"Analysis thread error: {e}")
-            self.completed.emit(None)
\ No newline at end of file
+            self.completed.emit(None)
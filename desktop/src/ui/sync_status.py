@@ -0,0 +1,115 @@
+"""
+Sync Status Indicator
+Compact status bar widget summarising the offline sync backlog
+"""
+
+from typing import Callable, Optional
+from PyQt6.QtWidgets import QLabel
+from PyQt6.QtCore import QTimer
+
+from src.core.sync_metrics import SyncMetricsSnapshot
+
+
+# Backlog older than this is shown as falling behind
+BEHIND_AFTER_SECONDS = 300
+
+
+def format_duration(seconds: Optional[float]) -> str:
+    """Format seconds as a short human-readable duration"""
+    if seconds is None:
+        return "-"
+    if seconds == float("inf"):
+        return "1h+"
+    if seconds < 1:
+        return f"{seconds * 1000:.0f}ms"
+    if seconds < 60:
+        return f"{seconds:.1f}s"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f}m"
+    return f"{seconds / 3600:.1f}h"
+
+
+def format_bytes(count: int) -> str:
+    """Format a byte count with a binary unit"""
+    size = float(count)
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"  # pragma: no cover - defensive
+
+
+class SyncStatusIndicator(QLabel):
+    """Status bar label polling sync metrics and flagging a lagging backlog"""
+
+    STYLES = {
+        "idle": "color: #8fd694;",
+        "syncing": "color: #6cb6ff;",
+        "behind": "color: #f0b429;",
+        "offline": "color: #ff6b6b;",
+    }
+
+    def __init__(self, snapshot_source: Callable[[], SyncMetricsSnapshot], refresh_ms: int = 2000, parent=None):
+        super().__init__(parent)
+        self.snapshot_source = snapshot_source
+        self.state = "idle"
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(refresh_ms)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.refresh_timer.start()
+        self.refresh()
+
+    def refresh(self):
+        """Pull a fresh snapshot and update text, colour and tooltip"""
+        snapshot = self.snapshot_source()
+        self.state = self.classify(snapshot)
+        self.setText(self.summary_text(snapshot))
+        self.setStyleSheet(self.STYLES[self.state])
+        self.setToolTip(self.tooltip_text(snapshot))
+
+    @staticmethod
+    def classify(snapshot: SyncMetricsSnapshot) -> str:
+        """Map a snapshot to idle, syncing, behind or offline"""
+        if not snapshot.online:
+            return "offline"
+        if not snapshot.total_queued:
+            return "idle"
+        age = snapshot.oldest_task_age_seconds or 0
+        if age > BEHIND_AFTER_SECONDS or snapshot.failures_per_minute > snapshot.successes_per_minute:
+            return "behind"
+        return "syncing"
+
+    @staticmethod
+    def summary_text(snapshot: SyncMetricsSnapshot) -> str:
+        """One-line text shown in the status bar"""
+        if not snapshot.total_queued:
+            text = "Sync: up to date" if snapshot.online else "Sync: offline"
+        else:
+            prefix = "Sync" if snapshot.online else "Sync (offline)"
+            text = (
+                f"{prefix}: {snapshot.total_queued} queued, "
+                f"oldest {format_duration(snapshot.oldest_task_age_seconds)}"
+            )
+        if snapshot.dead_letters:
+            text += f", {snapshot.dead_letters} failed"
+        return text
+
+    @staticmethod
+    def tooltip_text(snapshot: SyncMetricsSnapshot) -> str:
+        """Detailed breakdown for users and support"""
+        depth = ", ".join(f"{kind}: {count}" for kind, count in sorted(snapshot.queue_depth.items())) or "empty"
+        ratio = snapshot.success_ratio
+        lines = [
+            f"Connectivity: {'online' if snapshot.online else 'offline'}",
+            f"Queued: {depth} ({snapshot.in_flight} in flight)",
+            f"Oldest task: {format_duration(snapshot.oldest_task_age_seconds)}",
+            f"Enqueue to ack: p50 {format_duration(snapshot.latency_p50_seconds)}, "
+            f"p95 {format_duration(snapshot.latency_p95_seconds)}",
+            f"Rate: {snapshot.successes_per_minute:.1f} ok/min, {snapshot.failures_per_minute:.1f} failed/min",
+            f"Totals: {snapshot.succeeded} synced, {snapshot.failed} failed attempts"
+            + (f" ({ratio:.0%} success)" if ratio is not None else ""),
+            f"Transferred: {format_bytes(snapshot.bytes_transferred)}",
+            f"Dead letters: {snapshot.dead_letters}",
+        ]
+        return "\n".join(lines)
@@ -51,4 +51,21 @@ class NetworkError(PatentFlowError):
 
 class ValidationError(PatentFlowError):
     """Raised when data validation fails"""
-    pass
\ No newline at end of file
+    pass
+
+
+class CircuitOpenError(NetworkError):
+    """Raised when a circuit breaker is failing fast for an endpoint"""
+
+    def __init__(self, endpoint: str, retry_after: float):
+        super().__init__(f"Circuit open for endpoint '{endpoint}'; retry in {retry_after:.1f}s")
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+
+class AnalysisCancelled(AnalysisError):
+    """Raised inside an analysis run once its cancellation token fires"""
+
+    def __init__(self, reason: str):
+        super().__init__(f"Analysis {reason}")
+        self.reason = reason
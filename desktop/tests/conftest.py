@@ -0,0 +1,67 @@
+"""Shared fixtures for the desktop test suite."""
+
+from __future__ import annotations
+
+import hashlib
+import sys
+from pathlib import Path
+
+import pytest
+from loguru import logger
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.models.document import DocumentSnapshot  # noqa: E402
+
+# Per-task INFO logging dominates the run time of the large-backlog tests.
+logger.remove()
+
+ELEMENTS = ["housing", "shaft", "rotor", "blade", "bearing", "sensor", "valve", "chamber", "seal", "gear"]
+
+
+def make_snapshot(content: str) -> DocumentSnapshot:
+    return DocumentSnapshot(
+        content=content, paragraph_map=[], checksum=hashlib.sha256(content.encode("utf-8")).hexdigest()
+    )
+
+
+def patent_paragraphs(sections: int = 40) -> list:
+    """A small application exercising every built-in rule."""
+
+    paragraphs = [
+        "BACKGROUND",
+        "The field relates to turbines. It is critical that the rotor never stalls.",
+        "SUMMARY",
+        "The present invention provides a rotor assembly as shown in FIG. 1.",
+        "BRIEF DESCRIPTION OF THE DRAWINGS",
+    ]
+    paragraphs += [f"FIG. {i} is a view of the assembly." for i in range(1, 6)]
+    paragraphs.append("DETAILED DESCRIPTION")
+    for i in range(sections):
+        element = ELEMENTS[i % len(ELEMENTS)]
+        other = ELEMENTS[(i * 3 + 1) % len(ELEMENTS)]
+        numeral = 10 + 2 * ELEMENTS.index(element)
+        paragraphs.append(
+            f"The first {element} {numeral} is coupled to the {other} so that the fluid-flow "
+            f"through the Rotary Shaft is steady as shown in FIG. {i % 7 + 1}."
+        )
+    paragraphs.append("The outer seal 40 abuts the valve 40, and a second sensor 20 replaces the sensor 21.")
+    paragraphs.append("What is claimed is:")
+    for number in range(1, 13):
+        if number % 6 == 1:
+            paragraphs.append(
+                f"{number}. A turbine comprising: a housing; a rotary shaft disposed in the housing; "
+                "and a rotor coupled to the shaft, wherein the blade is attached to the rotor."
+            )
+        else:
+            paragraphs.append(
+                f"{number}. The turbine of claim {number - 1 if number != 9 else 14}, wherein the "
+                f"{ELEMENTS[number % len(ELEMENTS)]} includes a seal engaging said bearing preferably."
+            )
+    paragraphs += ["ABSTRACT", "A turbine rotor with a shaft and blades."]
+    return paragraphs
+
+
+@pytest.fixture
+def patent() -> list:
+    return patent_paragraphs()
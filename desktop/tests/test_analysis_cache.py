@@ -0,0 +1,175 @@
+"""Analysis result cache: hits, and misses on any change to text or settings."""
+
+from __future__ import annotations
+
+from dataclasses import replace
+
+import pytest
+from loguru import logger
+
+from conftest import make_snapshot
+from src.core.analysis_cache import AnalysisResultCache, cache_key, decode_result, encode_result
+from src.core.analysis_engine import AnalysisEngine
+from src.core.analysis_rules import DEFAULT_REGISTRY, RuleRegistry
+from src.core.content_store import content_digest
+from src.models.document import AnalysisConfig, Severity
+from test_analysis_engine import BrokenRule
+
+
+def analyze(tmp_path, snapshot, config=None, **kwargs):
+    """Run on a fresh engine and cache, as after a restart, and wait for the cache write."""
+
+    engine = AnalysisEngine(config, cache=AnalysisResultCache(tmp_path))
+    try:
+        return engine.analyze(snapshot, **kwargs)
+    finally:
+        engine.close()
+
+
+@pytest.fixture
+def snapshot(patent):
+    return make_snapshot("\n".join(patent))
+
+
+def is_cached(result) -> bool:
+    return bool(result.metrics.get("cached"))
+
+
+def test_unchanged_text_and_settings_hit(tmp_path, snapshot):
+    first = analyze(tmp_path, snapshot)
+    second = analyze(tmp_path, snapshot)
+
+    assert not is_cached(first)
+    assert is_cached(second)
+    assert [finding.id for finding in second.findings] == [finding.id for finding in first.findings]
+    assert second.summary == first.summary
+    assert second.analysis_id == first.analysis_id
+
+
+def test_edited_text_misses(tmp_path, snapshot, patent):
+    analyze(tmp_path, snapshot)
+    edited = make_snapshot("\n".join(patent[:-1] + ["A turbine rotor with a shaft."]))
+
+    assert not is_cached(analyze(tmp_path, edited))
+
+
+@pytest.mark.parametrize(
+    "changed",
+    [
+        AnalysisConfig(confidence_threshold=0.5),
+        AnalysisConfig(enabled_rules=["antecedent_basis", "red_flag_terms"]),
+        AnalysisConfig(severity_filters=[Severity.HIGH]),
+    ],
+    ids=["confidence_threshold", "enabled_rules", "severity_filters"],
+)
+def test_changed_fingerprint_misses(tmp_path, snapshot, changed):
+    analyze(tmp_path, snapshot)
+
+    assert not is_cached(analyze(tmp_path, snapshot, changed))
+    assert is_cached(analyze(tmp_path, snapshot, changed))
+    assert is_cached(analyze(tmp_path, snapshot))
+
+
+def test_analysis_type_is_part_of_the_key(tmp_path, snapshot):
+    analyze(tmp_path, snapshot)
+
+    assert not is_cached(analyze(tmp_path, snapshot, analysis_type="claims"))
+
+
+def test_engine_version_is_part_of_the_key(tmp_path, snapshot, monkeypatch):
+    analyze(tmp_path, snapshot)
+    monkeypatch.setattr("src.core.analysis_engine.ENGINE_VERSION", "test-next")
+
+    assert not is_cached(analyze(tmp_path, snapshot))
+
+
+def test_results_with_failed_rules_are_not_cached(tmp_path, snapshot):
+    registry = RuleRegistry()
+    for rule in DEFAULT_REGISTRY:
+        registry.register(rule)
+    registry.register(BrokenRule())
+    for _ in range(2):
+        engine = AnalysisEngine(cache=AnalysisResultCache(tmp_path), registry=registry)
+        result = engine.analyze(snapshot)
+        engine.close()
+        assert not is_cached(result)
+
+
+def test_encoding_round_trips(tmp_path, snapshot):
+    result = analyze(tmp_path, snapshot)
+
+    decoded = decode_result(encode_result(result))
+
+    assert decoded == result
+
+
+def test_unreadable_entry_is_dropped(tmp_path, snapshot):
+    analyze(tmp_path, snapshot)
+    cache = AnalysisResultCache(tmp_path)
+    key = cache_key(content_digest(snapshot.content.encode("utf-8")), AnalysisEngine().fingerprint())
+    assert cache.get(key) is not None
+    cache.save_draft(key, "{not json", {})
+
+    assert cache.get(key) is None
+    assert not is_cached(analyze(tmp_path, snapshot))
+
+
+def test_log_lines_name_the_analysis_cache(tmp_path, snapshot):
+    messages = []
+    sink = logger.add(lambda message: messages.append(message.record["message"]), level="INFO")
+    try:
+        analyze(tmp_path, snapshot)
+    finally:
+        logger.remove(sink)
+
+    saved = [message for message in messages if message.startswith("Saved ")]
+    assert saved and all(message.endswith("to the analysis cache") for message in saved)
+    assert not any("draft" in message for message in messages)
+
+
+def put_many(cache: AnalysisResultCache, result, count: int) -> list:
+    keys = [f"{index:064x}" for index in range(count)]
+    for key in keys:
+        cache.put(key, result)
+    return keys
+
+
+def index_writes(cache: AnalysisResultCache, monkeypatch) -> list:
+    writes = []
+    persist = cache._persist_index
+
+    def counting(complete: bool = True):
+        writes.append(complete)
+        persist(complete)
+
+    monkeypatch.setattr(cache, "_persist_index", counting)
+    return writes
+
+
+def test_puts_batch_index_writes_until_flush(tmp_path, snapshot, monkeypatch):
+    result = analyze(tmp_path / "source", snapshot)
+    cache = AnalysisResultCache(tmp_path, index_write_interval=60.0)
+    writes = index_writes(cache, monkeypatch)
+
+    keys = put_many(cache, result, 10)
+    assert writes == [False]
+    cache.flush()
+
+    assert writes == [False, True]
+    reopened = AnalysisResultCache(tmp_path)
+    assert all(reopened.get(key) == result for key in keys)
+
+
+def test_unflushed_puts_are_forgotten_and_their_blobs_deleted(tmp_path, snapshot):
+    result = analyze(tmp_path / "source", snapshot)
+    cache = AnalysisResultCache(tmp_path, index_write_interval=60.0)
+    # Distinct documents, so each result is a distinct blob.
+    for index in range(4):
+        cache.put(f"{index:064x}", replace(result, document_id=f"doc-{index}"))
+    assert len(list(cache.store.root.rglob("*.z"))) == 4
+
+    # No flush, as after a crash: only the first put reached the index.
+    reopened = AnalysisResultCache(tmp_path)
+
+    assert list(reopened.list_records()) == [f"{0:064x}"]
+    assert len(list(reopened.store.root.rglob("*.z"))) == 1
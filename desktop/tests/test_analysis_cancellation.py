@@ -0,0 +1,166 @@
+"""Deadlines, explicit cancellation and supersession of analysis runs."""
+
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from conftest import make_snapshot
+from src.core.analysis_cache import AnalysisResultCache
+from src.core.analysis_engine import AnalysisEngine
+from src.core.analysis_rules import PARAGRAPH_SCOPE, AnalysisRule, RuleRegistry
+from src.core.cancellation import CANCELLED, DEADLINE_EXCEEDED, SUPERSEDED, CancellationToken
+from src.models.document import FindingType
+from src.utils.exceptions import AnalysisCancelled
+
+UNIT_SECONDS = 0.005
+
+
+class SlowRule(AnalysisRule):
+    """Checks each paragraph slowly, passing a checkpoint between paragraphs."""
+
+    finding_type = FindingType.RED_FLAG_TERM
+    name = "slow"
+    scope = PARAGRAPH_SCOPE
+
+    def units(self, doc, context):
+        return (((index, text), (index,)) for index, text in enumerate(doc.paragraphs))
+
+    def check_unit(self, doc, unit, context):
+        time.sleep(UNIT_SECONDS)
+        return []
+
+
+class StuckRule(AnalysisRule):
+    """Never reaches a checkpoint."""
+
+    finding_type = FindingType.MISSING_ELEMENT
+    name = "stuck"
+
+    def check_document(self, doc, context):
+        time.sleep(1.0)
+        return []
+
+
+def registry(*rules) -> RuleRegistry:
+    registry = RuleRegistry()
+    for rule in rules:
+        registry.register(rule)
+    return registry
+
+
+@pytest.fixture
+def snapshot(patent):
+    # About 80 paragraphs: a bit over 0.4 s for an uncancelled run.
+    return make_snapshot("\n".join(patent))
+
+
+def timed(fn):
+    start = time.perf_counter()
+    try:
+        fn()
+    except AnalysisCancelled as exc:
+        return exc.reason, time.perf_counter() - start
+    return "done", time.perf_counter() - start
+
+
+def test_run_stops_at_the_time_limit(snapshot):
+    engine = AnalysisEngine(registry=registry(SlowRule()), max_processing_time=0.05)
+
+    reason, elapsed = timed(lambda: engine.analyze(snapshot))
+
+    assert reason == DEADLINE_EXCEEDED
+    assert elapsed < 0.2
+
+
+def test_rule_without_checkpoints_cannot_hold_the_caller_past_the_deadline(snapshot):
+    engine = AnalysisEngine(registry=registry(StuckRule()), max_processing_time=0.1)
+
+    reason, elapsed = timed(lambda: engine.analyze(snapshot))
+
+    assert reason == DEADLINE_EXCEEDED
+    assert elapsed < 0.5
+
+
+def test_explicit_cancellation_stops_the_run(snapshot):
+    engine = AnalysisEngine(registry=registry(SlowRule()))
+    token = CancellationToken()
+    threading.Timer(0.05, token.cancel).start()
+
+    reason, elapsed = timed(lambda: engine.analyze(snapshot, token=token))
+
+    assert reason == CANCELLED
+    assert elapsed < 0.2
+
+
+def test_cancelled_token_stops_the_run_before_it_starts(snapshot):
+    engine = AnalysisEngine(registry=registry(SlowRule()))
+    token = CancellationToken()
+    token.cancel()
+
+    assert timed(lambda: engine.analyze(snapshot, token=token))[0] == CANCELLED
+
+
+def run_in_thread(engine, snapshot, document_key, outcomes, name):
+    def target():
+        outcomes[name] = timed(lambda: engine.analyze(snapshot, document_key=document_key))
+
+    thread = threading.Thread(target=target)
+    thread.start()
+    return thread
+
+
+def test_newer_run_for_the_same_document_supersedes_the_older(snapshot):
+    engine = AnalysisEngine(registry=registry(SlowRule()), max_workers=2)
+    outcomes = {}
+
+    first = run_in_thread(engine, snapshot, "doc-1", outcomes, "first")
+    time.sleep(0.05)
+    second = run_in_thread(engine, snapshot, "doc-1", outcomes, "second")
+    first.join()
+    second.join()
+
+    assert outcomes["first"][0] == SUPERSEDED
+    assert outcomes["first"][1] < 0.2
+    assert outcomes["second"][0] == "done"
+
+
+def test_runs_for_other_documents_are_not_superseded(snapshot):
+    engine = AnalysisEngine(registry=registry(SlowRule()), max_workers=2)
+    outcomes = {}
+
+    first = run_in_thread(engine, snapshot, "doc-1", outcomes, "first")
+    time.sleep(0.05)
+    second = run_in_thread(engine, snapshot, "doc-2", outcomes, "second")
+    first.join()
+    second.join()
+
+    assert outcomes["first"][0] == "done"
+    assert outcomes["second"][0] == "done"
+
+
+def test_cancel_all_stops_keyed_runs(snapshot):
+    engine = AnalysisEngine(registry=registry(SlowRule()))
+    outcomes = {}
+
+    thread = run_in_thread(engine, snapshot, "doc-1", outcomes, "run")
+    time.sleep(0.05)
+    engine.cancel_all()
+    thread.join()
+
+    assert outcomes["run"][0] == CANCELLED
+
+
+def test_cancelled_run_is_not_cached(tmp_path, snapshot):
+    cache = AnalysisResultCache(tmp_path)
+    engine = AnalysisEngine(registry=registry(SlowRule()), cache=cache, max_processing_time=0.05)
+
+    assert timed(lambda: engine.analyze(snapshot))[0] == DEADLINE_EXCEEDED
+
+    engine.max_processing_time = None
+    result = engine.analyze(snapshot)
+    engine.close()
+    assert not result.metrics.get("cached")
+    assert len(cache.list_records()) == 1
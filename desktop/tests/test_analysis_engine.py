@@ -0,0 +1,104 @@
+"""Rule-based analysis engine."""
+
+from __future__ import annotations
+
+from collections import Counter
+
+import pytest
+
+from conftest import make_snapshot
+from src.core.analysis_engine import AnalysisEngine
+from src.core.analysis_rules import DEFAULT_REGISTRY, AnalysisRule, RuleRegistry
+from src.models.document import AnalysisConfig, AnalysisType, FindingType, Severity
+
+
+@pytest.fixture
+def engine():
+    engine = AnalysisEngine()
+    yield engine
+    engine.close()
+
+
+def by_rule(result) -> Counter:
+    return Counter(finding.metadata["rule"] for finding in result.findings)
+
+
+def test_full_analysis_reports_every_rule_family(engine, patent):
+    result = engine.analyze(make_snapshot("\n".join(patent)))
+
+    assert result.analysis_type is AnalysisType.FULL_ANALYSIS
+    assert set(by_rule(result)) >= {
+        "antecedent_basis", "claim_dependency", "missing_element",
+        "reference_numeral", "red_flag_terms", "terminology_consistency",
+    }
+    assert result.summary["total_issues"] == len(result.findings)
+    assert result.metrics["rules_run"] == len(engine.rules("full"))
+    assert result.metrics["rules_failed"] == []
+    assert result.metrics["claims"] == 12
+
+
+def test_claims_analysis_runs_only_claim_rules(engine, patent):
+    result = engine.analyze(make_snapshot("\n".join(patent)), analysis_type="claims")
+
+    assert result.analysis_type is AnalysisType.CLAIMS_ANALYSIS
+    assert set(by_rule(result)) <= {rule.name for rule in DEFAULT_REGISTRY.select((), "claims")}
+    assert "reference_numeral" not in by_rule(result)
+
+
+def test_unknown_analysis_type_is_rejected(engine, patent):
+    with pytest.raises(ValueError):
+        engine.analyze(make_snapshot("\n".join(patent)), analysis_type="prior-art")
+
+
+def test_results_are_deterministic_with_unique_ids(patent):
+    snapshot = make_snapshot("\n".join(patent))
+    first = AnalysisEngine(max_workers=1).analyze(snapshot)
+    second = AnalysisEngine(max_workers=4).analyze(snapshot)
+
+    assert [finding.id for finding in first.findings] == [finding.id for finding in second.findings]
+    assert len({finding.id for finding in first.findings}) == len(first.findings)
+
+
+def test_enabled_rules_and_severity_filters_narrow_the_run(patent):
+    snapshot = make_snapshot("\n".join(patent))
+
+    only_flags = AnalysisEngine(AnalysisConfig(enabled_rules=["red_flag_terms"])).analyze(snapshot)
+    high_only = AnalysisEngine(AnalysisConfig(severity_filters=[Severity.HIGH])).analyze(snapshot)
+
+    assert set(by_rule(only_flags)) == {"red_flag_terms"}
+    assert only_flags.metrics["rules_run"] == 1
+    assert high_only.findings
+    assert {finding.severity for finding in high_only.findings} == {Severity.HIGH}
+
+
+def test_claim_graph_follows_dependencies(engine, patent):
+    result = engine.analyze(make_snapshot("\n".join(patent)))
+
+    edges = {(edge.from_node, edge.to_node) for edge in result.claim_graph.edges}
+    nodes = {node.claim_number: node for node in result.claim_graph.nodes}
+    assert len(nodes) == 12
+    assert ("claim_2", "claim_1") in edges
+    assert nodes[1].claim_type == "independent"
+    assert nodes[2].claim_type == "dependent"
+    assert sum(node.issue_count for node in nodes.values()) > 0
+
+
+class BrokenRule(AnalysisRule):
+    finding_type = FindingType.RED_FLAG_TERM
+    name = "broken"
+
+    def check_document(self, doc, context):
+        raise RuntimeError("boom")
+
+
+def test_a_failing_rule_does_not_cost_the_other_findings(patent):
+    registry = RuleRegistry()
+    for rule in DEFAULT_REGISTRY:
+        registry.register(rule)
+    registry.register(BrokenRule())
+    snapshot = make_snapshot("\n".join(patent))
+
+    result = AnalysisEngine(registry=registry).analyze(snapshot)
+
+    assert result.metrics["rules_failed"] == ["broken"]
+    assert len(result.findings) == len(AnalysisEngine().analyze(snapshot).findings)
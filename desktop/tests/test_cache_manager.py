@@ -0,0 +1,139 @@
+"""One byte budget and global LRU order across the local caches."""
+
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from src.core.cache_manager import CacheManager
+from src.core.config import AnalysisConfig
+from src.core.offline_cache import OfflineDraftCache
+
+MB = 1024 * 1024
+
+
+class Clock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def time(self) -> float:
+        self.now += 1.0
+        return self.now
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr("src.core.offline_cache.time", clock)
+    return clock
+
+
+def body(kilobytes: int) -> str:
+    # Hex of random bytes stores in a little over ``kilobytes`` KB (about 1.16x).
+    return os.urandom(kilobytes * 1024).hex()
+
+
+def caches(tmp_path, budget_bytes: int, enabled: bool = True):
+    manager = CacheManager(budget_bytes, enabled=enabled)
+    drafts = OfflineDraftCache(tmp_path, dirname="drafts")
+    patents = OfflineDraftCache(tmp_path, filename=None, dirname="patents")
+    manager.register(drafts)
+    manager.register(patents, optional=True)
+    return manager, drafts, patents
+
+
+def keys(*stores):
+    return [sorted(cache.list_records()) for cache in stores]
+
+
+def test_least_recently_used_entries_go_first_across_caches(tmp_path):
+    manager, drafts, patents = caches(tmp_path, budget_bytes=500 * 1024)
+    drafts.save_draft("d1", body(100))
+    patents.save_draft("p1", body(100))
+    drafts.save_draft("d2", body(100))
+    patents.save_draft("p2", body(100))
+    assert keys(drafts, patents) == [["d1", "d2"], ["p1", "p2"]]
+
+    drafts.load_draft("d1")
+    patents.save_draft("p3", body(100))
+
+    assert keys(drafts, patents) == [["d1", "d2"], ["p2", "p3"]]
+    drafts.save_draft("d3", body(100))
+    assert keys(drafts, patents) == [["d1", "d3"], ["p2", "p3"]]
+    assert manager.total_bytes() <= manager.budget_bytes
+
+
+def test_total_stays_within_budget_after_every_write(tmp_path):
+    manager, drafts, patents = caches(tmp_path, budget_bytes=MB)
+    for index in range(30):
+        cache = drafts if index % 3 else patents
+        cache.save_draft(f"doc-{index}", body(50 + 5 * index))
+        assert manager.total_bytes() <= manager.budget_bytes
+
+    stats = manager.stats()
+    assert stats["drafts"].evictions + stats["patents"].evictions > 0
+    assert stats["drafts"].evicted_bytes + stats["patents"].evicted_bytes > 0
+
+
+def test_entry_being_written_survives_even_over_budget(tmp_path):
+    manager, drafts, patents = caches(tmp_path, budget_bytes=100 * 1024)
+    patents.save_draft("p1", body(25))
+
+    drafts.save_draft("huge", body(500))
+
+    assert keys(drafts, patents) == [["huge"], []]
+    assert drafts.load_draft("huge") is not None
+
+
+def test_configure_applies_a_smaller_budget_at_once(tmp_path):
+    manager, drafts, patents = caches(tmp_path, budget_bytes=8 * MB)
+    for index in range(6):
+        drafts.save_draft(f"d{index}", body(400))
+
+    manager.configure(AnalysisConfig(cache_size_mb=1))
+
+    assert manager.budget_bytes == MB
+    assert manager.total_bytes() <= MB
+    assert keys(drafts) == [["d4", "d5"]]
+
+
+def test_configure_disabling_caching_stops_optional_caches_only(tmp_path):
+    manager, drafts, patents = caches(tmp_path, budget_bytes=8 * MB)
+
+    manager.configure(AnalysisConfig(cache_enabled=False))
+    drafts.save_draft("d1", body(10))
+    patents.save_draft("p1", body(10))
+
+    assert keys(drafts, patents) == [["d1"], []]
+    manager.configure(AnalysisConfig(cache_enabled=True))
+    patents.save_draft("p1", body(10))
+    assert keys(patents) == [["p1"]]
+
+
+def test_registering_over_budget_caches_evicts(tmp_path):
+    drafts = OfflineDraftCache(tmp_path)
+    for index in range(4):
+        drafts.save_draft(f"d{index}", body(100))
+
+    manager = CacheManager(budget_bytes=300 * 1024)
+    manager.register(drafts)
+
+    assert keys(drafts) == [["d2", "d3"]]
+
+
+def test_hits_and_misses_are_counted_per_cache(tmp_path):
+    manager, drafts, patents = caches(tmp_path, budget_bytes=MB)
+    drafts.save_draft("d1", body(1))
+    drafts.load_draft("d1")
+    drafts.load_draft("d2")
+    patents.load_draft("p1")
+
+    snapshot = manager.snapshot()
+
+    assert snapshot["caches"]["drafts"]["hits"] == 1
+    assert snapshot["caches"]["drafts"]["hit_ratio"] == 0.5
+    assert snapshot["caches"]["patents"]["misses"] == 1
@@ -0,0 +1,183 @@
+"""Chunked uploads against a failure-injecting stand-in server."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import itertools
+from collections import Counter
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.core.api_client import ApiClient
+from src.core.chunked_upload import ChunkedUploader, UploadProgressStore, encode_payload
+from src.core.config import ApiConfig
+from src.core.rate_limit import RateLimiter
+from src.core.retry_policy import RetryBudget, RetryPolicy
+
+CHUNK_SIZE = 256
+PAYLOAD = {"documentId": "doc-1", "content": "".join(f"paragraph {i}. " for i in range(200))}
+
+
+class UploadBackend:
+    """In-memory implementation of the chunked upload protocol."""
+
+    def __init__(self):
+        self.sessions = {}
+        self.ids = itertools.count(1)
+        self.puts = Counter()
+        self.session_keys = []
+        self.fail_chunk = {}  # chunk index -> statuses to return before accepting it
+        self.expired = set()
+        self.completed = []
+        self.single_shot = []
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/analysis/upload", self.upload)
+        app.router.add_post("/analysis/upload/sessions", self.create)
+        app.router.add_get("/analysis/upload/sessions/{id}", self.status)
+        app.router.add_put("/analysis/upload/sessions/{id}/chunks/{index}", self.chunk)
+        app.router.add_post("/analysis/upload/sessions/{id}/complete", self.complete)
+        return app
+
+    async def upload(self, request: web.Request) -> web.Response:
+        self.single_shot.append(await request.json())
+        return web.json_response({"documentId": "doc-1", "mode": "single"})
+
+    async def create(self, request: web.Request) -> web.Response:
+        self.session_keys.append(request.headers.get("Idempotency-Key"))
+        body = await request.json()
+        upload_id = f"u{next(self.ids)}"
+        self.sessions[upload_id] = {"meta": body, "chunks": {}}
+        return web.json_response({"uploadId": upload_id})
+
+    def _session(self, request: web.Request):
+        upload_id = request.match_info["id"]
+        if upload_id in self.expired or upload_id not in self.sessions:
+            raise web.HTTPNotFound()
+        return self.sessions[upload_id]
+
+    async def status(self, request: web.Request) -> web.Response:
+        chunks = self._session(request)["chunks"]
+        received = 0
+        while received in chunks:
+            received += 1
+        return web.json_response({"received": received})
+
+    async def chunk(self, request: web.Request) -> web.Response:
+        session = self._session(request)
+        index = int(request.match_info["index"])
+        self.puts[index] += 1
+        pending = self.fail_chunk.get(index)
+        if pending:
+            return web.Response(status=pending.pop(0))
+        body = await request.read()
+        if hashlib.sha256(body).hexdigest() != request.headers["X-Chunk-Checksum"]:
+            return web.Response(status=400)
+        session["chunks"][index] = body
+        return web.json_response({"index": index})
+
+    async def complete(self, request: web.Request) -> web.Response:
+        session = self._session(request)
+        chunks = session["chunks"]
+        data = b"".join(chunks[i] for i in range(session["meta"]["chunkCount"]))
+        body = await request.json()
+        assert hashlib.sha256(data).hexdigest() == body["checksum"]
+        self.completed.append(data)
+        return web.json_response({"documentId": "doc-1", "mode": "chunked"})
+
+
+def run(backend: UploadBackend, store: UploadProgressStore, scenario, max_attempts: int = 3):
+    async def main():
+        async with TestServer(backend.app()) as server:
+            client = ApiClient(
+                ApiConfig(analysis_base_url=str(server.make_url("/analysis"))),
+                retry_policy=RetryPolicy(
+                    max_attempts=max_attempts, base_delay=0.001, max_delay=0.01, failure_threshold=100,
+                    budget=RetryBudget(ratio=1.0, capacity=100.0),
+                ),
+                rate_limiter=RateLimiter(enabled=False),
+            )
+            try:
+                return await scenario(ChunkedUploader(client, store, chunk_size=CHUNK_SIZE))
+            finally:
+                await client.close()
+
+    return asyncio.run(main())
+
+
+@pytest.fixture
+def store(tmp_path) -> UploadProgressStore:
+    return UploadProgressStore(tmp_path)
+
+
+def chunk_count() -> int:
+    return -(-len(encode_payload(PAYLOAD)) // CHUNK_SIZE)
+
+
+def test_small_payload_is_sent_in_one_request(store):
+    backend = UploadBackend()
+
+    result = run(backend, store, lambda uploader: uploader.upload({"documentId": "doc-1"}))
+
+    assert result["mode"] == "single"
+    assert backend.single_shot == [{"documentId": "doc-1"}]
+    assert not backend.sessions
+
+
+def test_large_payload_is_reassembled_from_checksummed_chunks(store):
+    backend = UploadBackend()
+
+    result = run(backend, store, lambda uploader: uploader.upload(PAYLOAD, idempotency_key="task-1"))
+
+    assert result["mode"] == "chunked"
+    assert backend.completed == [encode_payload(PAYLOAD)]
+    assert all(count == 1 for count in backend.puts.values())
+    assert len(backend.puts) == chunk_count() > 3
+    assert list(store.root.iterdir()) == []
+
+
+def test_transient_chunk_failure_retries_only_that_chunk(store):
+    backend = UploadBackend()
+    backend.fail_chunk[2] = [503, 502]
+
+    run(backend, store, lambda uploader: uploader.upload(PAYLOAD))
+
+    assert backend.puts[2] == 3
+    assert all(count == 1 for index, count in backend.puts.items() if index != 2)
+    assert backend.completed == [encode_payload(PAYLOAD)]
+
+
+def test_upload_resumes_from_the_last_acknowledged_chunk(store):
+    backend = UploadBackend()
+    backend.fail_chunk[3] = [503]
+
+    with pytest.raises(aiohttp.ClientResponseError):
+        run(backend, store, lambda uploader: uploader.upload(PAYLOAD), max_attempts=1)
+    assert not backend.completed
+
+    # A new uploader stands in for a restarted app: only progress on disk survives.
+    run(backend, store, lambda uploader: uploader.upload(PAYLOAD))
+
+    assert len(backend.sessions) == 1
+    assert [backend.puts[i] for i in range(3)] == [1, 1, 1]
+    assert backend.puts[3] == 2
+    assert backend.completed == [encode_payload(PAYLOAD)]
+
+
+def test_expired_session_is_recreated_under_a_new_idempotency_key(store):
+    backend = UploadBackend()
+    backend.fail_chunk[1] = [503]
+
+    with pytest.raises(aiohttp.ClientResponseError):
+        run(backend, store, lambda uploader: uploader.upload(PAYLOAD, idempotency_key="task-1"), max_attempts=1)
+    backend.expired.add("u1")
+
+    run(backend, store, lambda uploader: uploader.upload(PAYLOAD, idempotency_key="task-1"))
+
+    assert backend.session_keys == ["task-1:session:0", "task-1:session:1"]
+    assert backend.completed == [encode_payload(PAYLOAD)]
@@ -0,0 +1,170 @@
+"""Block-compressed, content-addressed blobs."""
+
+from __future__ import annotations
+
+import zlib
+
+import pytest
+
+from src.core.content_store import BlobReader, ContentStore, content_digest
+from src.core.offline_cache import OfflineDraftCache
+
+BLOCK = 64
+
+# Multi-byte characters land on block boundaries at this block size.
+TEXT = "".join(f"{i:04d} Prüfung – “läuft” ✓\n" for i in range(100))
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ContentStore(tmp_path / "objects", block_size=BLOCK)
+
+
+def test_round_trip_and_deduplication(store):
+    digest, size = store.put(TEXT)
+
+    assert digest == content_digest(TEXT.encode("utf-8"))
+    assert store.get(digest) == TEXT
+    assert store.put(TEXT) == (digest, size)
+    assert store.stored_size(digest) == size
+
+
+def test_empty_text_round_trips(store):
+    digest, _ = store.put("")
+
+    assert store.get(digest) == ""
+
+
+def test_reads_decode_only_the_blocks_they_touch(store):
+    data = TEXT.encode("utf-8")
+    digest, _ = store.put(TEXT)
+
+    with store.open(digest) as blob:
+        assert blob.block_count == -(-len(data) // BLOCK)
+        for offset, length in [(0, 10), (BLOCK - 3, 7), (5 * BLOCK + 1, 3 * BLOCK), (len(data) - 5, 100), (len(data), 1)]:
+            assert blob.read(offset, length) == data[offset:offset + length]
+        assert blob.read() == data
+
+
+def test_text_is_decoded_across_block_boundaries(store):
+    digest, _ = store.put(TEXT)
+
+    with store.open(digest) as blob:
+        chunks = list(blob.iter_text())
+
+    assert len(chunks) > 1
+    assert "".join(chunks) == TEXT
+
+
+def test_in_memory_reader_matches_the_stored_one():
+    data = TEXT.encode("utf-8")
+
+    blob = BlobReader.from_bytes(data, block_size=BLOCK)
+
+    assert blob.read(100, 50) == data[100:150]
+    assert blob.text() == TEXT
+
+
+def test_legacy_single_stream_blob_is_readable(store):
+    digest = content_digest(TEXT.encode("utf-8"))
+    store.path(digest).parent.mkdir(parents=True)
+    store.path(digest).write_bytes(zlib.compress(TEXT.encode("utf-8")))
+
+    assert store.get(digest) == TEXT
+    with store.open(digest) as blob:
+        assert blob.read(3, 4) == TEXT.encode("utf-8")[3:7]
+
+
+@pytest.mark.parametrize("keep", [0, 3, 12, 40, -20], ids=["empty", "magic", "header", "offsets", "tail"])
+def test_truncated_blob_raises_value_error(store, keep):
+    digest, _ = store.put(TEXT)
+    path = store.path(digest)
+    path.write_bytes(path.read_bytes()[:keep])
+
+    with pytest.raises(ValueError):
+        store.get(digest)
+
+
+def test_corrupt_block_raises_only_when_read(store):
+    digest, _ = store.put(TEXT)
+    path = store.path(digest)
+    data = bytearray(path.read_bytes())
+    data[-10:] = b"\xff" * 10
+    path.write_bytes(bytes(data))
+
+    with store.open(digest) as blob:
+        assert blob.read(0, BLOCK) == TEXT.encode("utf-8")[:BLOCK]
+        with pytest.raises(ValueError):
+            blob.read(blob.size - 1, 1)
+
+
+def test_corrupt_legacy_blob_raises_value_error(store):
+    digest = content_digest(TEXT.encode("utf-8"))
+    store.path(digest).parent.mkdir(parents=True)
+    store.path(digest).write_bytes(zlib.compress(TEXT.encode("utf-8"))[:-8])
+
+    with pytest.raises(ValueError):
+        store.open(digest)
+
+
+def test_delete_removes_the_empty_fan_out_directory(store):
+    digest, _ = store.put(TEXT)
+
+    store.delete(digest)
+    store.delete(digest)
+
+    assert digest not in store
+    assert not store.path(digest).parent.exists()
+
+
+def cached(tmp_path) -> OfflineDraftCache:
+    cache = OfflineDraftCache(tmp_path)
+    cache.save_draft("doc-1", TEXT * 100)
+    return cache
+
+
+def test_draft_cache_reads_legacy_blobs(tmp_path):
+    cache = cached(tmp_path)
+    path = cache.store.path(cache.get_record("doc-1").digest)
+    path.write_bytes(zlib.compress((TEXT * 100).encode("utf-8")))
+
+    reopened = OfflineDraftCache(tmp_path)
+
+    assert reopened.load_draft("doc-1").content == TEXT * 100
+    with reopened.open_draft("doc-1") as blob:
+        assert blob.text() == TEXT * 100
+
+
+@pytest.mark.parametrize("damage", ["header", "tail", "offsets", "delete"])
+@pytest.mark.parametrize("read", ["load_draft", "open_draft"])
+def test_draft_cache_discards_a_damaged_blob(tmp_path, damage, read):
+    cache = cached(tmp_path)
+    path = cache.store.path(cache.get_record("doc-1").digest)
+    data = path.read_bytes()
+    if damage == "header":
+        path.write_bytes(data[:30])
+    elif damage == "tail":
+        path.write_bytes(data[:-100])
+    elif damage == "offsets":
+        path.write_bytes(data[:28] + b"\x00" * 8 + data[36:])
+    else:
+        path.unlink()
+
+    reopened = OfflineDraftCache(tmp_path)
+
+    assert getattr(reopened, read)("doc-1") is None
+    assert reopened.get_record("doc-1") is None
+    assert not path.exists()
+
+
+def test_draft_cache_discards_a_blob_with_a_corrupt_block(tmp_path):
+    cache = cached(tmp_path)
+    path = cache.store.path(cache.get_record("doc-1").digest)
+    data = bytearray(path.read_bytes())
+    data[-50:-40] = b"\xff" * 10
+    path.write_bytes(bytes(data))
+
+    reopened = OfflineDraftCache(tmp_path)
+
+    assert reopened.load_draft("doc-1") is None
+    assert not path.exists()
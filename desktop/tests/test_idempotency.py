@@ -0,0 +1,78 @@
+"""Idempotency keys and the journal of acknowledged ones."""
+
+from __future__ import annotations
+
+import pytest
+
+from src.core.idempotency import AcknowledgedKeys, idempotency_key
+
+
+class Clock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr("src.core.idempotency.time", clock)
+    return clock
+
+
+def test_key_is_stable_per_task():
+    assert idempotency_key("task-1") == idempotency_key("task-1")
+    assert idempotency_key("task-1") != idempotency_key("task-2")
+
+
+def test_acknowledged_key_survives_a_reopen(tmp_path, clock):
+    keys = AcknowledgedKeys(tmp_path)
+    keys.record("a")
+    keys.close()
+
+    reopened = AcknowledgedKeys(tmp_path)
+
+    assert "a" in reopened
+    assert "b" not in reopened
+
+
+def test_expired_keys_are_forgotten(tmp_path, clock):
+    keys = AcknowledgedKeys(tmp_path, retention_seconds=60)
+    keys.record("old")
+    clock.now += 30
+    keys.record("recent")
+    clock.now += 45
+
+    assert "old" not in keys
+    keys.record("new")
+    assert len(keys) == 2
+    keys.close()
+
+    reopened = AcknowledgedKeys(tmp_path, retention_seconds=60)
+    assert ("old" in reopened, "recent" in reopened, "new" in reopened) == (False, True, True)
+
+
+def test_re_acknowledged_key_is_kept_from_its_latest_acknowledgement(tmp_path, clock):
+    keys = AcknowledgedKeys(tmp_path, retention_seconds=60)
+    keys.record("a")
+    keys.record("b")
+    clock.now += 40
+    keys.record("a")
+    clock.now += 40
+    keys.record("c")
+
+    assert ("a" in keys, "b" in keys, "c" in keys) == (True, False, True)
+
+
+def test_journal_is_compacted_as_keys_expire(tmp_path, clock):
+    keys = AcknowledgedKeys(tmp_path, retention_seconds=10, compact_min_records=8)
+    for index in range(200):
+        keys.record(f"key-{index}")
+        clock.now += 1
+
+    assert len(keys) == 11
+    assert keys.journal.record_count <= 11 + 2 * 8
+    keys.close()
+    assert len(AcknowledgedKeys(tmp_path, retention_seconds=10)) == 10
@@ -0,0 +1,113 @@
+"""Incremental re-analysis must give the same result as a full run."""
+
+from __future__ import annotations
+
+import pytest
+
+from conftest import make_snapshot
+from src.core.analysis_engine import AnalysisEngine
+from src.models.document import AnalysisConfig
+
+
+def signature(result):
+    """Everything a user sees of a result, without the run's own id and timings."""
+
+    findings = [
+        (
+            finding.id, finding.type, finding.severity, finding.title, finding.description,
+            finding.suggestion, finding.context, finding.anchor, finding.metadata, finding.confidence,
+        )
+        for finding in result.findings
+    ]
+    return findings, result.summary, result.claim_graph
+
+
+def claim_index(paragraphs, number: int) -> int:
+    return next(i for i, text in enumerate(paragraphs) if text.startswith(f"{number}. "))
+
+
+def spec_index(paragraphs) -> int:
+    return paragraphs.index("DETAILED DESCRIPTION") + 3
+
+
+EDITS = {
+    "typo in a spec paragraph": lambda p: (
+        p[:spec_index(p)] + [p[spec_index(p)].replace("steady", "stedy") + " It must work."] + p[spec_index(p) + 1:]
+    ),
+    "paragraph inserted at the top": lambda p: (
+        p[:1] + ["A new non-return valve 99 and a non return valve 98 are provided."] + p[1:]
+    ),
+    "paragraph appended to the spec": lambda p: (
+        p[:spec_index(p)] + ["The third gear 26 always engages the seal."] + p[spec_index(p):]
+    ),
+    "claim edited": lambda p: (
+        p[:claim_index(p, 5)] + [p[claim_index(p, 5)].replace("said bearing", "said widget")] + p[claim_index(p, 5) + 1:]
+    ),
+    "claim deleted": lambda p: [text for text in p if not text.startswith("2. ")],
+    "claim inserted": lambda p: (
+        p[:claim_index(p, 4)] + ["4. The turbine of claim 3, wherein the said gear is critical."] + p[claim_index(p, 4):]
+    ),
+    "abstract rewritten": lambda p: p[:-1] + [" ".join(["A turbine rotor with a shaft and blades."] * 40)],
+    "paragraphs swapped": lambda p: p[:1] + [p[3], p[2], p[1]] + p[4:],
+}
+
+
+@pytest.mark.parametrize("config", [AnalysisConfig(), AnalysisConfig(confidence_threshold=0.0)], ids=["default", "all"])
+@pytest.mark.parametrize("edit", sorted(EDITS))
+def test_incremental_result_equals_full_result(patent, edit, config):
+    engine = AnalysisEngine(config)
+    previous = engine.analyze(make_snapshot("\n".join(patent)))
+    edited = make_snapshot("\n".join(EDITS[edit](patent)))
+
+    incremental = engine.analyze(edited, previous=previous)
+    full = AnalysisEngine(config).analyze(edited)
+
+    assert incremental.metrics["incremental"]
+    assert incremental.metrics["units_reused"] > incremental.metrics["units_checked"]
+    assert signature(incremental) == signature(full)
+    engine.close()
+
+
+def test_chained_edits_stay_equal_to_full_runs(patent):
+    engine = AnalysisEngine()
+    result = engine.analyze(make_snapshot("\n".join(patent)))
+    paragraphs = patent
+    for edit in sorted(EDITS):
+        paragraphs = EDITS[edit](paragraphs)
+        snapshot = make_snapshot("\n".join(paragraphs))
+        result = engine.analyze(snapshot, previous=result)
+        assert signature(result) == signature(AnalysisEngine().analyze(snapshot)), edit
+    engine.close()
+
+
+def test_unchanged_document_reuses_every_unit(patent):
+    engine = AnalysisEngine()
+    snapshot = make_snapshot("\n".join(patent))
+    previous = engine.analyze(snapshot)
+
+    again = engine.analyze(snapshot, previous=previous)
+
+    assert again.metrics["units_checked"] == 0
+    assert signature(again) == signature(previous)
+
+
+def test_previous_run_under_other_settings_runs_in_full(patent):
+    engine = AnalysisEngine()
+    snapshot = make_snapshot("\n".join(patent))
+    previous = engine.analyze(snapshot)
+    engine.config = AnalysisConfig(confidence_threshold=0.0)
+
+    result = engine.analyze(snapshot, previous=previous)
+
+    assert not result.metrics["incremental"]
+    assert result.metrics["units_reused"] == 0
+
+
+def test_previous_result_from_another_engine_runs_in_full(patent):
+    snapshot = make_snapshot("\n".join(patent))
+    previous = AnalysisEngine().analyze(snapshot)
+
+    result = AnalysisEngine().analyze(snapshot, previous=previous)
+
+    assert not result.metrics["incremental"]
+    assert signature(result) == signature(previous)
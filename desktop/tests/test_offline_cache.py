@@ -0,0 +1,162 @@
+"""Offline draft cache: content-addressed bodies behind a JSON index."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from datetime import datetime
+
+from src.core.offline_cache import OfflineDraftCache
+
+
+def body(lines: int = 200, tag: str = "") -> str:
+    # Hashes keep the text from compressing to almost nothing, as real prose would not.
+    return "".join(
+        f"Paragraph {i}{tag}: the rotor 12 turns the shaft 14 — “steady” {hashlib.sha1(str(i).encode()).hexdigest()}.\n"
+        for i in range(lines)
+    )
+
+
+def blob_files(cache: OfflineDraftCache) -> list:
+    return sorted(path for path in cache.store.root.rglob("*.z"))
+
+
+def test_draft_round_trips_across_a_reopen(tmp_path):
+    cache = OfflineDraftCache(tmp_path)
+    cache.save_draft("doc-1", body(), {"title": "Turbine"})
+
+    entry = OfflineDraftCache(tmp_path).load_draft("doc-1")
+
+    assert entry.content == body()
+    assert entry.metadata == {"title": "Turbine"}
+    assert OfflineDraftCache(tmp_path).load_draft("doc-2") is None
+
+
+def test_identical_bodies_are_stored_once(tmp_path):
+    cache = OfflineDraftCache(tmp_path)
+    cache.save_draft("doc-1", body())
+    cache.save_draft("doc-2", body())
+
+    assert len(blob_files(cache)) == 1
+    cache.remove_draft("doc-1")
+    assert OfflineDraftCache(tmp_path).load_draft("doc-2").content == body()
+    cache.remove_draft("doc-2")
+    assert blob_files(cache) == []
+    assert cache.total_bytes() == 0
+
+
+def test_index_loads_without_reading_bodies(tmp_path):
+    cache = OfflineDraftCache(tmp_path)
+    cache.save_draft("doc-1", body())
+    for path in blob_files(cache):
+        path.unlink()
+
+    reopened = OfflineDraftCache(tmp_path)
+
+    assert reopened.get_record("doc-1").size == len(body())
+    assert reopened.total_bytes() == cache.total_bytes()
+
+
+def test_legacy_single_file_cache_is_migrated(tmp_path):
+    legacy = {
+        "doc-1": {"document_id": "doc-1", "content": body(), "updated_at": datetime(2024, 1, 1).isoformat(), "metadata": {"v": 1}},
+    }
+    (tmp_path / "drafts.json").write_text(json.dumps(legacy), encoding="utf-8")
+
+    cache = OfflineDraftCache(tmp_path)
+
+    assert not (tmp_path / "drafts.json").exists()
+    entry = cache.load_draft("doc-1")
+    assert (entry.content, entry.metadata, entry.updated_at) == (body(), {"v": 1}, datetime(2024, 1, 1))
+
+
+def test_clear_deletes_every_blob(tmp_path):
+    cache = OfflineDraftCache(tmp_path)
+    for index in range(3):
+        cache.save_draft(f"doc-{index}", body(tag=str(index)))
+
+    cache.clear()
+
+    assert blob_files(cache) == []
+    assert OfflineDraftCache(tmp_path).list_records() == {}
+
+
+def edit(text: str, line: int, replacement: str) -> str:
+    lines = text.splitlines(keepends=True)
+    lines[line] = replacement
+    return "".join(lines)
+
+
+def test_small_edits_are_stored_as_a_delta_chain(tmp_path):
+    cache = OfflineDraftCache(tmp_path)
+    versions = [body()]
+    for index in range(5):
+        versions.append(edit(versions[-1], index * 30, f"Edited line {index}\n"))
+    for version in versions:
+        cache.save_draft("doc-1", version)
+
+    record = cache.get_record("doc-1")
+    assert len(record.deltas) == 5
+    assert record.delta_bytes < record.stored_size
+    assert OfflineDraftCache(tmp_path).load_draft("doc-1").content == versions[-1]
+
+
+def test_chain_rebases_after_max_deltas(tmp_path):
+    cache = OfflineDraftCache(tmp_path, max_deltas=3)
+    text = body()
+    cache.save_draft("doc-1", text)
+    first_base = cache.get_record("doc-1").digest
+    for index in range(4):
+        text = edit(text, index, f"Edit {index}\n")
+        cache.save_draft("doc-1", text)
+
+    record = cache.get_record("doc-1")
+    assert record.digest != first_base
+    assert record.deltas == []
+    assert len(blob_files(cache)) == 1
+    assert OfflineDraftCache(tmp_path).load_draft("doc-1").content == text
+
+
+def test_chain_rebases_once_deltas_outgrow_the_base(tmp_path):
+    cache = OfflineDraftCache(tmp_path, rebase_ratio=0.5)
+    cache.save_draft("doc-1", body())
+
+    cache.save_draft("doc-1", body(tag=" rewritten"))
+
+    assert cache.get_record("doc-1").deltas == []
+    assert OfflineDraftCache(tmp_path).load_draft("doc-1").content == body(tag=" rewritten")
+
+
+def test_unchanged_save_stores_nothing_new(tmp_path):
+    cache = OfflineDraftCache(tmp_path)
+    cache.save_draft("doc-1", body(), {"v": 1})
+    files = blob_files(cache)
+
+    cache.save_draft("doc-1", body(), {"v": 2})
+
+    assert blob_files(cache) == files
+    assert cache.is_current("doc-1", body(), {"v": 2})
+    assert not cache.is_current("doc-1", body(tag="x"), {"v": 2})
+
+
+def test_delta_that_rebuilds_the_wrong_text_is_discarded(tmp_path):
+    cache = OfflineDraftCache(tmp_path)
+    cache.save_draft("doc-1", body())
+    cache.save_draft("doc-1", edit(body(), 3, "Edited\n"))
+    digest, _ = cache.get_record("doc-1").deltas[-1]
+    cache.store.path(digest).write_bytes(cache.store.path(cache.store.put("[5]")[0]).read_bytes())
+
+    reopened = OfflineDraftCache(tmp_path)
+
+    assert reopened.load_draft("doc-1") is None
+    assert reopened.get_record("doc-1") is None
+
+
+def test_delta_that_is_not_a_delta_is_discarded(tmp_path):
+    cache = OfflineDraftCache(tmp_path)
+    cache.save_draft("doc-1", body())
+    cache.save_draft("doc-1", edit(body(), 3, "Edited\n"))
+    digest, _ = cache.get_record("doc-1").deltas[-1]
+    cache.store.path(digest).write_bytes(cache.store.path(cache.store.put('[{"op": 1}]')[0]).read_bytes())
+
+    assert OfflineDraftCache(tmp_path).load_draft("doc-1") is None
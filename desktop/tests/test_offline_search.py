@@ -0,0 +1,164 @@
+"""Offline full-text search over the local caches."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from src.core.api_client import ApiClient
+from src.core.config import ApiConfig
+from src.core.connectivity import ReachabilityProber
+from src.core.offline_cache import OfflineDraftCache
+from src.core.offline_search import OfflineSearchIndex, to_fts_query
+
+
+@pytest.fixture
+def caches(tmp_path):
+    return (
+        OfflineDraftCache(tmp_path, filename=None, dirname="patents"),
+        OfflineDraftCache(tmp_path, filename=None, dirname="drafts"),
+    )
+
+
+@pytest.fixture
+def index(tmp_path, caches):
+    index = OfflineSearchIndex(tmp_path)
+    index.attach(caches[0], "patent")
+    index.attach(caches[1], "draft")
+    yield index
+    index.close()
+
+
+def ids(hits) -> list:
+    return [hit.id for hit in hits]
+
+
+@pytest.mark.parametrize(
+    "query, expression",
+    [
+        ("rotor shaft", '"rotor" "shaft"'),
+        ('"rotor blade" seal', '"rotor blade" "seal"'),
+        ("turb*", '"turb"*'),
+        ("non-obvious", '"non obvious"'),
+        ("NEAR(a b) OR c:d", '"NEAR a" "b" "OR" "c d"'),
+        ('"unterminated phrase', '"unterminated" "phrase"'),
+        ('* - ^ "" ()', ""),
+    ],
+)
+def test_user_input_becomes_a_safe_expression(query, expression):
+    assert to_fts_query(query) == expression
+
+
+@pytest.mark.parametrize(
+    "query", ["AND", "a AND", "(", 'x"y', "title:rotor", "-rotor", "rotor*blade*", "^", "NOT NOT", "'; DROP TABLE x; --"]
+)
+def test_syntax_characters_never_raise(index, caches, query):
+    caches[0].save_draft("p1", "The rotor blade AND title of the NOT seal.")
+
+    assert isinstance(index.search(query), list)
+    assert index.count_matches(query) >= 0
+
+
+def test_saved_entries_are_indexed_and_removed_ones_dropped(index, caches):
+    patents, drafts = caches
+    patents.save_draft("p1", "A turbine rotor with blades.", {"title": "Turbine"})
+    drafts.save_draft("d1", "A rotary pump housing.")
+
+    assert ids(index.search("rotor")) == ["p1"]
+    assert [hit.source for hit in index.search("housing")] == ["draft"]
+    assert "[rotor]" in index.search("rotor")[0].snippet
+
+    patents.save_draft("p1", "A gas turbine with vanes.", {"title": "Turbine"})
+    assert index.search("rotor") == []
+    drafts.remove_draft("d1")
+    assert index.count() == 1
+
+
+def test_phrases_prefixes_and_stemming(index, caches):
+    caches[0].save_draft("p1", "The sealing ring engages the rotor blade.")
+    caches[0].save_draft("p2", "The blade of the rotor is sealed.")
+
+    assert ids(index.search('"rotor blade"')) == ["p1"]
+    assert sorted(ids(index.search("rot*"))) == ["p1", "p2"]
+    assert sorted(ids(index.search("seals"))) == ["p1", "p2"]
+
+
+def test_title_matches_rank_above_body_matches(index, caches):
+    caches[0].save_draft("body", "A valve. " * 3 + "Filler text about nothing in particular.")
+    caches[0].save_draft("title", "Filler text about nothing in particular.", {"title": "Valve"})
+
+    assert ids(index.search("valve")) == ["title", "body"]
+
+
+def test_reconcile_catches_up_with_changes_made_while_detached(tmp_path):
+    patents = OfflineDraftCache(tmp_path, filename=None, dirname="patents")
+    for number in range(3):
+        patents.save_draft(f"p{number}", f"Turbine number {number}.")
+    index = OfflineSearchIndex(tmp_path)
+    index.attach(patents, "patent")
+
+    assert index.reconcile() == 3
+    assert index.reconcile() == 0
+    index.close()
+
+    patents = OfflineDraftCache(tmp_path, filename=None, dirname="patents")
+    patents.remove_draft("p0")
+    patents.save_draft("p1", "Compressor number 1.")
+    index = OfflineSearchIndex(tmp_path)
+    index.attach(patents, "patent")
+
+    assert index.reconcile() == 1
+    assert sorted(ids(index.search("turbine"))) == ["p2"]
+    assert ids(index.search("compressor")) == ["p1"]
+    index.close()
+
+
+def test_evicted_entries_leave_the_index(index, caches):
+    caches[0].save_draft("p1", "Rotor.")
+    caches[0].save_draft("p2", "Rotor.")
+
+    caches[0].evict(["p1"])
+
+    assert ids(index.search("rotor")) == ["p2"]
+
+
+def test_offline_search_pages_through_every_match(index, caches):
+    for number in range(25):
+        caches[number % 2].save_draft(f"doc-{number:02d}", f"Rotor variant {number}.")
+    client = ApiClient(ApiConfig(), offline_index=index)
+
+    pages = [client.offline_search("rotor", {"page": page, "pageSize": 10}) for page in (1, 2, 3, 4)]
+
+    assert [len(page["results"]) for page in pages] == [10, 10, 5, 0]
+    assert {page["total"] for page in pages} == {25}
+    found = [hit["id"] for page in pages for hit in page["results"]]
+    assert sorted(found) == [f"doc-{number:02d}" for number in range(25)]
+    assert all(page["offline"] for page in pages)
+
+
+def test_offline_search_without_an_index_is_an_empty_page():
+    client = ApiClient(ApiConfig())
+
+    page = client.offline_search("rotor", {"page": 2, "pageSize": 5})
+
+    assert page == {"results": [], "page": 2, "pageSize": 5, "total": 0, "offline": True}
+
+
+def test_search_pager_falls_back_to_the_index_while_offline(index, caches):
+    for number in range(12):
+        caches[0].save_draft(f"doc-{number:02d}", f"Rotor variant {number}.")
+    prober = ReachabilityProber("http://127.0.0.1:9")
+    prober.online = False
+    client = ApiClient(ApiConfig(), offline_index=index, prober=prober)
+
+    async def collect():
+        try:
+            return [page async for page in client.search_pages("rotor", page_size=5)]
+        finally:
+            await client.close()
+
+    pages = asyncio.run(collect())
+
+    assert [len(page.results) for page in pages] == [5, 5, 2]
+    assert all(page.meta["offline"] for page in pages)
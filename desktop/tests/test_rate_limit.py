@@ -0,0 +1,102 @@
+"""Token buckets, the interactive reserve and server back-off."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+from src.core.config import RateLimitConfig
+from src.core.rate_limit import RateLimit, RateLimiter, TokenBucket, background_traffic, parse_retry_after
+
+
+def drain(bucket: TokenBucket, background: bool) -> int:
+    taken = 0
+    while bucket.try_take(background) == 0.0:
+        taken += 1
+    return taken
+
+
+def test_burst_is_available_immediately_then_callers_wait():
+    bucket = TokenBucket(RateLimit(rate=10.0, burst=5.0), interactive_reserve=0.0)
+
+    assert drain(bucket, background=False) == 5
+    assert bucket.try_take(False) == pytest.approx(0.1, abs=0.01)
+
+
+def test_background_callers_leave_the_reserve_to_interactive_ones():
+    bucket = TokenBucket(RateLimit(rate=1.0, burst=8.0), interactive_reserve=0.25)
+
+    assert drain(bucket, background=True) == 6
+    assert bucket.try_take(True) > 0
+    assert drain(bucket, background=False) == 2
+
+
+@pytest.mark.parametrize(
+    "limit, reserve",
+    [(RateLimit(0.5, 1.0), 0.25), (RateLimit(0.5, 1.0), 0.9), (RateLimit(1.0, 1.5), 0.25), (RateLimit(10.0, 2.0), 0.9)],
+)
+def test_low_capacity_buckets_still_admit_background_traffic(limit, reserve):
+    bucket = TokenBucket(limit, interactive_reserve=reserve)
+
+    assert bucket.try_take(True) == 0.0
+
+
+def test_from_config_low_rates_admit_background_replay():
+    config = RateLimitConfig(annotations_per_second=0.5, interactive_reserve=0.8)
+    limiter = RateLimiter.from_config(config)
+
+    async def replay():
+        with background_traffic():
+            await asyncio.wait_for(limiter.acquire("annotations"), 1.0)
+
+    asyncio.run(replay())
+
+
+def test_zero_rate_is_unlimited():
+    bucket = TokenBucket(RateLimit(rate=0.0, burst=1.0))
+
+    assert all(bucket.try_take(background) == 0.0 for background in (True, False) for _ in range(100))
+
+
+def test_block_for_pauses_every_caller():
+    bucket = TokenBucket(RateLimit(rate=0.0, burst=10.0))
+    bucket.block_for(0.2)
+
+    assert bucket.try_take(False) == pytest.approx(0.2, abs=0.05)
+    assert bucket.try_take(True) > 0
+    time.sleep(0.21)
+    assert bucket.try_take(False) == 0.0
+
+
+def test_retry_after_on_throttling_response_blocks_the_endpoint_family():
+    limiter = RateLimiter()
+    limiter.observe("search", 429, {"Retry-After": "3"})
+    limiter.observe("upload", 500, {"Retry-After": "3"})
+
+    assert limiter.bucket("search").try_take(False) == pytest.approx(3.0, abs=0.1)
+    assert limiter.bucket("upload").try_take(False) == 0.0
+    assert limiter.bucket("annotations").try_take(False) == 0.0
+
+
+def test_parse_retry_after():
+    future = datetime.now(timezone.utc) + timedelta(seconds=30)
+
+    assert parse_retry_after("12") == 12.0
+    assert parse_retry_after("-5") == 0.0
+    assert parse_retry_after(format_datetime(future, usegmt=True)) == pytest.approx(30, abs=2)
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+
+def test_disabled_limiter_never_waits():
+    limiter = RateLimiter(default=RateLimit(rate=0.001, burst=1.0), enabled=False)
+
+    async def calls():
+        for _ in range(10):
+            await asyncio.wait_for(limiter.acquire("search"), 0.1)
+
+    asyncio.run(calls())
@@ -0,0 +1,159 @@
+"""Retry and circuit-breaker behaviour against a local aiohttp server."""
+
+from __future__ import annotations
+
+import asyncio
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.core.api_client import ApiClient
+from src.core.config import ApiConfig
+from src.core.rate_limit import RateLimiter
+from src.core.retry_policy import CircuitState, RetryBudget, RetryPolicy
+from src.utils.exceptions import CircuitOpenError
+
+
+class FlakyBackend:
+    """Annotation endpoint that fails a scripted number of times."""
+
+    def __init__(self, failures=(), delay: float = 0.0):
+        self.failures = list(failures)
+        self.delay = delay
+        self.hits = 0
+        self.keys = []
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.hits += 1
+        self.keys.append(request.headers.get("Idempotency-Key"))
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.failures:
+            return web.json_response({"error": "injected"}, status=self.failures.pop(0))
+        return web.json_response({"ok": True, "hit": self.hits})
+
+
+def policy(**overrides) -> RetryPolicy:
+    settings = dict(max_attempts=3, base_delay=0.001, max_delay=0.01, failure_threshold=3, reset_timeout=30.0)
+    settings.update(overrides)
+    return RetryPolicy(budget=RetryBudget(ratio=1.0, capacity=100.0), **settings)
+
+
+def run(backend: FlakyBackend, retry_policy: RetryPolicy, scenario):
+    async def main():
+        app = web.Application()
+        app.router.add_post("/annotations", backend.handle)
+        async with TestServer(app) as server:
+            client = ApiClient(
+                ApiConfig(annotation_base_url=str(server.make_url("/annotations"))),
+                retry_policy=retry_policy,
+                rate_limiter=RateLimiter(enabled=False),
+            )
+            try:
+                return await scenario(client)
+            finally:
+                await client.close()
+
+    return asyncio.run(main())
+
+
+def test_transient_failures_are_retried_with_the_same_idempotency_key():
+    backend = FlakyBackend(failures=[503, 502])
+
+    result = run(backend, policy(), lambda client: client.async_annotation_sync({"id": "a1"}, idempotency_key="k1"))
+
+    assert result == {"ok": True, "hit": 3}
+    assert backend.keys == ["k1", "k1", "k1"]
+
+
+def test_permanent_failures_are_not_retried():
+    backend = FlakyBackend(failures=[400])
+    retry_policy = policy()
+
+    with pytest.raises(aiohttp.ClientResponseError) as excinfo:
+        run(backend, retry_policy, lambda client: client.async_annotation_sync({"id": "a1"}))
+
+    assert excinfo.value.status == 400
+    assert backend.hits == 1
+    assert retry_policy.breaker("annotations").state is CircuitState.CLOSED
+
+
+def test_gives_up_after_max_attempts():
+    backend = FlakyBackend(failures=[503] * 5)
+
+    with pytest.raises(aiohttp.ClientResponseError):
+        run(backend, policy(failure_threshold=10), lambda client: client.async_annotation_sync({"id": "a1"}))
+
+    assert backend.hits == 3
+
+
+def test_open_circuit_fails_fast_without_reaching_the_server():
+    backend = FlakyBackend(failures=[503] * 10)
+    retry_policy = policy()
+
+    async def scenario(client):
+        with pytest.raises(aiohttp.ClientResponseError):
+            await client.async_annotation_sync({"id": "a1"})
+        with pytest.raises(CircuitOpenError):
+            await client.async_annotation_sync({"id": "a2"})
+
+    run(backend, retry_policy, scenario)
+
+    assert backend.hits == 3
+    assert retry_policy.breaker("annotations").state is CircuitState.OPEN
+
+
+def test_half_open_probe_closes_the_circuit_on_success():
+    backend = FlakyBackend(failures=[503] * 3)
+    retry_policy = policy(reset_timeout=0.05)
+
+    async def scenario(client):
+        with pytest.raises(aiohttp.ClientResponseError):
+            await client.async_annotation_sync({"id": "a1"})
+        await asyncio.sleep(0.06)
+        return await client.async_annotation_sync({"id": "a2"})
+
+    assert run(backend, retry_policy, scenario)["ok"]
+    assert retry_policy.breaker("annotations").state is CircuitState.CLOSED
+
+
+def test_cancelled_probe_releases_the_half_open_slot():
+    backend = FlakyBackend(failures=[503] * 3)
+    retry_policy = policy(reset_timeout=0.05)
+
+    async def scenario(client):
+        with pytest.raises(aiohttp.ClientResponseError):
+            await client.async_annotation_sync({"id": "a1"})
+        await asyncio.sleep(0.06)
+        backend.delay = 1.0
+        probe = asyncio.ensure_future(client.async_annotation_sync({"id": "a2"}))
+        await asyncio.sleep(0.05)
+        assert retry_policy.breaker("annotations").state is CircuitState.HALF_OPEN
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        backend.delay = 0.0
+        return await client.async_annotation_sync({"id": "a3"})
+
+    assert run(backend, retry_policy, scenario)["ok"]
+    assert retry_policy.breaker("annotations").state is CircuitState.CLOSED
+
+
+def test_retry_budget_caps_retries_during_an_outage():
+    backend = FlakyBackend(failures=[503] * 100)
+    retry_policy = RetryPolicy(
+        max_attempts=5, base_delay=0.001, max_delay=0.01, failure_threshold=1000,
+        budget=RetryBudget(ratio=0.2, capacity=1.0),
+    )
+
+    async def scenario(client):
+        for i in range(10):
+            with pytest.raises(aiohttp.ClientResponseError):
+                await client.async_annotation_sync({"id": f"a{i}"})
+
+    run(backend, retry_policy, scenario)
+
+    # Ten first attempts, the one banked retry, and one per five calls after that.
+    assert backend.hits <= 10 + 1 + 2
@@ -0,0 +1,202 @@
+"""Server-sent event parsing and the analysis-run event stream."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.core.api_client import ApiClient
+from src.core.config import ApiConfig
+from src.core.rate_limit import RateLimiter
+from src.core.run_events import AnalysisRunEventStream, AnalysisRunMonitor, SSEParser
+
+
+def feed_all(parser: SSEParser, *chunks: bytes) -> list:
+    return [event for chunk in chunks for event in parser.feed(chunk)]
+
+
+@pytest.mark.parametrize("newline", [b"\n", b"\r\n", b"\r"], ids=["lf", "crlf", "cr"])
+def test_lines_split_on_every_newline_style(newline):
+    wire = newline.join([b"data: one", b"", b"event: progress", b"data: two", b"", b""])
+
+    events = feed_all(SSEParser(), wire)
+
+    assert [(event.event, event.data) for event in events] == [("message", "one"), ("progress", "two")]
+
+
+def test_crlf_split_across_chunks_is_one_line_break():
+    events = feed_all(SSEParser(), b"data: a\r", b"", b"\n\r", b"\ndata: b\r", b"\r")
+
+    assert [event.data for event in events] == ["a", "b"]
+
+
+def test_multi_line_data_is_joined_with_newlines():
+    events = feed_all(SSEParser(), b"data: first\ndata:second\ndata:  indented\n\n")
+
+    assert events[0].data == "first\nsecond\n indented"
+
+
+def test_comments_and_unknown_fields_are_ignored():
+    events = feed_all(SSEParser(), b": keep-alive\n\nfoo: bar\ndata: x\n\n:\n")
+
+    assert [event.data for event in events] == ["x"]
+
+
+def test_id_persists_and_retry_sets_the_reconnect_delay():
+    parser = SSEParser()
+
+    events = feed_all(parser, b"id: 7\nretry: 250\ndata: a\n\ndata: b\n\nretry: soon\nid: bad\0id\n\n")
+
+    assert [(event.data, event.id) for event in events] == [("a", "7"), ("b", "7")]
+    assert parser.last_event_id == "7"
+    assert parser.retry_ms == 250
+
+
+def test_multi_byte_character_split_across_chunks():
+    wire = 'data: {"message": "Prüfung – läuft"}\n\n'.encode("utf-8")
+    split = wire.index("ü".encode("utf-8")) + 1
+
+    events = feed_all(SSEParser(), wire[:split], wire[split:])
+
+    assert events[0].json() == {"message": "Prüfung – läuft"}
+
+
+def test_byte_at_a_time_equals_whole_stream():
+    wire = "id: 1\r\ndata: α\r\n\r\n: ping\r\ndata: β\rdata: γ\r\r".encode("utf-8")
+
+    whole = feed_all(SSEParser(), wire)
+    trickled = feed_all(SSEParser(), *(wire[i:i + 1] for i in range(len(wire))))
+
+    assert [(event.data, event.id) for event in trickled] == [(event.data, event.id) for event in whole]
+    assert [event.data for event in whole] == ["α", "β\nγ"]
+
+
+class RunEventsBackend:
+    """Serves scripted event-stream responses, one per connection."""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.last_event_ids = []
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/analysis-runs/{id}/events", self.events)
+        return app
+
+    async def events(self, request: web.Request) -> web.StreamResponse:
+        self.last_event_ids.append(request.headers.get("Last-Event-ID"))
+        response = self.responses.pop(0) if self.responses else []
+        if isinstance(response, int):
+            return web.Response(status=response)
+        stream = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await stream.prepare(request)
+        for event_id, payload in response:
+            prefix = f"id: {event_id}\n" if event_id else ""
+            await stream.write(f"{prefix}data: {json.dumps(payload)}\n\n".encode("utf-8"))
+        return stream
+
+
+def follow(backend: RunEventsBackend, scenario):
+    async def main():
+        async with TestServer(backend.app()) as server:
+            client = ApiClient(
+                ApiConfig(analysis_runs_base_url=str(server.make_url("/analysis-runs"))),
+                rate_limiter=RateLimiter(enabled=False),
+            )
+            try:
+                return await scenario(client)
+            finally:
+                await client.close()
+
+    return asyncio.run(main())
+
+
+def collect(max_reconnects: int = 5):
+    async def scenario(client):
+        stream = AnalysisRunEventStream(client, "run-1", reconnect_delay=0.01, max_reconnects=max_reconnects)
+        return [event async for event in stream.events()]
+
+    return scenario
+
+
+def test_stream_reconnects_with_last_event_id():
+    backend = RunEventsBackend([
+        [("1", {"status": "connected"}), ("2", {"status": "RUNNING", "steps": 1})],
+        [("3", {"status": "COMPLETED", "outputs": {"score": 80}})],
+    ])
+
+    events = follow(backend, collect())
+
+    assert [event["status"] for event in events] == ["connected", "RUNNING", "COMPLETED"]
+    assert backend.last_event_ids == [None, "2"]
+
+
+def test_stream_stops_at_a_terminal_status():
+    backend = RunEventsBackend([[(None, {"status": "FAILED"}), (None, {"status": "ignored"})]])
+
+    events = follow(backend, collect())
+
+    assert [event["status"] for event in events] == ["FAILED"]
+    assert len(backend.last_event_ids) == 1
+
+
+def test_server_errors_are_retried_up_to_max_reconnects():
+    backend = RunEventsBackend([503, 502, [(None, {"status": "COMPLETED"})]])
+
+    assert follow(backend, collect(max_reconnects=2))[-1]["status"] == "COMPLETED"
+
+
+def test_gives_up_after_max_reconnects():
+    backend = RunEventsBackend([[], [], [], []])
+
+    with pytest.raises(ConnectionError):
+        follow(backend, collect(max_reconnects=2))
+
+    assert len(backend.last_event_ids) == 3
+
+
+def test_client_errors_are_not_retried():
+    backend = RunEventsBackend([404, [(None, {"status": "COMPLETED"})]])
+
+    with pytest.raises(aiohttp.ClientResponseError) as excinfo:
+        follow(backend, collect())
+
+    assert excinfo.value.status == 404
+    assert len(backend.last_event_ids) == 1
+
+
+def watch(backend: RunEventsBackend):
+    signals = []
+
+    async def scenario(client):
+        monitor = AnalysisRunMonitor(client)
+        monitor.progress.connect(lambda run_id, event: signals.append(("progress", event["status"])))
+        monitor.completed.connect(lambda run_id, event: signals.append(("completed", event)))
+        monitor.failed.connect(lambda run_id, message: signals.append(("failed", message)))
+        return await monitor.watch("run-1")
+
+    return follow(backend, scenario), signals
+
+
+def test_monitor_completes_with_the_final_event():
+    final = {"status": "COMPLETED", "outputs": {"score": 80}, "steps": [], "completedAt": "2024-01-01T00:00:00Z"}
+    backend = RunEventsBackend([[(None, {"status": "connected"}), (None, final)]])
+
+    result, signals = watch(backend)
+
+    assert result == final
+    assert signals == [("progress", "connected"), ("completed", final)]
+
+
+def test_monitor_reports_a_failed_run():
+    backend = RunEventsBackend([[(None, {"status": "error", "message": "Run not found"})]])
+
+    result, signals = watch(backend)
+
+    assert result is None
+    assert signals == [("failed", "Run not found")]
@@ -0,0 +1,204 @@
+"""Streaming JSON decoding and paged search with prefetch."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.core.api_client import ApiClient
+from src.core.config import ApiConfig
+from src.core.rate_limit import RateLimiter
+from src.core.search_pager import MAX_PAGE, JsonObjectStream, SearchPager
+
+BODY = {
+    "page": 2,
+    "total": 1234,
+    "results": [
+        {"id": "p1", "title": "Brace {yourself}", "score": 1.5e-3},
+        {"id": "p2", "title": 'Quote \\" and } inside', "tags": ["[", "]"], "nested": {"a": [1, {"b": None}]}},
+        {"id": "p3", "title": "Ünïcode – “quotes”", "score": -12},
+        [],
+        "scalar",
+        7,
+    ],
+    "pageSize": 20,
+    "facets": {"results": ["not", "streamed"]},
+}
+
+
+def decode(text: str, cuts) -> tuple:
+    stream = JsonObjectStream("results")
+    items = []
+    start = 0
+    for cut in list(cuts) + [len(text)]:
+        items.extend(stream.feed(text[start:cut]))
+        start = cut
+    items.extend(stream.feed("", final=True))
+    return items, stream.members
+
+
+@pytest.mark.parametrize("indent", [None, 2], ids=["compact", "indented"])
+def test_every_split_point_decodes_like_json_loads(indent):
+    text = json.dumps(BODY, indent=indent, ensure_ascii=False)
+    expected_members = {key: value for key, value in BODY.items() if key != "results"}
+
+    for cut in range(len(text) + 1):
+        items, members = decode(text, [cut])
+        assert items == BODY["results"], cut
+        assert members == expected_members, cut
+
+
+def test_character_at_a_time():
+    text = json.dumps(BODY)
+
+    items, members = decode(text, range(1, len(text)))
+
+    assert items == BODY["results"]
+    assert members["total"] == 1234
+
+
+def test_elements_are_emitted_as_soon_as_they_are_complete():
+    stream = JsonObjectStream("results")
+    text = json.dumps({"results": [{"id": 1}, {"id": 2}]})
+    second = text.index('{"id": 2}')
+
+    assert stream.feed(text[:second]) == [{"id": 1}]
+    assert stream.feed(text[second:], final=True) == [{"id": 2}]
+
+
+def test_number_split_before_its_exponent_is_not_cut_short():
+    items, members = decode('{"total": 15e2, "results": [2.5E-1]}', [12, 13, 31, 33])
+
+    assert members["total"] == 1500
+    assert items == [0.25]
+
+
+@pytest.mark.parametrize("text", ['{"results": [1, 2', '{"total": 3', '{"results": [1] "x": 2}', '[1, 2]'])
+def test_truncated_or_malformed_body_raises(text):
+    with pytest.raises(json.JSONDecodeError):
+        decode(text, [])
+
+
+class SearchBackend:
+    """Serves ``total`` numbered results; each page takes ``latency`` seconds."""
+
+    def __init__(self, total: int, latency: float = 0.0, chunked: bool = False):
+        self.total = total
+        self.latency = latency
+        self.chunked = chunked
+        self.requests = []
+        self.finished = []
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/search", self.search)
+        return app
+
+    async def search(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        page, size = body["page"], body["pageSize"]
+        self.requests.append((page, time.perf_counter()))
+        await asyncio.sleep(self.latency)
+        first = (page - 1) * size
+        results = [{"id": f"r{i}", "query": body["query"]} for i in range(first, min(first + size, self.total))]
+        payload = json.dumps({"results": results, "page": page, "pageSize": size, "total": self.total}).encode()
+        self.finished.append(page)
+        if not self.chunked:
+            return web.Response(body=payload, content_type="application/json")
+        response = web.StreamResponse(headers={"Content-Type": "application/json; charset=utf-8"})
+        response.enable_chunked_encoding()
+        await response.prepare(request)
+        for offset in range(0, len(payload), 7):
+            await response.write(payload[offset:offset + 7])
+        return response
+
+
+def page_through(backend: SearchBackend, consume, **pager_options):
+    async def main():
+        async with TestServer(backend.app()) as server:
+            client = ApiClient(
+                ApiConfig(search_base_url=str(server.make_url("/search"))), rate_limiter=RateLimiter(enabled=False)
+            )
+            try:
+                return await consume(SearchPager(client, "turbine", **pager_options))
+            finally:
+                await client.close()
+
+    return asyncio.run(main())
+
+
+async def all_ids(pager) -> list:
+    return [[result["id"] for result in page.results] async for page in pager]
+
+
+def test_pages_until_total_is_reached():
+    backend = SearchBackend(total=23)
+
+    pages = page_through(backend, all_ids, page_size=10)
+
+    assert [len(page) for page in pages] == [10, 10, 3]
+    assert pages[2] == ["r20", "r21", "r22"]
+    assert [page for page, _ in backend.requests] == [1, 2, 3]
+
+
+def test_chunked_body_is_parsed_incrementally():
+    backend = SearchBackend(total=12, chunked=True)
+
+    pages = page_through(backend, all_ids, page_size=5)
+
+    assert sum(pages, []) == [f"r{i}" for i in range(12)]
+
+
+def test_next_page_is_fetched_while_the_caller_consumes_the_current_one():
+    latency = 0.05
+
+    async def slow_consumer(pager):
+        async for page in pager:
+            await asyncio.sleep(latency)
+
+    serial = time.perf_counter()
+    page_through(SearchBackend(total=40, latency=latency), slow_consumer, page_size=10, prefetch=False)
+    serial = time.perf_counter() - serial
+    prefetched = time.perf_counter()
+    page_through(SearchBackend(total=40, latency=latency), slow_consumer, page_size=10)
+    prefetched = time.perf_counter() - prefetched
+
+    # Four pages: about 8 x 50 ms in turn, about 5 x 50 ms overlapped.
+    assert prefetched < serial - 2 * latency
+
+
+def test_breaking_out_early_cancels_the_prefetch():
+    backend = SearchBackend(total=500, latency=0.05)
+
+    async def first_page(pager):
+        async for page in pager:
+            break
+        await asyncio.sleep(0.1)
+        return page.page
+
+    assert page_through(backend, first_page, page_size=10) == 1
+    assert [page for page, _ in backend.requests] == [1, 2]
+    assert backend.finished == [1]
+
+
+def test_max_pages_stops_without_fetching_further():
+    backend = SearchBackend(total=500)
+
+    pages = page_through(backend, all_ids, page_size=10, max_pages=3)
+
+    assert len(pages) == 3
+    assert [page for page, _ in backend.requests] == [1, 2, 3]
+
+
+def test_iteration_stops_at_the_last_page_the_api_serves():
+    backend = SearchBackend(total=10_000)
+
+    pages = page_through(backend, all_ids, page_size=5, start_page=MAX_PAGE - 1)
+
+    assert [page for page, _ in backend.requests] == [MAX_PAGE - 1, MAX_PAGE]
+    assert len(pages) == 2
@@ -0,0 +1,207 @@
+"""Coalescing of identical concurrent requests."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.core.api_client import ApiClient
+from src.core.config import ApiConfig
+from src.core.rate_limit import RateLimiter
+from src.core.single_flight import SingleFlight, request_key
+
+
+class Upstream:
+    """A slow call that counts how often it really ran."""
+
+    def __init__(self, result=None, error=None, delay: float = 0.05):
+        self.result = {"value": 1} if result is None else result
+        self.error = error
+        self.delay = delay
+        self.calls = 0
+        self.cancelled = 0
+
+    async def __call__(self):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def test_request_key_ignores_body_key_order():
+    assert request_key("get", "/a", {"x": 1, "y": 2}) == request_key("GET", "/a", {"y": 2, "x": 1})
+    assert request_key("GET", "/a", {"x": 1}) != request_key("GET", "/a", {"x": 2})
+    assert request_key("GET", "/a") != request_key("POST", "/a")
+
+
+def test_concurrent_callers_share_one_call_and_its_result():
+    flight = SingleFlight()
+    upstream = Upstream()
+
+    async def main():
+        return await asyncio.gather(*(flight.do_async("k", upstream) for _ in range(5)))
+
+    results = asyncio.run(main())
+
+    assert upstream.calls == 1
+    assert all(result is upstream.result for result in results)
+    assert flight.in_flight() == 0
+
+
+def test_error_reaches_every_waiter():
+    flight = SingleFlight()
+    upstream = Upstream(error=ValueError("boom"))
+
+    async def main():
+        return await asyncio.gather(*(flight.do_async("k", upstream) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+
+    assert upstream.calls == 1
+    assert all(isinstance(result, ValueError) and str(result) == "boom" for result in results)
+    assert flight.in_flight() == 0
+
+
+def test_different_keys_do_not_coalesce():
+    flight = SingleFlight()
+    upstream = Upstream()
+
+    async def main():
+        await asyncio.gather(flight.do_async("a", upstream), flight.do_async("b", upstream))
+
+    asyncio.run(main())
+
+    assert upstream.calls == 2
+
+
+def test_cancelling_one_waiter_leaves_the_shared_call_running():
+    flight = SingleFlight()
+    upstream = Upstream()
+
+    async def main():
+        first = asyncio.ensure_future(flight.do_async("k", upstream))
+        second = asyncio.ensure_future(flight.do_async("k", upstream))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) is upstream.result
+    assert (upstream.calls, upstream.cancelled) == (1, 0)
+
+
+def test_cancelling_the_last_waiter_cancels_the_shared_call():
+    flight = SingleFlight()
+    upstream = Upstream(delay=1.0)
+
+    async def main():
+        waiters = [asyncio.ensure_future(flight.do_async("k", upstream)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.sleep(0)
+
+    asyncio.run(main())
+
+    assert upstream.cancelled == 1
+    assert flight.in_flight() == 0
+
+
+def test_caller_arriving_after_the_last_waiter_left_starts_a_fresh_call():
+    flight = SingleFlight()
+    upstream = Upstream()
+
+    async def main():
+        abandoned = asyncio.ensure_future(flight.do_async("k", upstream))
+        await asyncio.sleep(0.01)
+        abandoned.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await abandoned
+        # The abandoned call may not have finished cancelling yet.
+        return await flight.do_async("k", upstream)
+
+    assert asyncio.run(main()) is upstream.result
+    assert upstream.calls == 2
+
+
+def test_key_is_cleared_after_completion():
+    flight = SingleFlight()
+    upstream = Upstream()
+
+    async def main():
+        await flight.do_async("k", upstream)
+        assert flight.in_flight() == 0
+        await flight.do_async("k", upstream)
+
+    asyncio.run(main())
+
+    assert upstream.calls == 2
+
+
+def test_threads_share_one_blocking_call():
+    flight = SingleFlight()
+    calls = []
+    results = []
+    started = threading.Event()
+
+    def fetch():
+        calls.append(1)
+        started.set()
+        time.sleep(0.1)
+        return {"value": 1}
+
+    def caller():
+        results.append(flight.do("k", fetch))
+
+    threads = [threading.Thread(target=caller) for _ in range(4)]
+    threads[0].start()
+    started.wait()
+    for thread in threads[1:]:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert len(results) == 4 and all(result is results[0] for result in results)
+    assert flight.in_flight() == 0
+
+
+def test_concurrent_identical_gets_reach_the_server_once():
+    hits = []
+
+    async def report(request: web.Request) -> web.Response:
+        hits.append(request.path)
+        await asyncio.sleep(0.05)
+        return web.json_response({"id": request.match_info["id"]})
+
+    async def main():
+        app = web.Application()
+        app.router.add_get("/reports/{id}", report)
+        async with TestServer(app) as server:
+            client = ApiClient(ApiConfig(), rate_limiter=RateLimiter(enabled=False))
+            url = str(server.make_url("/reports/r1"))
+            try:
+                return await asyncio.gather(
+                    *(client._async_request("GET", url, "reports", 5) for _ in range(5)),
+                    client._async_request("GET", str(server.make_url("/reports/r2")), "reports", 5),
+                )
+            finally:
+                await client.close()
+
+    results = asyncio.run(main())
+
+    assert sorted(hits) == ["/reports/r1", "/reports/r2"]
+    assert all(result is results[0] for result in results[:5])
+    assert results[5] == {"id": "r2"}
@@ -0,0 +1,261 @@
+"""Ordering and claim semantics of both sync queue backends."""
+
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from src.core.sync_journal import SyncJournal
+from src.core.sync_queue import SyncQueue, SyncTask
+from src.core.sync_store import SqliteSyncQueue
+
+BACKENDS = {"journal": SyncQueue, "sqlite": SqliteSyncQueue}
+
+
+@pytest.fixture(params=sorted(BACKENDS))
+def backend(request):
+    return BACKENDS[request.param]
+
+
+@pytest.fixture
+def queue(backend, tmp_path):
+    queue = backend(tmp_path)
+    yield queue
+    queue.close()
+
+
+def annotation(document_id: str, annotation_id: str) -> SyncTask:
+    return SyncTask.create("annotation", {"document_id": document_id, "id": annotation_id})
+
+
+def upload(document_id: str) -> SyncTask:
+    return SyncTask.create("upload", {"document_id": document_id, "content": "text"})
+
+
+def drain(queue, busy_keys=frozenset()) -> list:
+    claimed = []
+    while True:
+        task = queue.claim_next(set(busy_keys))
+        if task is None:
+            return claimed
+        claimed.append(task.payload.get("id", task.kind))
+        queue.remove(task.task_id)
+
+
+def test_tasks_of_one_key_are_claimed_in_insertion_order(queue):
+    for i in range(5):
+        queue.enqueue(annotation("doc-1", f"a{i}"))
+
+    assert drain(queue) == ["a0", "a1", "a2", "a3", "a4"]
+    assert len(queue) == 0
+
+
+def test_claim_does_not_dequeue(queue):
+    task = annotation("doc-1", "a0")
+    queue.enqueue(task)
+
+    assert queue.claim_next(set()).task_id == task.task_id
+    assert queue.claim_next(set()).task_id == task.task_id
+    assert len(queue) == 1
+
+
+def test_interactive_work_runs_before_bulk_uploads(queue):
+    queue.enqueue(upload("doc-1"))
+    queue.enqueue(annotation("doc-2", "a0"))
+    queue.enqueue(upload("doc-3"))
+    queue.enqueue(annotation("doc-4", "a1"))
+
+    assert drain(queue) == ["a0", "a1", "upload", "upload"]
+
+
+def test_only_the_head_of_a_key_is_eligible(queue):
+    # The annotation outranks the upload but must wait behind it on the same document.
+    queue.enqueue(upload("doc-1"))
+    queue.enqueue(annotation("doc-1", "a0"))
+
+    assert queue.claim_next(set()).kind == "upload"
+
+
+def test_busy_keys_are_skipped_without_losing_their_place(queue):
+    queue.enqueue(annotation("doc-1", "a0"))
+    queue.enqueue(annotation("doc-1", "a1"))
+    queue.enqueue(annotation("doc-2", "b0"))
+
+    assert queue.claim_next({"document:doc-1"}).payload["id"] == "b0"
+    assert queue.claim_next({"document:doc-1", "document:doc-2"}) is None
+    assert queue.claim_next(set()).payload["id"] == "a0"
+
+
+def test_backing_off_head_blocks_its_key_but_not_others(queue):
+    first = annotation("doc-1", "a0")
+    queue.enqueue(first)
+    queue.enqueue(annotation("doc-1", "a1"))
+    queue.enqueue(annotation("doc-2", "b0"))
+    retry_at = time.time() + 60
+    first.attempts = 1
+    first.next_attempt_at = retry_at
+    first.last_error = "503"
+    queue.update(first)
+
+    assert drain(queue) == ["b0"]
+    assert queue.next_due_at() == pytest.approx(retry_at)
+    claimed = queue.claim_next(set(), now=retry_at + 1)
+    assert claimed.payload["id"] == "a0"
+    assert (claimed.attempts, claimed.last_error) == (1, "503")
+
+
+def test_next_due_at_is_none_when_nothing_backs_off(queue):
+    queue.enqueue(annotation("doc-1", "a0"))
+
+    assert queue.next_due_at() is None
+
+
+def test_dead_letter_leaves_the_queue_and_replays_at_the_back(queue):
+    failed = annotation("doc-1", "a0")
+    queue.enqueue(failed)
+    queue.enqueue(annotation("doc-1", "a1"))
+    failed.attempts = 5
+    queue.dead_letter(failed, "Rejected by server: 400")
+
+    assert [task.task_id for task in queue.dead_letters()] == [failed.task_id]
+    assert queue.dead_letters()[0].last_error == "Rejected by server: 400"
+    assert queue.claim_next(set()).payload["id"] == "a1"
+
+    replayed = queue.replay_dead_letter(failed.task_id)
+
+    assert replayed.attempts == 0
+    assert queue.dead_letter_count() == 0
+    assert drain(queue) == ["a1", "a0"]
+
+
+def test_purged_dead_letters_are_gone(queue):
+    task = annotation("doc-1", "a0")
+    queue.enqueue(task)
+    queue.dead_letter(task, "gave up")
+    queue.purge_dead_letter(task.task_id)
+
+    assert queue.dead_letter_count() == 0
+    assert queue.replay_dead_letter(task.task_id) is None
+
+
+def test_indexes_by_document_kind_and_compaction_key(queue):
+    queue.enqueue(annotation("doc-1", "a0"))
+    queue.enqueue(upload("doc-1"))
+    queue.enqueue(annotation("doc-2", "a0"))
+
+    assert [task.kind for task in queue.pending_for_document("doc-1")] == ["annotation", "upload"]
+    assert len(queue.pending_for_document("doc-1", kind="upload")) == 1
+    assert queue.count_by_kind() == {"annotation": 2, "upload": 1}
+    assert len(queue.with_compaction_key("annotation:a0")) == 2
+    assert len(queue.with_compaction_key("upload:doc-1")) == 1
+
+
+def test_state_survives_reopening(backend, tmp_path):
+    queue = backend(tmp_path)
+    tasks = [annotation("doc-1", f"a{i}") for i in range(3)]
+    for task in tasks:
+        queue.enqueue(task)
+    queue.enqueue(upload("doc-2"))
+    tasks[1].attempts = 2
+    tasks[1].next_attempt_at = 123.0
+    queue.update(tasks[1])
+    queue.remove(tasks[0].task_id)
+    dead = annotation("doc-3", "c0")
+    queue.enqueue(dead)
+    queue.dead_letter(dead, "gave up")
+    queue.close()
+
+    reopened = backend(tmp_path)
+    try:
+        assert [task.task_id for task in reopened.tasks] == [
+            tasks[1].task_id, tasks[2].task_id, reopened.tasks[2].task_id
+        ]
+        assert (reopened.tasks[0].attempts, reopened.tasks[0].next_attempt_at) == (2, 123.0)
+        assert [task.task_id for task in reopened.dead_letters()] == [dead.task_id]
+        assert drain(reopened) == ["a1", "a2", "upload"]
+    finally:
+        reopened.close()
+
+
+def test_journal_compacts_once_acks_dominate(tmp_path):
+    queue = SyncQueue(tmp_path, compact_min_records=16)
+    for i in range(100):
+        task = annotation(f"doc-{i}", f"a{i}")
+        queue.enqueue(task)
+        queue.remove(task.task_id)
+    queue.enqueue(annotation("doc-x", "kept"))
+
+    assert queue.journal.record_count < 40
+    queue.close()
+    reopened = SyncQueue(tmp_path)
+    assert drain(reopened) == ["kept"]
+    reopened.close()
+
+
+def test_journal_recovers_from_a_torn_tail(tmp_path):
+    queue = SyncQueue(tmp_path)
+    queue.enqueue(annotation("doc-1", "a0"))
+    queue.close()
+    with open(queue.path, "a", encoding="utf-8") as f:
+        f.write('{"op": "put", "task": {"task_id": "half')
+
+    reopened = SyncQueue(tmp_path)
+
+    assert drain(reopened) == ["a0"]
+    reopened.close()
+
+
+def test_unreadable_journal_is_set_aside_not_wiped(tmp_path):
+    queue = SyncQueue(tmp_path)
+    queue.enqueue(annotation("doc-1", "a0"))
+    queue.close()
+    with open(queue.path, "a", encoding="utf-8") as f:
+        f.write('{"op": "put", "task": {"kind": "annotation"}}\n')
+        f.write('{"op": "put", "task": {"task_id": "later"}}\n')
+
+    reopened = SyncQueue(tmp_path)
+
+    assert [task.payload["id"] for task in reopened.tasks] == ["a0"]
+    aside = list(tmp_path.glob("sync-queue.journal.unreadable-*"))
+    assert len(aside) == 1
+    assert "later" in aside[0].read_text(encoding="utf-8")
+    reopened.close()
+    assert drain(SyncQueue(tmp_path)) == ["a0"]
+
+
+def fill(queue, tasks) -> None:
+    """Load a large backlog without paying for one durable write per task."""
+
+    if isinstance(queue, SyncQueue):
+        journal = SyncJournal(queue.path)
+        journal.append_many({"op": "put", "task": task.to_dict()} for task in tasks)
+        journal.close()
+        queue._load()
+    else:
+        with queue._conn:
+            for task in tasks:
+                queue._insert(task)
+
+
+def test_claims_stay_fast_behind_a_large_busy_backlog(backend, tmp_path):
+    """100k tasks on one document that is busy must not slow claims for the others."""
+
+    queue = backend(tmp_path)
+    backlog = [annotation("busy", f"busy-{i}") for i in range(100_000)]
+    backlog += [annotation(f"doc-{i}", f"free-{i}") for i in range(1_000)]
+    fill(queue, backlog)
+    assert len(queue) == 101_000
+
+    start = time.perf_counter()
+    for i in range(1_000):
+        task = queue.claim_next({"document:busy"})
+        assert task.payload["id"] == f"free-{i}"
+        queue.remove(task.task_id)
+    elapsed = time.perf_counter() - start
+
+    assert queue.claim_next({"document:busy"}) is None
+    assert queue.claim_next(set()).payload["id"] == "busy-0"
+    # A scan of the backlog per claim takes tens of seconds here.
+    assert elapsed < 5.0
+    queue.close()